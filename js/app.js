@@ -32,7 +32,7 @@
     const { renderZones } = zonesMod || { renderZones: () => '' };
     const { renderFTP } = ftpMod || { renderFTP: () => '<div class="p-4 text-red-500">FTP Module Failed</div>' }; 
     const { renderRoadmap } = roadmapMod || { renderRoadmap: () => '' };
-    const { renderDashboard } = dashMod || { renderDashboard: () => '' };
+    const { renderDashboard, dashboardDays } = dashMod || { renderDashboard: () => '', dashboardDays: () => ({}) };
     const { renderReadiness } = readinessMod || { renderReadiness: () => '' };
     const renderReadinessChart = readinessMod?.renderReadinessChart || (() => {});
     const { renderMetrics } = metricsMod || { renderMetrics: () => '' };
@@ -43,6 +43,10 @@
         PLAN_FILE: "endurance_plan.md",
         GEAR_FILE: "js/views/gear/Gear.md",
         HISTORY_FILE: "MASTER_TRAINING_DATABASE.md",
+        DASHBOARD_DIR: "data/dashboard",
+        PLAN_MODEL_FILE: "data/plan_model.json",
+        DASHBOARD_ARTIFACTS: ['heatmap', 'planned', 'readiness'],
+        LOG_FILE: "data/dashboard/log.json",
         AUTH_FILE: "auth_config.json",
         WEATHER_MAP: {
             0: ["Clear", "☀️"], 1: ["Partly Cloudy", "🌤️"], 2: ["Partly Cloudy", "🌤️"], 3: ["Cloudy", "☁️"],
@@ -51,6 +55,24 @@
         }
     };
 
+    // Data files revalidate with the server instead of carrying a cache buster, so unchanged ones come back as a 304
+    const fetchData = (path) => fetch(`./${path}`, { cache: 'no-cache' });
+
+    // Local noon of a YYYY-MM-DD key, the time Parser gives log dates
+    const fromYMD = (key) => {
+        const [y, m, d] = key.split('-').map(Number);
+        return new Date(y, m - 1, d, 12, 0, 0);
+    };
+
+    // log.json leaves out empty fields and the ones no log view reads; put back what the parser would give
+    const LOG_DEFAULTS = {
+        type: '', actualType: '', planName: '', actualName: '', completed: false, plannedDuration: 0, actualDuration: 0,
+        notes: '', avgHR: 0, avgPower: 0, avgSpeed: 0, tss: 0, ef: 0, avgCadence: 0, activityId: '', trainingEffectLabel: '',
+        vO2MaxValue: 0, avgGroundContactTime: 0, avgVerticalOscillation: 0, anaerobicTrainingEffect: 0, normPower: 0,
+        trainingStressScore: 0, elevationGain: 0, RPE: '', Feeling: '', sportTypeId: '', activityType: ''
+    };
+    const reviveLogRow = (row) => ({ ...LOG_DEFAULTS, ...row, date: fromYMD(row.date), tss: row.trainingStressScore || 0 });
+
     async function hashString(message) {
         const msgBuffer = new TextEncoder().encode(message);
         const hashBuffer = await crypto.subtle.digest('SHA-256', msgBuffer);
@@ -61,8 +83,11 @@
     const App = {
         planMd: "",
         gearMd: "",
-        archiveMd: "", 
-        allData: [], 
+        archiveMd: null, 
+        archivePromise: null,
+        allData: null, 
+        logPromise: null,
+        currentView: null,
         gearData: null,
         currentTemp: null,
         hourlyWeather: null,
@@ -168,39 +193,30 @@
             if (initialNavBtn) initialNavBtn.classList.add('active');
             
             try {
-                const [planRes, gearRes, archiveRes] = await Promise.all([
-                    fetch(`./${CONFIG.PLAN_FILE}?t=${cacheBuster}`),
-                    fetch(`./${CONFIG.GEAR_FILE}?t=${cacheBuster}`),
-                    fetch(`./${CONFIG.HISTORY_FILE}?t=${cacheBuster}`)
+                const dashboardPromise = this.loadDashboardData();
+                const planModelPromise = fetchData(CONFIG.PLAN_MODEL_FILE)
+                    .then(res => res.ok ? res.json() : null)
+                    .catch(() => null);
+                const [planRes, gearRes] = await Promise.all([
+                    fetchData(CONFIG.PLAN_FILE),
+                    fetchData(CONFIG.GEAR_FILE)
                 ]);
                 
                 if (!planRes.ok) throw new Error(`Could not load ${CONFIG.PLAN_FILE}`);
                 this.planMd = await planRes.text();
                 this.gearMd = await gearRes.text();
-                this.archiveMd = archiveRes.ok ? await archiveRes.text() : "";
+                const planHash = await hashString(this.planMd);
 
-                const masterLog = Parser.parseTrainingLog(this.archiveMd); 
-                const planLog = Parser.parseTrainingLog(this.planMd);      
+                // Parsed plan from the Python sync, only trusted if it was built from this exact file
+                const planModel = await planModelPromise;
+                this.planModel = (planModel && planModel.source_hash === planHash) ? planModel : null;
 
-                const dataMap = new Map();
-                masterLog.forEach(item => {
-                    if (item.date) {
-                        const key = `${item.date.toISOString().split('T')[0]}_${item.type}`;
-                        dataMap.set(key, item);
-                    }
+                // Same for the dashboard aggregates that include the plan; without them the views use the log
+                const dashboardData = await dashboardPromise;
+                ['heatmap', 'planned'].forEach(name => {
+                    if (dashboardData[name] && dashboardData[name].plan_hash !== planHash) dashboardData[name] = null;
                 });
-
-                planLog.forEach(item => {
-                    if (item.date) {
-                        const key = `${item.date.toISOString().split('T')[0]}_${item.type}`;
-                        if (!dataMap.has(key)) {
-                            dataMap.set(key, item);
-                        }
-                    }
-                });
-
-                this.allData = Array.from(dataMap.values()).sort((a,b) => b.date - a.date);
-                this.logData = this.allData; 
+                this.dashboardData = dashboardData;
 
                 this.setupEventListeners();
                 window.addEventListener('hashchange', () => this.handleHashChange());
@@ -212,6 +228,65 @@
             }
         },
 
+        // Pre-aggregated view data written by the Python sync; a missing file just means
+        // that view aggregates the log itself.
+        async loadDashboardData() {
+            const results = await Promise.all(CONFIG.DASHBOARD_ARTIFACTS.map(name =>
+                fetchData(`${CONFIG.DASHBOARD_DIR}/${name}.json`)
+                    .then(res => res.ok ? res.json() : null)
+                    .catch(() => null)
+            ));
+            const data = {};
+            CONFIG.DASHBOARD_ARTIFACTS.forEach((name, i) => { data[name] = results[i]; });
+            return data;
+        },
+
+        // allData for the trends, readiness and metrics views: the DB rows (log.json, or the
+        // database itself before the first sync wrote one) merged with the plan's rows
+        loadLog() {
+            if (!this.logPromise) {
+                this.logPromise = fetchData(CONFIG.LOG_FILE)
+                    .then(res => res.ok ? res.json() : null)
+                    .catch(() => null)
+                    .then(async rows => {
+                        const masterLog = Array.isArray(rows) ? rows.map(reviveLogRow) : Parser.parseTrainingLog(await this.loadArchive());
+                        const planLog = Parser.parseTrainingLog(this.planMd);
+
+                        const dataMap = new Map();
+                        masterLog.forEach(item => {
+                            if (item.date) {
+                                const key = `${item.date.toISOString().split('T')[0]}_${item.type}`;
+                                dataMap.set(key, item);
+                            }
+                        });
+
+                        planLog.forEach(item => {
+                            if (item.date) {
+                                const key = `${item.date.toISOString().split('T')[0]}_${item.type}`;
+                                if (!dataMap.has(key)) {
+                                    dataMap.set(key, item);
+                                }
+                            }
+                        });
+
+                        this.allData = Array.from(dataMap.values()).sort((a,b) => b.date - a.date);
+                        this.logData = this.allData;
+                    });
+            }
+            return this.logPromise;
+        },
+
+        // The raw database is only needed by the logbook
+        loadArchive() {
+            if (!this.archivePromise) {
+                this.archivePromise = fetchData(CONFIG.HISTORY_FILE)
+                    .then(res => res.ok ? res.text() : "")
+                    .catch(() => "")
+                    .then(text => (this.archiveMd = text));
+            }
+            return this.archivePromise;
+        },
+
         setupEventListeners() {
             const navMap = {
                 'nav-dashboard': 'dashboard', 'nav-trends': 'trends', 'nav-logbook': 'logbook',
@@ -248,7 +323,7 @@
             } catch (e) { console.error("Weather unavailable", e); }
         },
 
-        updateStats() {
+        updateStats(dayMap) {
             if (!this.planMd) return;
             
             // --- FIX: UPDATED REGEX FOR NEW STATUS FORMAT ---
@@ -297,7 +372,7 @@
                 const timeStr = diff < 0 ? "Completed" : (diff === 0 ? "Today!" : `${Math.floor(diff/7)}w ${diff%7}d to go`);
                 document.getElementById('stat-event-countdown').innerHTML = `<i class="fa-solid fa-hourglass-half mr-1"></i> ${timeStr}`;
 
-                if (this.allData.length > 0) {
+                if (dayMap && Object.keys(dayMap).length > 0) {
                     const parseDur = (str) => {
                         if(!str || str.includes('km') || str.includes('mi')) return 0;
                         if(!isNaN(str)) return parseInt(str);
@@ -308,14 +383,15 @@
                         return m;
                     };
 
+                    // Longest single session per sport in the last 30 days (maxAct in the day cells)
                     const lookback = new Date(); lookback.setDate(lookback.getDate()-30);
                     let mS=0, mB=0, mR=0;
-                    this.allData.forEach(d => {
-                        if(new Date(d.date) >= lookback) {
-                            let dur = typeof d.actualDuration === 'number' ? d.actualDuration : parseDur(d.duration);
-                            if(d.type==='Swim') mS=Math.max(mS,dur);
-                            if(d.type==='Bike') mB=Math.max(mB,dur);
-                            if(d.type==='Run') mR=Math.max(mR,dur);
+                    Object.entries(dayMap).forEach(([key, day]) => {
+                        if(fromYMD(key) >= lookback) {
+                            const maxAct = day.maxAct || {};
+                            mS=Math.max(mS, maxAct.Swim || 0);
+                            mB=Math.max(mB, maxAct.Bike || 0);
+                            mR=Math.max(mR, maxAct.Run || 0);
                         }
                     });
 
@@ -372,6 +448,7 @@
                 dashboard: 'Weekly Schedule', trends: 'Trends & KPIs', logbook: 'Logbook', roadmap: 'Season Roadmap', 
                 gear: 'Gear Choice', zones: 'Training Zones', ftp: 'Performance Profile', readiness: 'Race Readiness', metrics: 'Performance Metrics'
             };
+            this.currentView = view;
             const titleEl = document.getElementById('header-title-dynamic');
             if (titleEl) titleEl.innerText = titles[view] || 'Dashboard';
 
@@ -384,7 +461,12 @@
             
             setTimeout(() => {
                 try {
-                    if (view === 'gear') {
+                    const needsLog = ['trends', 'readiness', 'metrics'].includes(view) || (view === 'dashboard' && !this.dashboardData?.heatmap);
+                    if (needsLog && this.allData === null) {
+                        content.innerHTML = '<p class="text-slate-500 italic">Loading training log...</p>';
+                        this.loadLog().then(() => { if (this.currentView === view) this.renderView(view); });
+                    }
+                    else if (view === 'gear') {
                         const result = renderGear(this.gearMd, this.currentTemp, this.hourlyWeather);
                         content.innerHTML = result.html;
                         this.gearData = result.gearData;
@@ -399,13 +481,17 @@
                     } 
                     else if (view === 'roadmap') content.innerHTML = renderRoadmap(this.planMd);
                     else if (view === 'readiness') {
-                        const html = renderReadiness(this.allData, this.planMd); 
+                        const html = renderReadiness(this.allData, this.planMd, this.dashboardData); 
                         content.innerHTML = html;
                         renderReadinessChart(this.allData); 
                     }
                     else if (view === 'metrics') {
                         content.innerHTML = renderMetrics(this.allData);
                     }
+                    else if (view === 'logbook' && this.archiveMd === null) {
+                        content.innerHTML = '<p class="text-slate-500 italic">Loading logbook...</p>';
+                        this.loadArchive().then(() => { if (window.location.hash.substring(1) === 'logbook') this.renderView('logbook'); });
+                    }
                     else if (view === 'logbook') {
                         const archive = Parser.getSection(this.archiveMd, "Training History");
                         const mdContent = archive || (this.archiveMd && this.archiveMd.trim().length > 0 ? this.archiveMd : "No logs found in Master Database.");
@@ -414,9 +500,10 @@
                         content.innerHTML = `<div class="markdown-body">${safeMarked(mdContent)}</div>`;
                     }
                     else {
-                        const html = this.getStatsBar() + renderDashboard(this.planMd, this.allData);
+                        const dayMap = dashboardDays(this.allData, this.dashboardData);
+                        const html = this.getStatsBar() + renderDashboard(this.planMd, dayMap, this.dashboardData);
                         content.innerHTML = html;
-                        this.updateStats(); 
+                        this.updateStats(dayMap); 
                     }
                 } catch (err) {
                     console.error("Render error:", err);
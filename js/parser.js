@@ -25,6 +25,9 @@ export const Parser = {
     },
 
     getBiometrics(md) {
+        // Parsed by the Python sync (data/plan_model.json); app.js only sets it when it matches this plan
+        const model = typeof window !== 'undefined' ? window.App?.planModel : null;
+        if (model?.biometrics) return { ...model.biometrics };
         const profileSection = this.getSection(md, "Profile") || this.getSection(md, "Biometrics");
         
         const ftp = profileSection.match(/Cycling FTP[^0-9]*(\d{1,3})/i);
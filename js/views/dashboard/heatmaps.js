@@ -37,16 +37,45 @@ const getSportColorVar = (type) => {
     return 'var(--color-all)';
 };
 
-// --- Internal Builder: Generic Heatmap (Consistency) ---
-function buildGenericHeatmap(fullLog, eventMap, startDate, endDate, title, dateToKeyFn, containerId = null) {
-    if (!fullLog) fullLog = [];
-    const dataMap = {}; 
-    fullLog.forEach(item => { 
-        const dateKey = dateToKeyFn(item.date); 
-        if (!dataMap[dateKey]) dataMap[dateKey] = []; 
-        dataMap[dateKey].push(item); 
+// --- SPORT DETECTION LOGIC (STRICT) ---
+const detectSport = (item) => {
+    const name = (item.activityName || item.actualName || '').toUpperCase();
+    if (name.includes('[RUN]')) return 'Run';
+    if (name.includes('[BIKE]')) return 'Bike';
+    if (name.includes('[SWIM]')) return 'Swim';
+    return 'Other';
+};
+
+// --- Internal Helper: Day Cells ---
+// Same shape as data/dashboard/heatmap.json 'days', which the Python sync pre-builds.
+export function summarizeLog(fullLog, dateToKeyFn) {
+    const days = {};
+    (fullLog || []).forEach(item => {
+        const key = dateToKeyFn(item.date);
+        if (!days[key]) days[key] = { plan: 0, act: 0, missed: 0, rest: false, types: [], sports: [], sportMins: {}, maxAct: {}, details: [], activity: [] };
+        const day = days[key];
+        day.plan += (item.plannedDuration || 0);
+        day.act += (item.actualDuration || 0);
+        if (item.plannedDuration > 0 && !(item.actualDuration > 0)) day.missed++;
+        if (item.type) day.maxAct[item.type] = Math.max(day.maxAct[item.type] || 0, item.actualDuration || 0);
+        if (item.type === 'Rest') day.rest = true;
+        else if (item.type && !day.types.includes(item.type)) day.types.push(item.type);
+
+        const name = (item.actualName || item.planName || 'Workout').replace(/['"]/g, "");
+        day.details.push(`${name} (${item.actualDuration || 0}m)`);
+        if (item.actualDuration > 0) {
+            const sport = detectSport(item);
+            if (!day.sports.includes(sport)) day.sports.push(sport);
+            day.sportMins[sport] = (day.sportMins[sport] || 0) + item.actualDuration;
+            const actName = (item.activityName || item.actualName || 'Activity').replace(/['"]/g, "");
+            day.activity.push(`${actName} (${item.actualDuration}m)`);
+        }
     });
-    
+    return days;
+}
+
+// --- Internal Builder: Generic Heatmap (Consistency) ---
+function buildGenericHeatmap(dayMap, eventMap, startDate, endDate, title, dateToKeyFn, containerId = null) {
     const today = new Date(); today.setHours(0,0,0,0);
     const highContrastStripe = "background-image: repeating-linear-gradient(45deg, #10b981, #10b981 3px, #065f46 3px, #065f46 6px);";
     
@@ -72,38 +101,27 @@ function buildGenericHeatmap(fullLog, eventMap, startDate, endDate, title, dateT
         loops++; 
         const dateKey = dateToKeyFn(currentDate); 
         const dayOfWeek = currentDate.getDay(); 
-        const dayData = dataMap[dateKey]; 
+        const day = dayMap[dateKey]; 
         const eventName = eventMap && eventMap[dateKey];
         
         let colorClass = 'bg-slate-800'; 
         let statusLabel = "Empty"; 
         let inlineStyle = ""; 
         
-        let totalPlan = 0; let totalAct = 0; let isRestType = false; 
+        const totalPlan = day ? day.plan : 0;
+        const totalAct = day ? day.act : 0;
+        const isRestType = day ? day.rest : false;
         let sportLabel = "--";
-        const uniqueTypes = new Set();
-        let detailList = [];
-
-        if (dayData && dayData.length > 0) { 
-            dayData.forEach(d => { 
-                totalPlan += (d.plannedDuration || 0); 
-                totalAct += (d.actualDuration || 0); 
-                if (d.type === 'Rest') isRestType = true;
-                if (d.type && d.type !== 'Rest') uniqueTypes.add(d.type);
-
-                // Build Detail String
-                const name = (d.actualName || d.planName || 'Workout').replace(/['"]/g, ""); 
-                const dur = d.actualDuration || 0;
-                detailList.push(`${name} (${dur}m)`);
-            }); 
-            if (uniqueTypes.size > 0) {
-                sportLabel = Array.from(uniqueTypes).join(' + ');
+
+        if (day) { 
+            if (day.types.length > 0) {
+                sportLabel = day.types.join(' + ');
             } else if (isRestType) {
                 sportLabel = "Rest Day";
             }
         }
         
-        const detailStr = detailList.join('<br>');
+        const detailStr = day ? day.details.join('<br>') : '';
 
         if (eventName) sportLabel = "Event";
 
@@ -180,35 +198,7 @@ function buildGenericHeatmap(fullLog, eventMap, startDate, endDate, title, dateT
 }
 
 // --- Internal Builder: Activity Heatmap (Sport Types) ---
-function buildActivityHeatmap(fullLog, startDate, endDate, title, dateToKeyFn, containerId = null) {
-    if (!fullLog) fullLog = [];
-
-    // --- SPORT DETECTION LOGIC (STRICT) ---
-    const detectSport = (item) => {
-        const name = (item.activityName || item.actualName || '').toUpperCase();
-        if (name.includes('[RUN]')) return 'Run';
-        if (name.includes('[BIKE]')) return 'Bike';
-        if (name.includes('[SWIM]')) return 'Swim';
-        return 'Other';
-    };
-    
-    // Map: Date -> { sports: Set(), totalAct: 0, details: [] }
-    const activityMap = {};
-    fullLog.forEach(item => {
-        if (item.actualDuration > 0) {
-            const key = dateToKeyFn(item.date);
-            if (!activityMap[key]) activityMap[key] = { sports: new Set(), totalAct: 0, details: [] };
-            
-            const detected = detectSport(item);
-            activityMap[key].sports.add(detected);
-            activityMap[key].totalAct += item.actualDuration;
-
-            // Collect details
-            const name = (item.activityName || item.actualName || 'Activity').replace(/['"]/g, "");
-            activityMap[key].details.push(`${name} (${item.actualDuration}m)`);
-        }
-    });
-
+function buildActivityHeatmap(dayMap, startDate, endDate, title, dateToKeyFn, containerId = null) {
     const startDay = startDate.getDay();
     let cellsHtml = '';
     
@@ -224,7 +214,8 @@ function buildActivityHeatmap(fullLog, startDate, endDate, title, dateToKeyFn, c
         loops++;
         const dateKey = dateToKeyFn(currentDate);
         const dayOfWeek = currentDate.getDay();
-        const entry = activityMap[dateKey];
+        const day = dayMap[dateKey];
+        const entry = day && day.act > 0 ? day : null;
         
         let style = '';
         let colorClass = 'bg-slate-800'; 
@@ -234,9 +225,9 @@ function buildActivityHeatmap(fullLog, startDate, endDate, title, dateToKeyFn, c
 
         if (entry) {
             hasActivity = true;
-            totalMinutes = entry.totalAct;
-            const sports = Array.from(entry.sports);
-            detailStr = entry.details.join('<br>'); // Combine workouts
+            totalMinutes = entry.act;
+            const sports = entry.sports;
+            detailStr = entry.activity.join('<br>'); // Combine workouts
 
             if (sports.length === 1) {
                 // Single sport
@@ -313,7 +304,7 @@ function buildActivityHeatmap(fullLog, startDate, endDate, title, dateToKeyFn, c
 }
 
 // --- Main Render Function ---
-export function renderHeatmaps(fullLogData, planMd) {
+export function renderHeatmaps(dayMap, planMd) {
     const eventMap = parseEvents(planMd);
     const today = new Date();
     today.setHours(0,0,0,0);
@@ -337,13 +328,13 @@ export function renderHeatmaps(fullLogData, planMd) {
     const endYear = new Date(today.getFullYear(), 11, 31);
     
     // 1. Existing Consistency Heatmap (Trailing)
-    const heatmapTrailingHtml = buildGenericHeatmap(fullLogData, eventMap, startTrailing, endOfWeek, "Recent Consistency (Trailing 6 Months)", toLocalYMD, "heatmap-trailing-scroll");
+    const heatmapTrailingHtml = buildGenericHeatmap(dayMap, eventMap, startTrailing, endOfWeek, "Recent Consistency (Trailing 6 Months)", toLocalYMD, "heatmap-trailing-scroll");
     
     // 2. Activity Heatmap (Trailing)
-    const heatmapActivityHtml = buildActivityHeatmap(fullLogData, startTrailing, endOfWeek, "Activity Log (Workout Types)", toLocalYMD, "heatmap-activity-scroll");
+    const heatmapActivityHtml = buildActivityHeatmap(dayMap, startTrailing, endOfWeek, "Activity Log (Workout Types)", toLocalYMD, "heatmap-activity-scroll");
 
     // 3. Annual Overview (Full Year)
-    const heatmapYearHtml = buildGenericHeatmap(fullLogData, eventMap, startYear, endYear, `Annual Overview (${today.getFullYear()})`, toLocalYMD, null);
+    const heatmapYearHtml = buildGenericHeatmap(dayMap, eventMap, startYear, endYear, `Annual Overview (${today.getFullYear()})`, toLocalYMD, null);
 
     setTimeout(() => {
         const scrollIds = ['heatmap-trailing-scroll', 'heatmap-activity-scroll'];
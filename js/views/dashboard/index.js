@@ -2,7 +2,8 @@
 import { Parser } from '../../parser.js';
 import { renderPlannedWorkouts } from './plannedWorkouts.js';
 import { renderProgressWidget } from './progressWidget.js';
-import { renderHeatmaps } from './heatmaps.js';
+import { renderHeatmaps, summarizeLog } from './heatmaps.js';
+import { toLocalYMD } from './utils.js';
 
 // --- GITHUB SYNC TRIGGER ---
 window.triggerGitHubSync = async () => {
@@ -106,18 +107,21 @@ window.showDashboardTooltip = (evt, date, plan, act, label, color, sportType, de
     window.dashTooltipTimer = setTimeout(() => tooltip.classList.add('opacity-0'), 3000);
 };
 
-export function renderDashboard(planMd, mergedLogData) {
+// Day cells from heatmap.json, or built from the merged log when the app has no current one
+export function dashboardDays(logData, dashboardData = null) {
+    return dashboardData?.heatmap?.days || summarizeLog(logData || [], toLocalYMD);
+}
+
+export function renderDashboard(planMd, dayMap, dashboardData = null) {
     const scheduleSection = Parser.getSection(planMd, "Weekly Schedule");
     if (!scheduleSection) return '<p class="text-slate-500 italic">No Weekly Schedule found.</p>';
 
     const workouts = Parser._parseTableBlock(scheduleSection);
     workouts.sort((a, b) => a.date - b.date);
 
-    const fullLogData = mergedLogData || [];
-
-    const progressHtml = renderProgressWidget(workouts, fullLogData);
-    const plannedWorkoutsHtml = renderPlannedWorkouts(planMd);
-    const heatmapsHtml = renderHeatmaps(fullLogData, planMd);
+    const progressHtml = renderProgressWidget(workouts, dayMap || {});
+    const plannedWorkoutsHtml = renderPlannedWorkouts(planMd, dashboardData?.planned);
+    const heatmapsHtml = renderHeatmaps(dayMap || {}, planMd);
 
     // --- SYNC BUTTON HTML ---
     const syncButtonHtml = `
@@ -2,12 +2,19 @@
 import { Parser } from '../../parser.js';
 import { toLocalYMD, getSportColorVar, getIcon, buildCollapsibleSection } from './utils.js';
 
-export function renderPlannedWorkouts(planMd) {
-    const scheduleSection = Parser.getSection(planMd, "Weekly Schedule");
-    if (!scheduleSection) return '<p class="text-slate-500 italic">No Weekly Schedule found.</p>';
-
-    // 1. Parse Planned Workouts
-    const workouts = Parser._parseTableBlock(scheduleSection);
+export function renderPlannedWorkouts(planMd, prebuilt = null) {
+    // 1. Planned Workouts: pre-built cards (data/dashboard/planned.json) or parsed from the plan
+    let workouts;
+    if (prebuilt && Array.isArray(prebuilt.workouts)) {
+        workouts = prebuilt.workouts.map(w => {
+            const [y, m, d] = w.date.split('-').map(Number);
+            return { ...w, date: new Date(y, m - 1, d, 12, 0, 0) };
+        });
+    } else {
+        const scheduleSection = Parser.getSection(planMd, "Weekly Schedule");
+        if (!scheduleSection) return '<p class="text-slate-500 italic">No Weekly Schedule found.</p>';
+        workouts = Parser._parseTableBlock(scheduleSection);
+    }
     workouts.sort((a, b) => a.date - b.date);
 
     // 2. Group by Date
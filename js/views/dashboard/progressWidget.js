@@ -1,9 +1,10 @@
 // js/views/dashboard/progressWidget.js
-import { getSportColorVar } from './utils.js';
+import { getSportColorVar, fromLocalYMD } from './utils.js';
 
 // --- Internal Helper: Streak Calculators ---
-function calculateDailyStreak(fullLogData) {
-    if (!fullLogData || fullLogData.length === 0) {
+function calculateDailyStreak(dayMap) {
+    const dayKeys = Object.keys(dayMap || {});
+    if (dayKeys.length === 0) {
         console.log("Streak Calc: No data available.");
         return 0;
     }
@@ -15,9 +16,8 @@ function calculateDailyStreak(fullLogData) {
     currentWeekStart.setDate(today.getDate() - dayOfWeek + (dayOfWeek === 0 ? -6 : 1));
     
     const weeksMap = {};
-    fullLogData.forEach(item => {
-        if (!item.date) return;
-        const d = new Date(item.date); d.setHours(0,0,0,0);
+    dayKeys.forEach(dateKey => {
+        const d = fromLocalYMD(dateKey); d.setHours(0,0,0,0);
         const day = d.getDay(); 
         const weekStart = new Date(d); 
         weekStart.setDate(d.getDate() - day + (day === 0 ? -6 : 1));
@@ -27,12 +27,8 @@ function calculateDailyStreak(fullLogData) {
         const key = weekStart.toISOString().split('T')[0];
         if (!weeksMap[key]) weeksMap[key] = { failed: false };
         
-        if (item.plannedDuration > 0) {
-            const statusStr = (item.status || '').toUpperCase();
-            const isCompleted = item.completed === true || statusStr === 'COMPLETED';
-            const hasDuration = (item.actualDuration || 0) > 0;
-            if (!isCompleted && !hasDuration) weeksMap[key].failed = true;
-        }
+        // A planned session with no recorded duration fails the week
+        if (dayMap[dateKey].missed > 0) weeksMap[key].failed = true;
     });
 
     let streak = 0; 
@@ -53,17 +49,17 @@ function calculateDailyStreak(fullLogData) {
     return streak;
 }
 
-function calculateVolumeStreak(fullLogData) {
-    if (!fullLogData || fullLogData.length === 0) return 0;
+function calculateVolumeStreak(dayMap) {
+    const dayKeys = Object.keys(dayMap || {});
+    if (dayKeys.length === 0) return 0;
     const today = new Date(); today.setHours(0,0,0,0);
     const dayOfWeek = today.getDay(); 
     const currentWeekStart = new Date(today); 
     currentWeekStart.setDate(today.getDate() - dayOfWeek + (dayOfWeek === 0 ? -6 : 1));
 
     const weeksMap = {};
-    fullLogData.forEach(item => {
-        if (!item.date) return;
-        const d = new Date(item.date); d.setHours(0,0,0,0);
+    dayKeys.forEach(dateKey => {
+        const d = fromLocalYMD(dateKey); d.setHours(0,0,0,0);
         const day = d.getDay(); 
         const weekStart = new Date(d); 
         weekStart.setDate(d.getDate() - day + (day === 0 ? -6 : 1));
@@ -72,8 +68,8 @@ function calculateVolumeStreak(fullLogData) {
 
         const key = weekStart.toISOString().split('T')[0];
         if (!weeksMap[key]) weeksMap[key] = { planned: 0, actual: 0 };
-        weeksMap[key].planned += (item.plannedDuration || 0);
-        weeksMap[key].actual += (item.actualDuration || 0);
+        weeksMap[key].planned += dayMap[dateKey].plan;
+        weeksMap[key].actual += dayMap[dateKey].act;
     });
 
     let streak = 0; 
@@ -99,10 +95,10 @@ function calculateVolumeStreak(fullLogData) {
 }
 
 // --- Main Component ---
-export function renderProgressWidget(workouts, fullLogData) {
+export function renderProgressWidget(workouts, dayMap) {
     console.group("🚀 Progress Widget Debug Start");
     console.log("Input Workouts:", workouts?.length || 0);
-    console.log("Input Log Data:", fullLogData?.length || 0);
+    console.log("Input Log Days:", Object.keys(dayMap || {}).length);
 
     // 1. Strictly Define Current Week (Monday - Sunday)
     const today = new Date();
@@ -177,49 +173,28 @@ export function renderProgressWidget(workouts, fullLogData) {
     }
     console.log(`📝 Planned Workouts found in window: ${plannedCount}. Total Minutes: ${totalPlanned}`);
 
-    // 4. Process ACTUAL Data
+    // 4. Process ACTUAL Data (day cells already split the minutes by the [RUN]/[BIKE]/[SWIM] tag)
     const debugActuals = [];
-    const debugSkipped = [];
-
-    if (fullLogData) {
-        fullLogData.forEach(item => {
-            if (!item.date) return;
-            const d = new Date(item.date);
-            
-            // Strict Filter: Current Week Only
-            if (d >= monday && d <= sunday) {
-                const actDur = parseFloat(item.actualDuration) || 0;
-                
-                if (actDur > 0) {
-                    totalActual += actDur;
-                    
-                    const nameToCheck = item.actualName || "";
-                    const actSport = detectSport(nameToCheck);
-                    
-                    debugActuals.push({ date: item.date, name: nameToCheck, dur: actDur, detected: actSport });
 
-                    if (sportStats[actSport]) {
-                        sportStats[actSport].actual += actDur;
-                    } else {
-                        sportStats.Other.actual += actDur;
-                    }
-                }
-            } else {
-                // Keep track of a few skipped items just to check logic
-                if (debugSkipped.length < 5) {
-                    debugSkipped.push({ date: item.date, reason: "Outside Date Range" });
+    Object.entries(dayMap || {}).forEach(([dateKey, day]) => {
+        const d = fromLocalYMD(dateKey);
+        
+        // Strict Filter: Current Week Only
+        if (d >= monday && d <= sunday) {
+            Object.entries(day.sportMins || {}).forEach(([actSport, mins]) => {
+                totalActual += mins;
+                debugActuals.push({ date: dateKey, dur: mins, detected: actSport });
+                if (sportStats[actSport]) {
+                    sportStats[actSport].actual += mins;
+                } else {
+                    sportStats.Other.actual += mins;
                 }
-            }
-        });
-    }
+            });
+        }
+    });
 
     console.log("✅ Captured Actuals:", debugActuals);
-    if (debugActuals.length === 0) {
-        console.warn("⚠️ No actuals captured! Sample skipped items:", debugSkipped);
-        if (fullLogData && fullLogData.length > 0) {
-            console.log("Sample First Log Date:", fullLogData[0].date);
-        }
-    }
+    if (debugActuals.length === 0) console.warn("⚠️ No actuals captured in the current week.");
 
     console.groupEnd(); // End Debug Group
 
@@ -296,8 +271,8 @@ export function renderProgressWidget(workouts, fullLogData) {
     const expectedHrs = (expectedSoFar / 60).toFixed(1);
 
     // Streaks (Calculated from History)
-    const dailyStreak = calculateDailyStreak(fullLogData);
-    const volumeStreak = calculateVolumeStreak(fullLogData);
+    const dailyStreak = calculateDailyStreak(dayMap);
+    const volumeStreak = calculateVolumeStreak(dayMap);
 
     const getStreakColor = (val) => {
         if (val >= 8) return "text-red-500";
@@ -10,6 +10,12 @@ export const toLocalYMD = (dateInput) => {
     return `${year}-${month}-${day}`;
 };
 
+// Local noon of a YYYY-MM-DD key, the same time the parser gives log dates
+export const fromLocalYMD = (key) => {
+    const [y, m, d] = key.split('-').map(Number);
+    return new Date(y, m - 1, d, 12, 0, 0);
+};
+
 
 // --- STYLE & COLOR HELPERS ---
 
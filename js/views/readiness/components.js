@@ -155,3 +155,72 @@ export const renderEventList = (events, stats) => {
 
     return html;
 };
+
+// --- DAILY READINESS (health baselines) ---
+const HEALTH_LABELS = {
+    resting_hr: 'Resting HR', hrv: 'HRV', sleep: 'Sleep (h)', sleep_score: 'Sleep Score',
+    stress: 'Stress', body_battery: 'Body Battery'
+};
+
+const bandColor = (label) => label === 'Ready' ? 'emerald' : (label === 'Normal' ? 'yellow' : 'red');
+
+const fmtNum = (v) => (v === undefined || v === null) ? '--' : (Math.round(v * 10) / 10).toString();
+
+export const renderDailyReadiness = (readiness) => {
+    if (!readiness || !readiness.latest) return '';
+    const latest = readiness.latest;
+    const day = readiness.days[latest.date] || { metrics: {} };
+    const color = bandColor(latest.label);
+
+    // Last 14 scored days as a strip of bars
+    const recent = Object.keys(readiness.days).sort().slice(-14);
+    const strip = recent.map(d => {
+        const s = readiness.days[d].score;
+        if (s === null || s === undefined) return `<div class="flex-1 h-full bg-slate-700/30 rounded-sm" title="${d}: no score"></div>`;
+        return `<div class="flex-1 flex items-end h-full" title="${d}: ${s}/100">
+                    <div class="w-full bg-${bandColor(readiness.days[d].label)}-500/80 rounded-sm" style="height: ${Math.max(s, 4)}%"></div>
+                </div>`;
+    }).join('');
+
+    const rows = Object.keys(HEALTH_LABELS).filter(k => day.metrics[k]).map(k => {
+        const m = day.metrics[k];
+        const z = m.z;
+        const zColor = z === undefined ? 'text-slate-500' : (z >= 0.5 ? 'text-emerald-400' : (z <= -1 ? 'text-red-400' : 'text-slate-300'));
+        const zText = z === undefined ? '--' : `${z > 0 ? '+' : ''}${z.toFixed(2)}`;
+        return `
+            <tr class="border-t border-slate-700/50">
+                <td class="py-2 pr-4 text-slate-300 font-bold">${HEALTH_LABELS[k]}</td>
+                <td class="py-2 pr-4 text-white font-mono">${fmtNum(m.value)}</td>
+                <td class="py-2 pr-4 text-slate-400 font-mono">${fmtNum(m.mean7)}</td>
+                <td class="py-2 pr-4 text-slate-400 font-mono">${fmtNum(m.mean28)} ± ${fmtNum(m.std28)}</td>
+                <td class="py-2 font-mono font-bold ${zColor}">${zText}</td>
+            </tr>`;
+    }).join('');
+
+    return `
+    <div class="bg-slate-800 border border-slate-700 rounded-xl overflow-hidden shadow-lg max-w-5xl mx-auto">
+        <div class="p-6 flex flex-col md:flex-row gap-8 items-center">
+            <div class="md:w-1/4 flex flex-col items-center justify-center text-center border-b md:border-b-0 md:border-r border-slate-700 pb-6 md:pb-0 md:pr-6 w-full">
+                <div class="text-6xl font-black text-${color}-500 tracking-tighter drop-shadow-sm">${latest.score}</div>
+                <div class="text-xs font-bold text-slate-500 uppercase tracking-widest mt-2">Readiness</div>
+                <div class="text-[10px] font-mono text-${color}-500 mt-1 border border-slate-700/50 px-2 py-0.5 rounded bg-slate-900/30">${latest.label}</div>
+                <div class="text-[10px] text-slate-500 mt-2">${latest.date} &middot; 7-day avg ${latest.avg7}</div>
+            </div>
+            <div class="md:w-3/4 w-full">
+                <div class="flex gap-1 h-12 mb-4">${strip}</div>
+                <table class="w-full text-xs text-left">
+                    <thead>
+                        <tr class="text-[10px] uppercase tracking-wider text-slate-500">
+                            <th class="pb-2 pr-4">Metric</th><th class="pb-2 pr-4">Today</th><th class="pb-2 pr-4">7d Avg</th>
+                            <th class="pb-2 pr-4">28d Baseline</th><th class="pb-2">z</th>
+                        </tr>
+                    </thead>
+                    <tbody>${rows}</tbody>
+                </table>
+            </div>
+        </div>
+        <div class="bg-slate-900/30 p-2 text-center border-t border-slate-700/50">
+            <p class="text-[9px] text-slate-500 italic">Score = 50 + 15 &times; average z-score vs each metric's own 28-day baseline (lower resting HR / stress counts as better).</p>
+        </div>
+    </div>`;
+};
@@ -1,9 +1,9 @@
 // js/views/readiness/index.js
 import { buildCollapsibleSection } from './utils.js';
 import { getTrainingStats, parseEvents } from './logic.js';
-import { renderGuide, renderEventList } from './components.js';
+import { renderGuide, renderEventList, renderDailyReadiness } from './components.js';
 
-export function renderReadiness(mergedLogData, planMd) {
+export function renderReadiness(mergedLogData, planMd, dashboardData) {
     if (!planMd) return '<div class="p-8 text-slate-500 italic">No plan data found.</div>';
 
     // 1. Process Data
@@ -13,10 +13,13 @@ export function renderReadiness(mergedLogData, planMd) {
     // 2. Build Components
     const guideHtml = renderGuide();
     const eventsHtml = renderEventList(upcomingEvents, trainingStats);
+    // Health baselines pre-built by the Python health fetch (data/dashboard/readiness.json)
+    const dailyHtml = renderDailyReadiness(dashboardData?.readiness);
 
     // 3. Assemble View
     return `
         <div class="max-w-5xl mx-auto space-y-4">
+            ${dailyHtml ? buildCollapsibleSection('readiness-daily', 'Daily Readiness', dailyHtml, true) : ''}
             ${buildCollapsibleSection('readiness-guide', 'Legend & Logic', guideHtml, true)}
             ${buildCollapsibleSection('readiness-events', 'Event Status', eventsHtml, true)}
         </div>
@@ -90,7 +90,8 @@ export const aggregateVolumeBuckets = (data, sportType) => {
 };
 
 export const calculateStats = (data, targetType, days, isDuration) => {
-    const cutoff = new Date(); cutoff.setDate(cutoff.getDate() - days);
+    // The last `days` calendar days including today, whatever the time of day
+    const cutoff = new Date(); cutoff.setDate(cutoff.getDate() - (days - 1)); cutoff.setHours(0, 0, 0, 0);
     const now = new Date(); now.setHours(23, 59, 59, 999);
     
     const subset = data.filter(item => { 
@@ -1,14 +1,5 @@
-import sys
-import os
-
-# Ensure we can import from local modules
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-sys.path.append(SCRIPT_DIR)
-
-# Import our new modular components
-import _01_fetch_garmin
-import _01_analyze_trends
-from modules import config, sync_database, update_visuals, git_ops
+# Each step imports its own stage when it runs, so importing this module is
+# free and a missing dependency (e.g. garminconnect) only fails its own step.
 
 def main():
     print("🚀 STARTING DAILY TRAINING SYNC")
@@ -17,6 +8,7 @@ def main():
     # STEP 1: Fetch from Garmin
     # (Captures RPE, Feeling, and raw stats to JSON)
     try:
+        import _01_fetch_garmin
         _01_fetch_garmin.main()
     except Exception as e:
         print(f"⚠️ Garmin Fetch Warning: {e}")
@@ -25,12 +17,13 @@ def main():
     # STEP 2: Sync Database
     # (Merges Plan + JSON -> Master DB)
     # Returns the DataFrame so we don't have to reload it
+    from modules import sync_database
     df_master = sync_database.sync()
 
     # STEP 3: Analyze Trends
     # (Generates Coach Briefing from the fresh DB)
     try:
-        # --- FIX: Use the correct module name ---
+        import _01_analyze_trends
         _01_analyze_trends.main()
     except Exception as e:
         print(f"⚠️ Analysis Warning: {e}")
@@ -38,10 +31,21 @@ def main():
     # STEP 4: Update Visuals
     # (Updates checkmarks in the Markdown Plan)
     if df_master is not None and not df_master.empty:
+        from modules import update_visuals
         update_visuals.update_weekly_plan(df_master)
 
-    # STEP 5: Save to GitHub
+    # STEP 5: Dashboard Artifacts
+    # (Pre-aggregated JSON so the web views don't re-parse the markdown)
+    if df_master is not None and not df_master.empty:
+        try:
+            from modules import dashboard_data
+            dashboard_data.write_artifacts()
+        except Exception as e:
+            print(f"⚠️ Dashboard Data Warning: {e}")
+
+    # STEP 6: Save to GitHub
     try:
+        from modules import git_ops
         git_ops.push_changes()
     except Exception as e:
         print(f"⚠️ Git Warning: {e}")
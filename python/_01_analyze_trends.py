@@ -1,12 +1,14 @@
+import io
 import json
 import os
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from modules import config, storage, readiness, stream_metrics
 
 # --- CONFIG ---
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATA_FILE = os.path.join(REPO_ROOT, 'python', 'my_garmin_data_ALL.json')
+DATA_FILE = config.GARMIN_JSON
 
 # *** TARGET FILE: COACH_BRIEFING.md ***
 OUTPUT_FILE = os.path.join(REPO_ROOT, 'COACH_BRIEFING.md')
@@ -20,6 +22,7 @@ SPORT_IDS = {
 
 METRICS = {
     'aerobic_efficiency':    {'unit': 'EF', 'good': 'up', 'range': (1.3, 1.7)},
+    'aerobic_decoupling':    {'unit': '%', 'good': 'down', 'range': (0, 5), 'signed': True}, # Pw:HR / Pa:HR drift
     'subjective_efficiency': {'unit': 'W/RPE', 'good': 'up', 'range': (25, 50)}, # NEW METRIC
     'torque_efficiency':     {'unit': 'W/RPM', 'good': 'up', 'range': (2.5, 3.5)},
     'run_economy':           {'unit': 'm/beat', 'good': 'up', 'range': (1.0, 1.6)},
@@ -82,7 +85,8 @@ def analyze_metric(df, col_name, config):
 
     # Filter out zeros or NaNs for the specific metric
     df_clean = df.dropna(subset=[col_name]).sort_values('startTimeLocal')
-    df_clean = df_clean[df_clean[col_name] > 0] # Ensure positive values
+    # Ensure positive values (a signed metric keeps its negatives)
+    if not config.get('signed'): df_clean = df_clean[df_clean[col_name] > 0]
     
     for days in [30, 90, 180]:
         cutoff = now - timedelta(days=days)
@@ -139,6 +143,13 @@ def main():
         df['avgPower'] / df['averageHR'], np.nan
     )
 
+    # --- 1b. Aerobic Decoupling (Durability) ---
+    # First vs second half efficiency of the steady part, from the archived streams
+    sport = pd.Series(np.where(is_bike, 'BIKE', np.where(is_run, 'RUN', '')), index=df.index)
+    ids = df['activityId'].astype(str)
+    decoupling = stream_metrics.update_decoupling(dict(zip(ids[sport != ''], sport[sport != ''])))
+    df['aerobic_decoupling'] = ids.map(decoupling).astype(float)
+
     # --- 2. Subjective Efficiency (Mental/Fatigue) ---
     # Power / RPE (Watts per unit of Perceived Exertion)
     # Note: Requires RPE to be 1-10. If 0, we treat as NaN to avoid div/0
@@ -184,7 +195,7 @@ def main():
 
     print(f"Writing briefing to: {OUTPUT_FILE}")
     
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+    with io.StringIO() as f:
         f.write("# 🤖 AI Coach Context Briefing\n")
         f.write(f"**Last Updated:** {datetime.now().strftime('%Y-%m-%d %H:%M')}\n\n")
         
@@ -195,13 +206,15 @@ def main():
         alerts = []
         for key, conf in METRICS.items():
             stats = analyze_metric(df, key, conf)
-            current = stats.get('current', 0)
+            current = stats.get('current')
             r_min, r_max = conf['range']
+            # A signed 'down' metric (decoupling) is only off when too high; below the range is better
+            low_ok = conf.get('signed') and conf['good'] == 'down'
             
             status_icon = "✅"
-            if current == 0:
+            if current is None or (current == 0 and not conf.get('signed')):
                 status_icon = "⚪ No Data"
-            elif current < r_min: 
+            elif current < r_min and not low_ok: 
                 status_icon = "⚠️ Low"
                 if conf['good'] == 'up': alerts.append(f"**{key}** is {current:.2f} (Target: >{r_min}).")
             elif current > r_max: 
@@ -211,13 +224,26 @@ def main():
             unit = conf['unit']
             f.write(f"| **{key.replace('_', ' ').title()}** | {r_min}-{r_max} {unit} | {stats.get('30d', '--')} | {stats.get('90d', '--')} | {stats.get('6m', '--')} | {status_icon} |\n")
 
+        # Health baselines (resting HR, HRV, sleep, stress, body battery)
+        readiness_md, readiness_alerts = readiness.briefing_section(readiness.update_readiness())
+        alerts += readiness_alerts
+
         f.write("\n## 2. Actionable Alerts\n")
         if alerts:
             for a in alerts: f.write(f"- {a}\n")
         else:
             f.write("- All systems Nominal.\n")
-            
-    print("Briefing generated successfully.")
+
+        f.write("\n" + readiness_md)
+
+        briefing = f.getvalue()
+
+    # The timestamp alone is not worth a commit
+    status = storage.write_text(OUTPUT_FILE, briefing, [storage.LAST_UPDATED_PATTERN])
+    if status == 'semantic':
+        print("Briefing generated successfully.")
+    else:
+        print("Briefing unchanged (timestamp only). File left untouched.")
 
 if __name__ == "__main__":
     main()
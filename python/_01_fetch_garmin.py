@@ -1,6 +1,5 @@
-import json
 import os
-from garminconnect import Garmin
+from modules import storage, cassette
 
 # --- CONFIGURATION ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -13,29 +12,28 @@ EMAIL = os.environ.get('GARMIN_EMAIL')
 PASSWORD = os.environ.get('GARMIN_PASSWORD')
 
 def load_existing_data():
-    if os.path.exists(JSON_FILE):
-        try:
-            with open(JSON_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
+    try:
+        return storage.read_json(JSON_FILE, [])
+    except ValueError:
+        return []
 
 def save_data(data):
-    data.sort(key=lambda x: x.get('startTimeLocal', ''), reverse=True)
-    with open(JSON_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4)
-    print(f"💾 Saved {len(data)} activities.")
+    data.sort(key=lambda x: (x.get('startTimeLocal', ''), str(x.get('activityId', ''))), reverse=True)
+    status = storage.write_json(JSON_FILE, data)
+    if status == 'semantic':
+        print(f"💾 Saved {len(data)} activities.")
+    else:
+        print(f"ℹ️  No activity changes ({len(data)} activities). JSON left untouched.")
 
 def main():
-    if not EMAIL or not PASSWORD:
+    if not cassette.has_credentials(EMAIL, PASSWORD):
         print("❌ Error: Credentials missing.")
         return
 
     try:
         print("🔐 Authenticating...")
         # --- FIX IS HERE ---
-        client = Garmin(EMAIL, PASSWORD) 
+        client = cassette.garmin(EMAIL, PASSWORD)
         client.login()
         # -------------------
     except Exception as e:
@@ -95,14 +93,10 @@ def main():
                 # SAVE DATA
                 if rpe is not None:
                     act['perceivedEffort'] = rpe
-                    if not is_new:
-                        db[aid]['perceivedEffort'] = rpe
-                        updated_count += 1
+                    if not is_new: updated_count += 1
                 
                 if feeling is not None:
                     act['feeling'] = feeling
-                    if not is_new:
-                        db[aid]['feeling'] = feeling
                         
                 if rpe or feeling:
                     print(f"   + Found RPE ({rpe}) / Feel ({feeling}) for {act['activityName']}")
@@ -110,14 +104,19 @@ def main():
             except Exception as e:
                 pass
 
-        if is_new:
-            db[aid] = act
-            new_count += 1
-        elif aid in db:
-            db[aid].update(act)
+        if is_new: new_count += 1
 
     print(f"   - Added: {new_count} | Updated RPE on: {updated_count}")
-    save_data(list(db.values()))
+
+    # The deep fetches take a while (and hydration may have saved meanwhile):
+    # merge into the JSON as it is now, locked until it's written
+    with storage.locked(JSON_FILE):
+        db = {str(item['activityId']): item for item in load_existing_data()}
+        for act in new_activities:
+            aid = str(act['activityId'])
+            if aid in db: db[aid].update(act)
+            else: db[aid] = act
+        save_data(list(db.values()))
 
 if __name__ == "__main__":
     main()
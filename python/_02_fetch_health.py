@@ -1,9 +1,8 @@
 import os
 import sys
-import pandas as pd
-from garminconnect import Garmin
 from datetime import date, timedelta
 import time
+from modules import storage, cassette
 
 # --- CONFIGURATION ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -16,12 +15,12 @@ EMAIL = os.environ.get('GARMIN_EMAIL')
 PASSWORD = os.environ.get('GARMIN_PASSWORD')
 
 def init_garmin():
-    if not EMAIL or not PASSWORD:
+    if not cassette.has_credentials(EMAIL, PASSWORD):
         print("❌ Error: Credentials missing.")
         sys.exit(1)
     try:
         print("🔐 Authenticating with Garmin Connect...")
-        client = Garmin(EMAIL, PASSWORD)
+        client = cassette.garmin(EMAIL, PASSWORD)
         client.login()
         return client
     except Exception as e:
@@ -94,6 +93,13 @@ def fetch_daily_stats(client, start_date, end_date):
             # -----------------------------
 
             if row:
+                # HRV has its own endpoint; a day without it is still a valid day
+                try:
+                    hrv = (client.get_hrv_data(date_str) or {}).get('hrvSummary') or {}
+                    if hrv.get('lastNightAvg'): row['HRV'] = hrv['lastNightAvg']
+                except Exception:
+                    pass
+
                 # Log a few key stats to console just to show it's working
                 rhr = row.get('Resting HR', '--')
                 sleep = row.get('Sleep Hours', '--')
@@ -115,7 +121,18 @@ def save_to_markdown(data):
         return
 
     # Create DataFrame
+    import pandas as pd
+    from modules import readiness
     df = pd.DataFrame(data)
+
+    # Keep the history (the readiness baselines need 28+ days): fetched days
+    # replace their stored rows, older days stay as they are
+    stored = readiness.load_health(OUTPUT_FILE)
+    if not stored.empty:
+        stored = stored.reset_index()
+        stored['Date'] = stored['Date'].dt.strftime('%Y-%m-%d')
+        df = pd.concat([stored[~stored['Date'].isin(df['Date'])], df], ignore_index=True)
+    df = df.sort_values('Date', ascending=False)
     
     # Smart Column Sorting: Date first, then the rest
     cols = ['Date'] + [c for c in df.columns if c != 'Date']
@@ -126,19 +143,25 @@ def save_to_markdown(data):
     
     print(f"💾 Saving {len(df)} records to {OUTPUT_FILE}...")
     
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        f.write("# Garmin Health & Biometrics\n\n")
-        f.write(f"**Last Updated:** {date.today().isoformat()}\n\n")
-        f.write(df.to_markdown(index=False))
-        
-    print("✅ Done.")
+    content = "# Garmin Health & Biometrics\n\n"
+    content += f"**Last Updated:** {date.today().isoformat()}\n\n"
+    content += df.to_markdown(index=False)
+    
+    status = storage.write_text(OUTPUT_FILE, content, [storage.LAST_UPDATED_PATTERN])
+    print("✅ Done." if status == 'semantic' else "ℹ️  No health changes. File left untouched.")
 
 def main():
     client = init_garmin()
     today = date.today()
     start_date = today - timedelta(days=DAYS_TO_FETCH)
     health_data = fetch_daily_stats(client, start_date, today)
-    save_to_markdown(health_data)
+    # Held from reading the stored history to writing the merge, so a concurrent
+    # run can't drop the days this one adds
+    with storage.locked(OUTPUT_FILE):
+        save_to_markdown(health_data)
+
+    from modules import readiness
+    readiness.update_readiness()
 
 if __name__ == "__main__":
     main()
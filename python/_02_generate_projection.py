@@ -1,10 +1,9 @@
-import matplotlib.pyplot as plt
-import pandas as pd
-import numpy as np
+import os
+import json
+import hashlib
+import argparse
 from datetime import datetime, timedelta
-import matplotlib.dates as mdates
-import matplotlib.patches as mpatches
-from matplotlib.patches import Rectangle
+from modules import config, plan_parser, storage
 
 # ==========================================
 # 🎨 COLOR CONFIGURATION
@@ -23,7 +22,12 @@ PHASE_COLORS = {
 }
 # ==========================================
 
-# --- DATES ---
+# --- OUTPUTS ---
+# The .json data file doubles as the render cache: it stores the input hash
+OUTPUT_BASE = os.path.join(config.ROOT_DIR, 'projected_volume_2026')
+FORMATS = ['png', 'svg', 'json']
+
+# --- DEFAULT DATES (used when the plan can't be parsed) ---
 START_DATE = datetime(2025, 12, 29)
 END_DATE = datetime(2026, 9, 13)
 
@@ -33,13 +37,20 @@ RACE_DATES = {
     datetime(2026, 9, 11): "70.3"
 }
 
-def get_phase_name(date):
-    d = date.month * 100 + date.day
-    if d <= 228: return "Base"
-    elif d <= 515: return "Build"
-    elif d <= 620: return "Peak"
-    elif d <= 816: return "Century"
-    else: return "70.3"
+# Phase name -> last day of the phase
+PHASES = [
+    ("Base", datetime(2026, 2, 28)),
+    ("Build", datetime(2026, 5, 15)),
+    ("Peak", datetime(2026, 6, 20)),
+    ("Century", datetime(2026, 8, 16)),
+    ("70.3", datetime(2026, 9, 11))
+]
+
+def get_phase_name(date, phases=None):
+    phases = phases or PHASES
+    for name, end in phases:
+        if date <= end: return name
+    return phases[-1][0]
 
 # --- NEW: LOGIC FOR ALL SPORTS ---
 def get_base_volumes(phase, month):
@@ -79,142 +90,246 @@ def get_sat_volume(date, phase):
     if phase == "Century": return 5.5 # Spikes for Century
     return 4.5 # 70.3 Long Rides
 
-# --- SIMULATION LOOP ---
-weeks = []
-current_date = START_DATE
-week_num = 1
+# --- SIMULATION ---
+def build_projection(start_date=START_DATE, end_date=END_DATE, race_dates=None, phases=None):
+    """
+    Simulates the season week by week and returns one row per week:
+    date, label, phase, swim, run, bike, total, sat_raw, note (hours).
+    """
+    # pandas / numpy load on first use, so an unchanged plan exits without them
+    import pandas as pd
+    race_dates = RACE_DATES if race_dates is None else race_dates
+    weeks = []
+    current_date = start_date
+    week_num = 1
 
-while current_date <= END_DATE:
-    phase = get_phase_name(current_date)
-    sat_hours = get_sat_volume(current_date, phase)
-    
-    # Get Dynamic Base Volumes
-    base_swim, base_run, base_bike_weekday = get_base_volumes(phase, current_date.month)
-    
-    # Check Modifiers
-    week_end = current_date + timedelta(days=6)
-    is_race_week = any(current_date <= r <= week_end for r in RACE_DATES)
-    is_deload = (week_num % 4 == 0)
-    
-    load_mod = 1.0
-    note = ""
-    
-    if is_race_week:
-        load_mod = 0.5
-        note = "RACE"
-    elif is_deload:
-        load_mod = 0.6
-        note = "Deload"
-    
-    # Apply Modifiers
-    swim_vol = base_swim * load_mod
-    run_vol = base_run * load_mod
-    
-    # Bike Calculation
-    sat_bike = sat_hours * load_mod 
-    bike_vol = (base_bike_weekday * load_mod) + sat_bike
-    
-    total_vol = swim_vol + run_vol + bike_vol
-
-    weeks.append({
-        "date": current_date,
-        "label": f"{current_date.month}/{current_date.day}",
-        "phase": phase,
-        "swim": swim_vol,
-        "run": run_vol,
-        "bike": bike_vol,
-        "total": total_vol,
-        "sat_raw": sat_bike,
-        "note": note
-    })
-    
-    current_date += timedelta(days=7)
-    week_num += 1
-
-# --- PLOTTING ---
-df = pd.DataFrame(weeks)
-fig, ax1 = plt.subplots(figsize=(16, 9), facecolor='#0f172a')
-ax1.set_facecolor('#0f172a')
-
-# 1. STACKED BARS
-ind = np.arange(len(df))
-# Order: Run (Bottom) -> Swim (Middle) -> Bike (Top)
-p1 = ax1.bar(ind, df['run'], width=0.6, color=C_RUN, label='Run', zorder=3)
-p2 = ax1.bar(ind, df['swim'], bottom=df['run'], width=0.6, color=C_SWIM, label='Swim', zorder=3)
-p3 = ax1.bar(ind, df['bike'], bottom=df['run']+df['swim'], width=0.6, color=C_BIKE, label='Bike', zorder=3)
-
-# 2. SATURDAY LINE
-ax2 = ax1.twinx()
-ax2.plot(ind, df['sat_raw'], color=C_SAT, marker='o', linewidth=1.5, markersize=4, linestyle=':', label='Sat Long Ride', zorder=4)
-
-# 3. AXIS LIMITS
-max_y = df['total'].max()
-ax1.set_ylim(0, max_y * 1.25)
-
-# 4. PHASE BOXES
-phase_changes = df['phase'].ne(df['phase'].shift()).cumsum()
-
-for group_id, group in df.groupby(phase_changes):
-    start_idx = group.index[0]
-    end_idx = group.index[-1]
-    phase_name = group.iloc[0]['phase']
-    
-    phase_max_h = group['total'].max()
-    box_color = PHASE_COLORS.get(phase_name, "white")
-    
-    rect = Rectangle(
-        (start_idx - 0.45, 0),       
-        (end_idx - start_idx) + 0.9, 
-        phase_max_h + 1.0,           
-        linewidth=2, 
-        edgecolor=box_color, 
-        facecolor='none', 
-        linestyle='--',
-        zorder=5
-    )
-    ax1.add_patch(rect)
-    
-    mid_point = (start_idx + end_idx) / 2
-    ax1.text(mid_point, phase_max_h + 1.5, phase_name.upper(), 
-             color=box_color, ha='center', va='bottom', fontweight='bold', fontsize=11, 
-             bbox=dict(facecolor='#0f172a', edgecolor='none', alpha=0.8, pad=0))
-
-# 5. FORMATTING
-ax1.set_ylabel('Weekly Hours', color='white', fontsize=12)
-ax2.set_ylabel('Sat Ride Hours', color=C_SAT, fontsize=12)
-ax1.set_title('2026 Training Load Projection (Realistic Progression)', color='white', fontsize=18, fontweight='bold', pad=40)
-
-ax1.set_xticks(ind[::2])
-ax1.set_xticklabels(df['label'][::2], rotation=45, color='#94a3b8')
-
-ax1.tick_params(axis='y', colors='#94a3b8')
-ax2.tick_params(axis='y', colors=C_SAT)
-ax1.grid(color='#334155', linestyle=':', linewidth=0.5, axis='y', alpha=0.3, zorder=0)
-
-for ax in [ax1, ax2]:
-    ax.spines['top'].set_visible(False)
-    ax.spines['bottom'].set_color('#334155')
-    ax.spines['left'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-
-# 6. LEGEND
-handles = [
-    mpatches.Patch(color=C_BIKE, label='Bike'),
-    mpatches.Patch(color=C_SWIM, label='Swim'),
-    mpatches.Patch(color=C_RUN, label='Run'),
-    plt.Line2D([], [], color=C_SAT, linestyle=':', marker='o', label='Sat Long Ride')
-]
-ax1.legend(handles=handles, loc='upper left', frameon=False, labelcolor='white', bbox_to_anchor=(0, 1.0), ncol=4)
-
-# Note Labels
-for i, row in df.iterrows():
-    if row['note']:
-        y_pos = row['total'] + 0.3
-        txt = row['note']
-        color = '#f472b6' if txt == "RACE" else '#64748b'
-        weight = 'bold' if txt == "RACE" else 'normal'
-        ax1.text(i, y_pos, txt, ha='center', va='bottom', color=color, fontsize=8, rotation=90, fontweight=weight, zorder=6)
-
-plt.tight_layout()
-plt.savefig('projected_volume_2026.png', dpi=300, bbox_inches='tight')
-print("✅ Realistic Progression Chart Generated")
+    while current_date <= end_date:
+        phase = get_phase_name(current_date, phases)
+        sat_hours = get_sat_volume(current_date, phase)
+        
+        # Get Dynamic Base Volumes
+        base_swim, base_run, base_bike_weekday = get_base_volumes(phase, current_date.month)
+        
+        # Check Modifiers
+        week_end = current_date + timedelta(days=6)
+        is_race_week = any(current_date <= r <= week_end for r in race_dates)
+        is_deload = (week_num % 4 == 0)
+        
+        load_mod = 1.0
+        note = ""
+        
+        if is_race_week:
+            load_mod = 0.5
+            note = "RACE"
+        elif is_deload:
+            load_mod = 0.6
+            note = "Deload"
+        
+        # Apply Modifiers
+        swim_vol = base_swim * load_mod
+        run_vol = base_run * load_mod
+        
+        # Bike Calculation
+        sat_bike = sat_hours * load_mod 
+        bike_vol = (base_bike_weekday * load_mod) + sat_bike
+        
+        total_vol = swim_vol + run_vol + bike_vol
+
+        weeks.append({
+            "date": current_date,
+            "label": f"{current_date.month}/{current_date.day}",
+            "phase": phase,
+            "swim": swim_vol,
+            "run": run_vol,
+            "bike": bike_vol,
+            "total": total_vol,
+            "sat_raw": sat_bike,
+            "note": note
+        })
+        
+        current_date += timedelta(days=7)
+        week_num += 1
+
+    return pd.DataFrame(weeks)
+
+def params_from_plan(plan_file=None):
+    """
+    Reads phases and A/B races from endurance_plan.md. The season runs from the
+    Monday of the week holding Jan 1 to the Sunday after the last race.
+    Falls back to the module defaults for anything that can't be parsed.
+    """
+    plan_file = plan_file or config.PLAN_FILE
+    params = {'start_date': START_DATE, 'end_date': END_DATE, 'race_dates': RACE_DATES, 'phases': PHASES}
+    if not os.path.exists(plan_file): return params
+
+    model = plan_parser.load_model(plan_file)
+    to_date = lambda s: datetime.strptime(s, '%Y-%m-%d')
+    year = model['season_year']
+    phases = [{'name': p['name'], 'end': to_date(p['end'])} for p in model['phases']]
+    races = {to_date(e['date']): e['name'] for e in model['events'] if e['priority'] in ('A', 'B')}
+
+    if phases: params['phases'] = [(p['name'], p['end']) for p in phases]
+    if races:
+        params['race_dates'] = races
+        last_race = max(races)
+        params['end_date'] = last_race + timedelta(days=6 - last_race.weekday())
+    jan_1 = datetime(year, 1, 1)
+    params['start_date'] = jan_1 - timedelta(days=jan_1.weekday())
+    return params
+
+def input_hash(params):
+    """Hash of the parameters plus this script's source, so code edits also re-render."""
+    payload = json.dumps({
+        'start_date': params['start_date'].strftime('%Y-%m-%d'),
+        'end_date': params['end_date'].strftime('%Y-%m-%d'),
+        'race_dates': sorted((d.strftime('%Y-%m-%d'), n) for d, n in params['race_dates'].items()),
+        'phases': [(n, d.strftime('%Y-%m-%d')) for n, d in params['phases']]
+    }, sort_keys=True)
+    with open(os.path.abspath(__file__), 'rb') as f:
+        source = f.read()
+    return hashlib.sha256(payload.encode('utf-8') + source).hexdigest()[:16]
+
+def cached_renders(json_path, digest):
+    """Formats already rendered for this input hash, or None if the inputs changed."""
+    if not os.path.exists(json_path): return None
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except ValueError:
+        return None
+    if not isinstance(cached, dict) or cached.get('input_hash') != digest: return None
+    return cached.get('renders', [])
+
+# --- OUTPUTS ---
+def write_projection_data(df, path, digest, renders):
+    weeks = df.assign(date=df['date'].dt.strftime('%Y-%m-%d')).round(3).to_dict(orient='records')
+    return storage.write_json(path, {'input_hash': digest, 'renders': sorted(renders), 'weeks': weeks})
+
+def render_chart(df, path, fmt='png'):
+    # matplotlib is only needed when we actually draw
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as mpatches
+    from matplotlib.patches import Rectangle
+    import numpy as np
+
+    fig, ax1 = plt.subplots(figsize=(16, 9), facecolor='#0f172a')
+    ax1.set_facecolor('#0f172a')
+
+    # 1. STACKED BARS
+    ind = np.arange(len(df))
+    # Order: Run (Bottom) -> Swim (Middle) -> Bike (Top)
+    p1 = ax1.bar(ind, df['run'], width=0.6, color=C_RUN, label='Run', zorder=3)
+    p2 = ax1.bar(ind, df['swim'], bottom=df['run'], width=0.6, color=C_SWIM, label='Swim', zorder=3)
+    p3 = ax1.bar(ind, df['bike'], bottom=df['run']+df['swim'], width=0.6, color=C_BIKE, label='Bike', zorder=3)
+
+    # 2. SATURDAY LINE
+    ax2 = ax1.twinx()
+    ax2.plot(ind, df['sat_raw'], color=C_SAT, marker='o', linewidth=1.5, markersize=4, linestyle=':', label='Sat Long Ride', zorder=4)
+
+    # 3. AXIS LIMITS
+    max_y = df['total'].max()
+    ax1.set_ylim(0, max_y * 1.25)
+
+    # 4. PHASE BOXES
+    phase_changes = df['phase'].ne(df['phase'].shift()).cumsum()
+
+    for group_id, group in df.groupby(phase_changes):
+        start_idx = group.index[0]
+        end_idx = group.index[-1]
+        phase_name = group.iloc[0]['phase']
+
+        phase_max_h = group['total'].max()
+        box_color = PHASE_COLORS.get(phase_name, "white")
+
+        rect = Rectangle(
+            (start_idx - 0.45, 0),       
+            (end_idx - start_idx) + 0.9, 
+            phase_max_h + 1.0,           
+            linewidth=2, 
+            edgecolor=box_color, 
+            facecolor='none', 
+            linestyle='--',
+            zorder=5
+        )
+        ax1.add_patch(rect)
+
+        mid_point = (start_idx + end_idx) / 2
+        ax1.text(mid_point, phase_max_h + 1.5, phase_name.upper(), 
+                 color=box_color, ha='center', va='bottom', fontweight='bold', fontsize=11, 
+                 bbox=dict(facecolor='#0f172a', edgecolor='none', alpha=0.8, pad=0))
+
+    # 5. FORMATTING
+    ax1.set_ylabel('Weekly Hours', color='white', fontsize=12)
+    ax2.set_ylabel('Sat Ride Hours', color=C_SAT, fontsize=12)
+    ax1.set_title('2026 Training Load Projection (Realistic Progression)', color='white', fontsize=18, fontweight='bold', pad=40)
+
+    ax1.set_xticks(ind[::2])
+    ax1.set_xticklabels(df['label'][::2], rotation=45, color='#94a3b8')
+
+    ax1.tick_params(axis='y', colors='#94a3b8')
+    ax2.tick_params(axis='y', colors=C_SAT)
+    ax1.grid(color='#334155', linestyle=':', linewidth=0.5, axis='y', alpha=0.3, zorder=0)
+
+    for ax in [ax1, ax2]:
+        ax.spines['top'].set_visible(False)
+        ax.spines['bottom'].set_color('#334155')
+        ax.spines['left'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+    # 6. LEGEND
+    handles = [
+        mpatches.Patch(color=C_BIKE, label='Bike'),
+        mpatches.Patch(color=C_SWIM, label='Swim'),
+        mpatches.Patch(color=C_RUN, label='Run'),
+        plt.Line2D([], [], color=C_SAT, linestyle=':', marker='o', label='Sat Long Ride')
+    ]
+    ax1.legend(handles=handles, loc='upper left', frameon=False, labelcolor='white', bbox_to_anchor=(0, 1.0), ncol=4)
+
+    # Note Labels
+    for i, row in df.iterrows():
+        if row['note']:
+            y_pos = row['total'] + 0.3
+            txt = row['note']
+            color = '#f472b6' if txt == "RACE" else '#64748b'
+            weight = 'bold' if txt == "RACE" else 'normal'
+            ax1.text(i, y_pos, txt, ha='center', va='bottom', color=color, fontsize=8, rotation=90, fontweight=weight, zorder=6)
+
+    plt.tight_layout()
+    if fmt == 'png':
+        plt.savefig(path, dpi=300, bbox_inches='tight')
+    else:
+        plt.savefig(path, format=fmt, bbox_inches='tight')
+    plt.close(fig)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the season training-load projection.")
+    parser.add_argument('--format', dest='formats', action='append', choices=FORMATS,
+                        help='Output format (repeatable). Default: png. JSON data is always written.')
+    parser.add_argument('--output', default=OUTPUT_BASE, help='Output path without extension')
+    parser.add_argument('--defaults', action='store_true', help='Ignore endurance_plan.md and use the built-in dates')
+    parser.add_argument('--force', action='store_true', help='Re-render even if the inputs are unchanged')
+    args = parser.parse_args()
+
+    formats = args.formats or ['png']
+    params = {'start_date': START_DATE, 'end_date': END_DATE, 'race_dates': RACE_DATES, 'phases': PHASES} \
+        if args.defaults else params_from_plan()
+    digest = input_hash(params)
+    json_path = f"{args.output}.json"
+
+    done = None if args.force else cached_renders(json_path, digest)
+    todo = [fmt for fmt in formats if fmt != 'json'
+            and not (done and fmt in done and os.path.exists(f"{args.output}.{fmt}"))]
+    if done is not None and not todo:
+        print(f"✅ Projection unchanged (hash {digest}). Nothing to render.")
+        return
+
+    df = build_projection(**params)
+    for fmt in todo:
+        render_chart(df, f"{args.output}.{fmt}", fmt)
+    write_projection_data(df, json_path, digest, set(done or []) | set(todo))
+    print(f"✅ Realistic Progression Chart Generated ({', '.join(todo) or 'json'}, hash {digest})")
+
+if __name__ == "__main__":
+    main()
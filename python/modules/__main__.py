@@ -0,0 +1,107 @@
+import sys
+import json
+import time
+import argparse
+import importlib
+import subprocess
+from . import config
+
+# --- PIPELINE CLI ---
+# Run from python/:  python -m modules <stage> [stage options]
+# Stages are imported only when they run, so a light stage (push, hydrate, an
+# unchanged projection) never pays for pandas / numpy / garminconnect.
+# Whatever follows the stage name goes to the stage's own argparse, e.g.
+#   python -m modules sync --relink --since 2025-01
+#   python -m modules projection --format svg
+# `python -m modules timing` measures the cold start of every stage.
+# Only modules/ is a package. The top-level scripts (01_main, _01_fetch_garmin...)
+# stay plain scripts the workflows run by path, and their names aren't valid
+# identifiers, so they are imported by name from python/: run the CLI with python/
+# as the working directory or on PYTHONPATH (e.g. PYTHONPATH=python python -m modules push).
+
+STAGES = {
+    # name: (module, function, help)
+    'daily':      ('01_main', 'main', 'Full daily pipeline: fetch, sync, briefing, visuals, dashboard, push'),
+    'fetch':      ('_01_fetch_garmin', 'main', 'Fetch the latest Garmin activities'),
+    'health':     ('_02_fetch_health', 'main', 'Fetch Garmin health metrics into garmin_health.md'),
+    'readiness':  ('modules.readiness', 'main', 'Update the readiness baselines from garmin_health.md'),
+    'sync':       ('modules.sync_database', 'main', 'Merge plan + Garmin into the Master DB (--relink for history)'),
+    'hydrate':    ('modules.hydrate_activity', 'main', 'Re-hydrate Master DB rows by activity id or date range'),
+    'briefing':   ('_01_analyze_trends', 'main', 'Rebuild COACH_BRIEFING.md'),
+    'visuals':    ('modules.update_visuals', 'main', 'Write Master DB results into endurance_plan.md'),
+    'dashboard':  ('modules.dashboard_data', 'main', 'Rebuild the dashboard JSON artifacts'),
+    'compliance': ('modules.compliance', 'main', 'Score Zwift workout compliance'),
+    'catalog':    ('modules.zwift_catalog', 'main', 'Rebuild the Zwift workout catalog'),
+    'projection': ('_02_generate_projection', 'main', 'Render the season volume projection'),
+    'migrate':    ('modules.schema', 'main', 'Rewrite the Master DB through the typed schema'),
+    'push':       ('modules.git_ops', 'push_changes', 'Commit and push the data files git sees as changed'),
+}
+HEAVY_MODULES = ['pandas', 'numpy', 'matplotlib', 'garminconnect']
+TIMING_RUNS = 3
+
+def resolve(name):
+    module, func, _ = STAGES[name]
+    return getattr(importlib.import_module(module), func)
+
+# --- COLD START ---
+_PROBE = """
+import sys, json, time
+t = time.perf_counter()
+from modules import __main__ as cli
+try:
+    cli.resolve({name!r})
+    err = ''
+except ImportError as e:
+    err = str(e)
+print(json.dumps([time.perf_counter() - t, [m for m in cli.HEAVY_MODULES if m in sys.modules], err]))
+"""
+
+def cold_start(name, runs=TIMING_RUNS):
+    """Best-of-N seconds a fresh interpreter needs to import a stage, the heavy packages it loaded and any import error."""
+    best, heavy, err = None, [], ''
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', _PROBE.format(name=name)], cwd=config.PYTHON_DIR,
+                             capture_output=True, text=True)
+        if out.returncode != 0: return None, [], (out.stderr.strip().splitlines() or ['failed'])[-1]
+        secs, heavy, err = json.loads(out.stdout.splitlines()[-1])
+        if best is None or secs < best: best = secs
+    return best, heavy, err
+
+def timing(argv):
+    parser = argparse.ArgumentParser(prog='python -m modules timing', description="Cold-start import time per stage.")
+    parser.add_argument('stages', nargs='*', help='Stages to time (default: all)')
+    parser.add_argument('--runs', type=int, default=TIMING_RUNS, help='Fresh interpreters per stage (best is kept)')
+    args = parser.parse_args(argv)
+    unknown = [s for s in args.stages if s not in STAGES]
+    if unknown: parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    print(f"⏱️  COLD START (import only, best of {args.runs}):")
+    for name in args.stages or STAGES:
+        secs, heavy, err = cold_start(name, args.runs)
+        took = f"{secs * 1000:7.0f} ms" if secs is not None else "   failed"
+        note = f"  ⚠️ {err}" if err else ''
+        print(f"   {name:<11} {took}   {', '.join(heavy) or '-'}{note}")
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(
+        prog='python -m modules', description="Training-plan pipeline stages.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="stages (options after the stage go to it, see <stage> --help):\n"
+               + "\n".join(f"  {name:<11} {help}" for name, (_, _, help) in STAGES.items())
+               + "\n  timing      Cold-start import time per stage")
+    parser.add_argument('stage', choices=list(STAGES) + ['timing'], metavar='stage')
+    args = parser.parse_args(argv[:1])
+    rest = argv[1:]
+
+    if args.stage == 'timing': return timing(rest)
+
+    # The stage's argparse only sees its own options
+    sys.argv = [f"python -m modules {args.stage}"] + rest
+    start = time.perf_counter()
+    func = resolve(args.stage)
+    print(f"⏱️  {args.stage}: ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return func()
+
+if __name__ == "__main__":
+    main()
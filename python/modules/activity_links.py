@@ -0,0 +1,165 @@
+import os
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from . import config, storage, streams, sports
+
+# --- GARMIN <-> STRAVA ACTIVITY LINKS ---
+# garmin_data/activity_links.json: {garmin activityId: {'strava_id', 'method'}}
+#   method 'time': start/duration intervals overlap (Strava side from the stream archive)
+#   method 'date': only one activity of that sport on that local date on both sides
+# Each run only matches ids that aren't linked yet, so new data from either
+# side is picked up without re-joining the whole history.
+
+START_TOLERANCE_SEC = 600    # Start times may differ by a few minutes (device vs upload)
+MIN_OVERLAP_PCT = 0.5        # ...and the shorter activity must mostly overlap the longer one
+
+STRAVA_SPORTS = {'Ride': 'BIKE', 'VirtualRide': 'BIKE', 'EBikeRide': 'BIKE', 'GravelRide': 'BIKE',
+                 'MountainBikeRide': 'BIKE', 'Run': 'RUN', 'TrailRun': 'RUN', 'VirtualRun': 'RUN', 'Swim': 'SWIM'}
+
+def _utc_epoch(text):
+    return int(datetime.strptime(text[:19].replace('T', ' '), "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp())
+
+def garmin_records(garmin_data):
+    records = []
+    for g in garmin_data:
+        try:
+            start = g['beginTimestamp'] / 1000 if g.get('beginTimestamp') else _utc_epoch(g['startTimeGMT'])
+        except (KeyError, TypeError, ValueError):
+            start = None
+        records.append({
+            'id': str(g.get('activityId')),
+            'sport': sports.type_sport((g.get('activityType') or {}).get('typeKey', '')),
+            'date': str(g.get('startTimeLocal', ''))[:10],
+            'start': start,
+            'duration': float(g.get('duration') or 0)
+        })
+    return records
+
+def strava_records():
+    """Every Strava activity we know of: activity_ids.txt for the list, the stream archive for exact times."""
+    records = {}
+    ids_file = os.path.join(config.STRAVA_DIR, 'activity_ids.txt')
+    if os.path.exists(ids_file):
+        with open(ids_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.strip().split(',')
+                if len(parts) < 3: continue
+                records[parts[0]] = {'id': parts[0], 'sport': STRAVA_SPORTS.get(parts[1], 'OTHER'),
+                                     'date': parts[2], 'start': None, 'duration': 0.0}
+    for meta in streams.archive_index():
+        sid = str(meta.get('id'))
+        rec = records.setdefault(sid, {'id': sid})
+        rec['sport'] = STRAVA_SPORTS.get(meta.get('type'), rec.get('sport', 'OTHER'))
+        rec['date'] = meta.get('date') or rec.get('date')
+        if meta.get('start_date'):
+            rec['start'] = _utc_epoch(meta['start_date'])
+            rec['duration'] = float(meta.get('elapsed_time') or 0)
+    return list(records.values())
+
+class IntervalIndex:
+    """Strava activities sorted by start time; candidates() returns the ones near an interval."""
+    def __init__(self, records):
+        self.records = sorted((r for r in records if r.get('start') is not None), key=lambda r: r['start'])
+        self.starts = [r['start'] for r in self.records]
+        self.max_duration = max((r['duration'] for r in self.records), default=0)
+
+    def candidates(self, start, end):
+        lo = bisect_left(self.starts, start - self.max_duration - START_TOLERANCE_SEC)
+        hi = bisect_right(self.starts, end + START_TOLERANCE_SEC)
+        return self.records[lo:hi]
+
+def _overlap_score(g, s):
+    """Seconds of overlap, or None if the two can't be the same session."""
+    overlap = min(g['start'] + g['duration'], s['start'] + s['duration']) - max(g['start'], s['start'])
+    shorter = min(g['duration'], s['duration'])
+    close_start = abs(g['start'] - s['start']) <= START_TOLERANCE_SEC
+    if close_start or (shorter > 0 and overlap >= MIN_OVERLAP_PCT * shorter): return max(overlap, 0)
+    return None
+
+def match(garmin, strava):
+    """New links between unlinked records -> {garmin_id: {'strava_id', 'method'}}."""
+    links, used = {}, set()
+
+    # 1. Exact times: best-overlapping Strava activity of the same sport
+    index = IntervalIndex(strava)
+    for g in sorted((g for g in garmin if g['start'] is not None), key=lambda g: g['start']):
+        best, best_score = None, None
+        for s in index.candidates(g['start'], g['start'] + g['duration']):
+            if s['id'] in used or s['sport'] != g['sport']: continue
+            score = _overlap_score(g, s)
+            if score is not None and (best_score is None or score > best_score): best, best_score = s, score
+        if best:
+            links[g['id']] = {'strava_id': best['id'], 'method': 'time'}
+            used.add(best['id'])
+
+    # 2. Date + sport, only when unambiguous on both sides
+    by_day_g, by_day_s = {}, {}
+    for g in garmin:
+        if g['id'] not in links and g['sport'] != 'OTHER': by_day_g.setdefault((g['date'], g['sport']), []).append(g)
+    for s in strava:
+        if s['id'] not in used and s.get('sport') != 'OTHER': by_day_s.setdefault((s.get('date'), s.get('sport')), []).append(s)
+    for key, gs in by_day_g.items():
+        ss = by_day_s.get(key, [])
+        if len(gs) == 1 and len(ss) == 1:
+            links[gs[0]['id']] = {'strava_id': ss[0]['id'], 'method': 'date'}
+    return links
+
+def load_links(path=None):
+    path = path or config.ACTIVITY_LINKS_JSON
+    if not os.path.exists(path): return {}
+    try:
+        return storage.read_json(path, {})
+    except ValueError:
+        return {}
+
+def update_links(garmin_data, path=None):
+    """Links any Garmin / Strava activities that aren't linked yet and saves the map."""
+    path = path or config.ACTIVITY_LINKS_JSON
+    links = load_links(path)
+    garmin_all, strava_all = garmin_records(garmin_data), strava_records()
+
+    # A date-only link is re-checked once both sides have exact times
+    exact_g = {g['id'] for g in garmin_all if g['start'] is not None}
+    exact_s = {s['id'] for s in strava_all if s.get('start') is not None}
+    for gid in [gid for gid, l in links.items() if l['method'] == 'date' and gid in exact_g and l['strava_id'] in exact_s]:
+        del links[gid]
+
+    linked_strava = {l['strava_id'] for l in links.values()}
+    garmin = [g for g in garmin_all if g['id'] not in links]
+    strava = [s for s in strava_all if s['id'] not in linked_strava]
+
+    new = match(garmin, strava)
+    links.update(new)
+    if new: print(f"🔗 LINKS: {len(new)} new Garmin ↔ Strava links ({len(links)} total).")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    storage.write_json(path, links)
+    reset_cache()
+    return links
+
+def strava_id_for(garmin_id, links=None):
+    links = links if links is not None else _cached_links()
+    entry = links.get(str(garmin_id))
+    return entry['strava_id'] if entry else None
+
+def garmin_id_for(strava_id, links=None):
+    links = links if links is not None else _cached_links()
+    for gid, entry in links.items():
+        if entry['strava_id'] == str(strava_id): return gid
+    return None
+
+def strava_activity(garmin_id):
+    """Archived streams of the Strava twin of a Garmin activity, or None."""
+    sid = strava_id_for(garmin_id)
+    return streams.load(sid) if sid else None
+
+_links = None
+
+def _cached_links():
+    global _links
+    if _links is None: _links = load_links()
+    return _links
+
+def reset_cache():
+    global _links
+    _links = None
@@ -0,0 +1,199 @@
+import os
+import re
+import copy
+import json
+import time
+import atexit
+import hashlib
+import threading
+
+# --- API CASSETTES (RECORD / REPLAY) ---
+# Every Garmin / Strava call can go through a cassette, so the fetch scripts run
+# offline and deterministically once their responses have been recorded:
+#   API_CASSETTE=record   live calls, responses saved to cassettes/<service>.json
+#   API_CASSETTE=replay   no network and no credentials, responses from the cassette
+#   (unset)               plain live calls, nothing recorded
+# Replay knobs, for benchmarking concurrency and rate-limit handling:
+#   API_CASSETTE_LATENCY=0.3   seconds added to every replayed call
+#   API_CASSETTE_429=0.1       share of calls that first answer 429 (Too Many Requests)
+#   API_CASSETTE_SEED=1        which calls get the 429s (same seed -> same calls)
+# Credentials never reach the cassette: login isn't recorded, and any key that
+# looks like a secret is replaced by SCRUBBED in request keys and response bodies.
+# No imports from the package, so the Strava scripts can use it too.
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MODE = os.environ.get('API_CASSETTE', '').strip().lower()
+if MODE not in ('record', 'replay'): MODE = ''
+CASSETTE_DIR = os.environ.get('API_CASSETTE_DIR') or os.path.join(ROOT_DIR, 'cassettes')
+LATENCY = float(os.environ.get('API_CASSETTE_LATENCY') or 0)
+RATE_LIMIT_SHARE = float(os.environ.get('API_CASSETTE_429') or 0)
+SEED = os.environ.get('API_CASSETTE_SEED', '0')
+
+SCRUBBED = '<scrubbed>'
+SECRET_KEYS = re.compile(r'token|secret|password|passwd|authorization|cookie|email|client_id', re.I)
+
+class CassetteMiss(LookupError):
+    """Replay asked for a call that was never recorded."""
+
+class RateLimited(Exception):
+    """Simulated 429 from a replayed Garmin call (garminconnect raises its own in live runs)."""
+
+def replaying():
+    return MODE == 'replay'
+
+def has_credentials(*values):
+    """Replay needs none; live and record runs need every value."""
+    return replaying() or all(values)
+
+def scrub(value):
+    if isinstance(value, dict):
+        return {k: SCRUBBED if SECRET_KEYS.search(str(k)) else scrub(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)): return [scrub(v) for v in value]
+    return value
+
+class Cassette:
+    """Recorded responses of one service: {call key: [response, ...]}, replayed in order."""
+    def __init__(self, name):
+        self.name = name
+        self.path = os.path.join(CASSETTE_DIR, f"{name}.json")
+        self.lock = threading.Lock()
+        self.tapes, self.fresh, self.played, self.attempts = {}, set(), {}, {}
+        self.calls = self.limited = 0
+        self.dirty = False
+        if MODE in ('record', 'replay') and os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.tapes = json.load(f)
+        if MODE == 'replay' and not self.tapes:
+            print(f"⚠️ CASSETTE: Nothing recorded for '{name}' ({self.path}).")
+        atexit.register(self.close)
+
+    @staticmethod
+    def key(*parts):
+        return json.dumps(scrub(list(parts)), sort_keys=True, default=str)
+
+    def record(self, key, response):
+        with self.lock:
+            # A re-recorded call replaces its old responses instead of adding to them
+            if key not in self.fresh:
+                self.tapes[key] = []
+                self.fresh.add(key)
+            self.tapes[key].append(scrub(response))
+            self.calls += 1
+            self.dirty = True
+
+    def _rate_limited(self, key, attempt):
+        if RATE_LIMIT_SHARE <= 0: return False
+        digest = hashlib.sha256(f"{SEED}|{key}|{attempt}".encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big') / 2 ** 64 < RATE_LIMIT_SHARE
+
+    def replay(self, key):
+        """The next recorded response, or None for a simulated 429 (which doesn't use up the recording)."""
+        if LATENCY > 0: time.sleep(LATENCY)
+        with self.lock:
+            self.calls += 1
+            attempt = self.attempts[key] = self.attempts.get(key, 0) + 1
+            if self._rate_limited(key, attempt):
+                self.limited += 1
+                return None
+            tape = self.tapes.get(key)
+            if not tape: raise CassetteMiss(f"'{self.name}' cassette has no recording for {key}")
+            n = self.played.get(key, 0)
+            self.played[key] = n + 1
+            # Calls repeated more often than recorded keep getting the last response.
+            # A copy, since callers are free to modify what they get back
+            return copy.deepcopy(tape[min(n, len(tape) - 1)])
+
+    def close(self):
+        if MODE == 'record' and self.dirty:
+            os.makedirs(CASSETTE_DIR, exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.tapes, f, indent=1, sort_keys=True)
+            print(f"📼 CASSETTE: Recorded {self.calls} '{self.name}' calls to {self.path}")
+            self.dirty = False
+        elif MODE == 'replay' and self.calls:
+            print(f"📼 CASSETTE: Replayed {self.calls} '{self.name}' calls "
+                  f"({self.limited} simulated 429s, {LATENCY:g}s latency each).")
+            self.calls = 0
+
+_cassettes = {}
+_open_lock = threading.Lock()
+
+def cassette(name):
+    # Fetch threads may ask for the same cassette at once; only one may load / save it
+    with _open_lock:
+        if name not in _cassettes: _cassettes[name] = Cassette(name)
+        return _cassettes[name]
+
+# --- HTTP (STRAVA) ---
+class Response:
+    """The part of requests.Response the scripts use, rebuilt from a recording."""
+    def __init__(self, url, status_code, body=None, text=None):
+        self.url, self.status_code, self._body = url, status_code, body
+        self.text = text if text is not None else json.dumps(body)
+
+    def json(self):
+        return self._body if self._body is not None else json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code < 400: return
+        import requests
+        raise requests.HTTPError(f"{self.status_code} Error (cassette) for url: {self.url}", response=self)
+
+class Http:
+    """Drop-in for requests.get / requests.post that goes through the service's cassette."""
+    def __init__(self, name):
+        self.name = name
+
+    def _live(self, method, url, **kwargs):
+        import requests
+        return getattr(requests, method)(url, **kwargs)
+
+    def _call(self, method, url, **kwargs):
+        if not MODE: return self._live(method, url, **kwargs)
+        tape = cassette(self.name)
+        key = tape.key(method.upper(), url, kwargs.get('params'), kwargs.get('data'))
+        if MODE == 'record':
+            r = self._live(method, url, **kwargs)
+            try: tape.record(key, {'status': r.status_code, 'json': r.json()})
+            except ValueError: tape.record(key, {'status': r.status_code, 'text': r.text})
+            return r
+        rec = tape.replay(key)
+        if rec is None: return Response(url, 429, {'message': 'Rate Limit Exceeded', 'errors': []})
+        return Response(url, rec['status'], rec.get('json'), rec.get('text'))
+
+    def get(self, url, **kwargs):
+        return self._call('get', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self._call('post', url, **kwargs)
+
+# --- GARMIN CONNECT ---
+class GarminClient:
+    """garminconnect.Garmin whose data calls go through the 'garmin' cassette; login() is never recorded."""
+    def __init__(self, email, password):
+        self._client = None
+        if not replaying():
+            from garminconnect import Garmin
+            self._client = Garmin(email, password)
+
+    def login(self):
+        if self._client: return self._client.login()
+
+    def __getattr__(self, name):
+        if name.startswith('_'): raise AttributeError(name)
+        if not MODE: return getattr(self._client, name)
+        tape = cassette('garmin')
+
+        def call(*args, **kwargs):
+            key = tape.key(name, args, kwargs)
+            if MODE == 'record':
+                result = getattr(self._client, name)(*args, **kwargs)
+                tape.record(key, result)
+                return result
+            rec = tape.replay(key)
+            if rec is None: raise RateLimited(f"429 Too Many Requests (cassette): {name}")
+            return rec
+        return call
+
+def garmin(email, password):
+    return GarminClient(email, password)
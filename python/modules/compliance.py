@@ -0,0 +1,124 @@
+import re
+import argparse
+import numpy as np
+from . import config, storage, zwift_catalog, streams, activity_links, schema
+
+# --- WORKOUT EXECUTION COMPLIANCE ---
+# Aligns a ride's 1 Hz power stream with the target profile of the matching
+# zwift_library workout and scores how closely each interval was held.
+
+MAX_LAG_SEC = 300            # How far the ride may be offset from the workout start
+HIT_TOLERANCE = 0.10         # A second is a "hit" within ±10% of target...
+HIT_TOLERANCE_MIN_W = 10     # ...but never tighter than ±10 W
+UNSCORED_SEGMENTS = {'FreeRide', 'MaxEffort'}
+COLUMNS = ['complianceWorkout', 'complianceScore', 'complianceMAE', 'complianceHitRates']
+
+def _norm(text):
+    return re.sub(r'\s+', ' ', str(text).lower()).strip()
+
+def match_workout(activity_name, catalog):
+    """
+    'Zwift - Sweet Spot - 3 x 10 on Whole Lotta Lava in Watopia' -> 'Sweet_Spot___3_x_10.zwo'.
+    Longest catalog name wins so '2 x 15' never matches a '2 x 1' workout.
+    """
+    name = re.sub(r'^(\[\w+\]\s*)?zwift\s*-\s*', '', _norm(activity_name))
+    workouts = sorted(catalog.get('workouts', {}).items(), key=lambda kv: -len(kv[1]['name']))
+    for fname, w in workouts:
+        target = _norm(w['name'])
+        if name == target or name.startswith(target + ' on '): return fname
+    return None
+
+def best_lag(actual, target, max_lag=MAX_LAG_SEC):
+    """Offset (s) of the target inside the ride that maximizes their cross-correlation."""
+    a = actual - actual.mean()
+    b = target - target.mean()
+    n = 1 << int(np.ceil(np.log2(len(a) + len(b))))
+    corr = np.fft.irfft(np.fft.rfft(a, n) * np.conj(np.fft.rfft(b, n)), n)
+    lags = np.arange(-max_lag, max_lag + 1)
+    return int(lags[np.argmax(corr[lags % n])])
+
+def align(actual, target, lag):
+    """Ride power under each target second (0 where the ride doesn't cover it)."""
+    out = np.zeros(len(target))
+    src = np.arange(len(target)) + lag
+    ok = (src >= 0) & (src < len(actual))
+    out[ok] = actual[src[ok]]
+    return out
+
+def score(actual, target, segments):
+    """
+    Returns {'score', 'mae', 'hit_rates', 'lag'} for a 1 Hz power array against
+    a target-watts profile. Free-ride blocks are excluded from every figure.
+    """
+    actual = np.nan_to_num(np.asarray(actual, dtype=float))
+    lag = best_lag(actual, target)
+    aligned = align(actual, target, lag)
+
+    durations = np.array([s['duration'] for s in segments])
+    seg_idx = np.repeat(np.arange(len(segments)), durations)
+    scored = np.array([s['type'] not in UNSCORED_SEGMENTS for s in segments])
+
+    err = np.abs(aligned - target)
+    hit = err <= np.maximum(target * HIT_TOLERANCE, HIT_TOLERANCE_MIN_W)
+    hits = np.bincount(seg_idx, weights=hit, minlength=len(segments))
+    mask = scored[seg_idx]
+    if not mask.any(): return None
+
+    return {
+        'score': round(float(100 * hits[scored].sum() / durations[scored].sum()), 1),
+        'mae': round(float(err[mask].mean()), 1),
+        'hit_rates': [int(round(100 * h / d)) for h, d, s in zip(hits, durations, scored) if s and d],
+        'lag': lag
+    }
+
+def score_rows(df, ftp=None, force=False):
+    """
+    Fills the compliance columns for Zwift workout rows that have an archived
+    power stream. Rows already scored are skipped unless force=True.
+    """
+    for col in COLUMNS:
+        if col not in df.columns: df[col] = ""
+
+    catalog = zwift_catalog.load_catalog()
+    if not catalog.get('workouts'): return 0
+    ftp = ftp or zwift_catalog.current_ftp()
+    targets, scored = {}, 0
+
+    for idx, row in df.iterrows():
+        if not force and not schema.is_blank(row.get('complianceScore')): continue
+        fname = match_workout(row.get('activityName', ''), catalog)
+        if not fname: continue
+        act = activity_links.strava_activity(str(row.get('activityId', '')).split(',')[0].strip())
+        if act is None: continue
+        power = streams.one_hz(act, 'watts')
+        if power is None or len(power) == 0: continue
+
+        if fname not in targets: targets[fname] = zwift_catalog.target_watts(fname, ftp)
+        target, segments = targets[fname]
+        if target is None or len(target) == 0: continue
+
+        result = score(power, target, segments)
+        if not result: continue
+        schema.set_value(df, idx, 'complianceWorkout', fname)
+        schema.set_value(df, idx, 'complianceScore', result['score'])
+        schema.set_value(df, idx, 'complianceMAE', result['mae'])
+        schema.set_value(df, idx, 'complianceHitRates', "/".join(str(r) for r in result['hit_rates']))
+        scored += 1
+
+    if scored: print(f"🎯 COMPLIANCE: Scored {scored} workouts.")
+    return scored
+
+def main():
+    """Backfill: score every matching workout in the Master DB."""
+    from . import sync_database
+    parser = argparse.ArgumentParser(description="Score Zwift workout execution against the .zwo targets.")
+    parser.add_argument('--force', action='store_true', help='Re-score rows that already have a score')
+    args = parser.parse_args()
+
+    with storage.locked(config.MASTER_DB):
+        df = sync_database.load_master_db()
+        if score_rows(df, force=args.force): sync_database.save_master_db(df)
+        else: print("🎯 COMPLIANCE: Nothing to score.")
+
+if __name__ == "__main__":
+    main()
@@ -13,23 +13,53 @@ BRIEF_FILE = os.path.join(ROOT_DIR, 'COACH_BRIEFING.md')
 
 # --- FIX: Point to the 'garmin_data' folder, NOT 'python' folder ---
 GARMIN_JSON = os.path.join(ROOT_DIR, 'garmin_data', 'my_garmin_data_ALL.json')
+ACTIVITY_LINKS_JSON = os.path.join(ROOT_DIR, 'garmin_data', 'activity_links.json')
+HEALTH_MD = os.path.join(ROOT_DIR, 'garmin_data', 'garmin_health.md')
+
+# --- GENERATED ARTIFACTS ---
+DATA_DIR = os.path.join(ROOT_DIR, 'data')
+ROLLUPS_JSON = os.path.join(DATA_DIR, 'rollups.json')
+STREAM_METRICS_JSON = os.path.join(DATA_DIR, 'stream_metrics.json')
+ZONE_WEEKLY_JSON = os.path.join(DATA_DIR, 'zone_weekly.json')
+DASHBOARD_DIR = os.path.join(DATA_DIR, 'dashboard')
+DASHBOARD_ARTIFACTS = ['heatmap', 'planned', 'log']
+DASHBOARD_JSONS = [os.path.join(DASHBOARD_DIR, f"{name}.json") for name in DASHBOARD_ARTIFACTS]
+READINESS_JSON = os.path.join(DASHBOARD_DIR, 'readiness.json')
+PLAN_MODEL_JSON = os.path.join(DATA_DIR, 'plan_model.json')
+
+# --- ZWIFT ---
+ZWIFT_LIBRARY = os.path.join(ROOT_DIR, 'zwift_library')
+ZWIFT_CATALOG = os.path.join(DATA_DIR, 'zwift_catalog.json')
+
+# --- STRAVA ---
+STRAVA_DIR = os.path.join(ROOT_DIR, 'strava_data')
+CP_MODEL_JSON = os.path.join(STRAVA_DIR, 'cycling', 'cp_model.json')
 
 # --- SCHEMA ---
-# The Single Source of Truth for your Database Columns
-MASTER_COLUMNS = [
-    'Status', 'Day', 'Planned Workout', 'Planned Duration', 
-    'Actual Workout', 'Actual Duration', 'Notes / Targets', 'Date', 'Match Status',
-    'activityId', 'activityName', 'activityType', 'sportTypeId',
-    'duration', 'distance', 'averageHR', 'maxHR', 
-    'aerobicTrainingEffect', 'anaerobicTrainingEffect', 'trainingEffectLabel',
-    'avgPower', 'maxPower', 'normPower', 'trainingStressScore', 'intensityFactor',
-    'averageSpeed', 'maxSpeed', 
-    'averageBikingCadenceInRevPerMinute', 'averageRunningCadenceInStepsPerMinute',
-    'avgStrideLength', 'avgVerticalOscillation', 'avgGroundContactTime',
-    'vO2MaxValue', 'calories', 'elevationGain', 'RPE', 'Feeling'
-]
+# The Single Source of Truth for your Database Columns, with the type each one
+# is coerced to on load (see modules/schema.py):
+#   'float' / 'int' -> nullable numbers, 'date' -> datetime, 'category', 'text'
+MASTER_SCHEMA = {
+    'Status': 'category', 'Day': 'text', 'Planned Workout': 'text', 'Planned Duration': 'text',
+    'Actual Workout': 'text', 'Actual Duration': 'float', 'Notes / Targets': 'text', 'Date': 'date',
+    'Match Status': 'category',
+    'activityId': 'text', 'activityName': 'text', 'activityType': 'category', 'sportTypeId': 'int',
+    'duration': 'float', 'distance': 'float', 'averageHR': 'float', 'maxHR': 'float',
+    'aerobicTrainingEffect': 'float', 'anaerobicTrainingEffect': 'float', 'trainingEffectLabel': 'text',
+    'avgPower': 'float', 'maxPower': 'float', 'normPower': 'float', 'trainingStressScore': 'float',
+    'intensityFactor': 'float',
+    'averageSpeed': 'float', 'maxSpeed': 'float',
+    'averageBikingCadenceInRevPerMinute': 'float', 'averageRunningCadenceInStepsPerMinute': 'float',
+    'avgStrideLength': 'float', 'avgVerticalOscillation': 'float', 'avgGroundContactTime': 'float',
+    'vO2MaxValue': 'float', 'calories': 'float', 'elevationGain': 'float', 'RPE': 'int', 'Feeling': 'int',
+    'complianceWorkout': 'text', 'complianceScore': 'float', 'complianceMAE': 'float', 'complianceHitRates': 'text'
+}
+MASTER_COLUMNS = list(MASTER_SCHEMA)
 
 # --- SETTINGS ---
+# Where sync takes FTP from: 'plan' (endurance_plan.md) or 'cp' (fitted critical power)
+FTP_SOURCE = os.getenv('FTP_SOURCE', 'plan').lower()
+
 # Activities to include in the database
 ALLOWED_SPORT_TYPES = [1, 2, 5, 255] # Run, Bike, Swim, Other
 
@@ -0,0 +1,335 @@
+import os
+import re
+import sys
+import json
+import math
+import hashlib
+import argparse
+import subprocess
+from datetime import datetime, timedelta
+from . import config, storage
+
+# --- DASHBOARD ARTIFACTS ---
+# Pre-aggregated JSON for the web views, so the browser doesn't have to parse
+# and re-aggregate both markdown files on every page load:
+#   heatmap.json  {days: {date: {plan, act, missed, rest, types, sports, sportMins,
+#                 maxAct, details, activity}}}  day cells for the whole dashboard
+#   planned.json  the plan's Weekly Schedule cards
+#   log.json      [row, ...] the DB rows with only the fields the trends,
+#                 readiness and metrics views read (empty ones left out); fetched
+#                 only when one of those views opens, and merged with the plan there
+# Only heatmap and planned are fetched at startup, and the raw database only
+# by the logbook. Nothing here depends on the day it runs, so a sync writes
+# new files only when the DB or plan changed. heatmap and planned carry
+# 'plan_hash'; when the plan on the site is newer the JS builds the same day
+# cells from log.json itself. `python -m modules dashboard --check` runs the
+# JS under node and diffs it against what is built here.
+
+COMPLETED_PATTERN = r'completed|done|yes|x|exact|found'
+ARTIFACTS = config.DASHBOARD_ARTIFACTS
+LOG_FIELDS = [
+    'date', 'type', 'actualType', 'planName', 'actualName', 'completed', 'plannedDuration', 'actualDuration',
+    'avgHR', 'avgPower', 'avgSpeed', 'avgCadence', 'trainingEffectLabel', 'vO2MaxValue', 'avgGroundContactTime',
+    'avgVerticalOscillation', 'anaerobicTrainingEffect', 'normPower', 'trainingStressScore', 'elevationGain',
+    'RPE', 'sportTypeId', 'activityType',
+]
+
+def _js_round(x):
+    return int(math.floor(x + 0.5))
+
+# --- SAME RULES AS js/parser.js ---
+# A port of Parser.getSection / _parseTableBlock / parseTrainingLog, so the
+# artifacts hold exactly the rows the browser would parse from the markdown.
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+HEADERS = [
+    # (field, header test) in parser.js order, the first test that matches a header wins
+    ('date', 'date'), ('status', 'status'), ('planWorkout', 'planned workout'), ('planDur', 'planned duration'),
+    ('actDur', 'actual duration'), ('rawDur', '=duration'), ('actWorkout', 'actual workout'),
+    ('notes', 'notes'), ('notes', 'target'), ('hr', 'averagehr'), ('power', 'avgpower'), ('speed', 'averagespeed'),
+    ('tss', 'trainingstressscore'), ('activityId', 'activityid'), ('cadence', 'averagebikingcadence'),
+    ('teLabel', 'trainingeffectlabel'), ('vo2', 'vo2max'), ('gct', 'groundcontact'), ('vert', 'verticaloscillation'),
+    ('anaerobic', 'anaerobictraining'), ('normPower', 'normpower'), ('elev', 'elevationgain'),
+    ('rpe', '=rpe'), ('feel', '=feeling'), ('sportType', 'sporttypeid'), ('actType', 'activitytype'),
+]
+
+def _js_float(text):
+    """parseFloat(): the leading number of the text, None for NaN."""
+    m = re.match(r'\s*([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)', text)
+    return float(m.group(1)) if m else None
+
+def _num(text):
+    """parseFloat(text) || 0"""
+    val = _js_float(text)
+    if not val: return 0
+    return int(val) if val.is_integer() else val
+
+def _local_date(year, month, day):
+    """new Date(y, m - 1, d): out of range months and days roll over."""
+    if year < 100: year += 1900
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return datetime(year, month, 1) + timedelta(days=day - 1)
+
+def parse_date(text):
+    m = re.search(r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})', text)
+    if m: return _local_date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+    # new Date(text) fallback; the plan only uses it for 'Jun 20, 2026' style dates
+    m = re.fullmatch(r'([A-Za-z]+)\.?\s+(\d{1,2}),?\s+(\d{4})', text)
+    if m and m.group(1)[:3].lower() in MONTHS:
+        return _local_date(int(m.group(3)), MONTHS.index(m.group(1)[:3].lower()) + 1, int(m.group(2)))
+    return None
+
+def get_type(text):
+    t = str(text or '').lower()
+    if re.search(r'bike|cycle|zwift|ride|spin|peloton|cycling', t): return 'Bike'
+    if re.search(r'run|jog|treadmill', t): return 'Run'
+    if re.search(r'swim|pool', t): return 'Swim'
+    if re.search(r'strength|lift|gym|core', t): return 'Strength'
+    return 'Other'
+
+def parse_time(text):
+    t = str(text or '').lower()
+    m = re.search(r'([\d\.]+)', t)
+    val = _js_float(m.group(1)) if m else None
+    if val is None: return 0
+    if 'h' in t or (val < 10 and 'm' not in t): return _js_round(val * 60)
+    return _js_round(val)
+
+def clean_text(text):
+    t = (text or '').strip().replace('**', '').replace('__', '')
+    return re.sub(r'\[(.*?)\]\(.*?\)', r'\1', t)
+
+def get_section(md, title):
+    if not md: return ''
+    capturing, section = False, []
+    for line in md.split('\n'):
+        trimmed = line.strip()
+        if trimmed.startswith('#'):
+            if title.lower() in trimmed.lower():
+                capturing = True
+                continue
+            if capturing and not trimmed.startswith('###'): break
+        if capturing: section.append(line)
+    return '\n'.join(section).strip()
+
+def _header_index(lines):
+    """Column of each field, from the first '|' line mentioning 'date' that has a date column."""
+    idx = {field: -1 for field, _ in HEADERS}
+    for line in lines:
+        if '|' not in line or 'date' not in line.lower(): continue
+        for i, h in enumerate(c.strip().lower().replace('**', '') for c in line.split('|')):
+            for field, test in HEADERS:
+                if (h == test[1:]) if test.startswith('=') else (test in h):
+                    idx[field] = i
+                    break
+        if idx['date'] != -1: break
+    return idx
+
+def parse_table_block(text):
+    if not text: return []
+    lines = text.split('\n')
+    idx = _header_index(lines)
+    if idx['date'] == -1: return []
+
+    items = []
+    for line in lines:
+        if '|' not in line or '---' in line: continue
+        cols = line.split('|')
+        if len(cols) < 3: continue
+        col = lambda field: clean_text(cols[idx[field]]) if -1 < idx[field] < len(cols) else ''
+
+        date_str = col('date')
+        if not date_str or 'date' in date_str.lower(): continue
+        date = parse_date(date_str)
+        if not date: continue
+
+        plan_name, actual_name = col('planWorkout'), col('actWorkout')
+        actual_type = get_type(actual_name)
+        raw_seconds = _js_float(col('rawDur'))
+        actual = _js_round(raw_seconds / 60) if raw_seconds and raw_seconds > 0 else parse_time(col('actDur'))
+        # parser.js keeps the match itself (truthy but not === true) when the status says so
+        done = re.search(COMPLETED_PATTERN, col('status').lower())
+        hr, power, speed, tss = _num(col('hr')), _num(col('power')), _num(col('speed')), _num(col('tss'))
+        ef = 0
+        if hr > 0:
+            if actual_type == 'Bike': ef = power / hr
+            elif actual_type == 'Run': ef = speed / hr
+
+        items.append({
+            'date': date.strftime('%Y-%m-%d'), 'dayName': date.strftime('%A'),
+            'type': get_type(plan_name), 'actualType': actual_type,
+            'planName': plan_name, 'actualName': actual_name,
+            'completed': done.group(0) if done else actual > 0,
+            'plannedDuration': parse_time(col('planDur')), 'actualDuration': actual,
+            'notes': col('notes'),
+            'avgHR': hr, 'avgPower': power, 'avgSpeed': speed, 'tss': tss, 'ef': ef,
+            'avgCadence': _num(col('cadence')), 'activityId': col('activityId'), 'trainingEffectLabel': col('teLabel'),
+            'vO2MaxValue': _num(col('vo2')), 'avgGroundContactTime': _num(col('gct')),
+            'avgVerticalOscillation': _num(col('vert')), 'anaerobicTrainingEffect': _num(col('anaerobic')),
+            'normPower': _num(col('normPower')), 'trainingStressScore': tss, 'elevationGain': _num(col('elev')),
+            'RPE': col('rpe'), 'Feeling': col('feel'), 'sportTypeId': col('sportType'), 'activityType': col('actType'),
+        })
+    return items
+
+def parse_training_log(md):
+    history = get_section(md, "Appendix C: Training History Log") or get_section(md, "Training History")
+    if not history and '|' in (md or ''): history = md
+    return parse_table_block(history) + parse_table_block(get_section(md, "Weekly Schedule"))
+
+def log_items(master_md, plan_md):
+    """
+    allData as app.js builds it: one item per date + planned type, the last DB
+    row for a key wins, plan rows only fill keys the DB doesn't have. Newest first.
+    """
+    merged = {}
+    for item in parse_training_log(master_md):
+        merged[(item['date'], item['type'])] = item
+    for item in parse_training_log(plan_md):
+        merged.setdefault((item['date'], item['type']), item)
+    return sorted(merged.values(), key=lambda it: it['date'], reverse=True)
+
+# --- BUILDERS ---
+def _quoteless(name):
+    """Names end up inside an onclick='...' attribute, so the views strip quotes."""
+    return re.sub(r'[\'"]', '', name)
+
+def build_heatmap(items):
+    """summarizeLog() over every day of the merged log, so the cells don't move with the date."""
+    days = {}
+    for it in items:
+        day = days.setdefault(it['date'], {'plan': 0, 'act': 0, 'missed': 0, 'rest': False, 'types': [], 'sports': [],
+                                           'sportMins': {}, 'maxAct': {}, 'details': [], 'activity': []})
+        day['plan'] += it['plannedDuration']
+        day['act'] += it['actualDuration']
+        if it['plannedDuration'] > 0 and not it['actualDuration'] > 0: day['missed'] += 1
+        if it['type']: day['maxAct'][it['type']] = max(day['maxAct'].get(it['type'], 0), it['actualDuration'])
+        if it['type'] == 'Rest': day['rest'] = True
+        elif it['type'] not in day['types']: day['types'].append(it['type'])
+        name = _quoteless(it['actualName'] or it['planName'] or 'Workout')
+        day['details'].append(f"{name} ({it['actualDuration']}m)")
+        if it['actualDuration'] > 0:
+            tag = next((s for s in ['Run', 'Bike', 'Swim'] if f"[{s.upper()}]" in it['actualName'].upper()), 'Other')
+            if tag not in day['sports']: day['sports'].append(tag)
+            day['sportMins'][tag] = day['sportMins'].get(tag, 0) + it['actualDuration']
+            day['activity'].append(f"{_quoteless(it['actualName'] or 'Activity')} ({it['actualDuration']}m)")
+    return days
+
+def build_log(master_md):
+    """The DB rows in file order, cut down to LOG_FIELDS; app.js fills the missing ones back in."""
+    return [{k: it[k] for k in LOG_FIELDS if it[k]} for it in parse_training_log(master_md)]
+
+def build_planned(plan_md):
+    """The Weekly Schedule cards, as renderPlannedWorkouts parses them from the plan."""
+    return sorted(parse_table_block(get_section(plan_md, "Weekly Schedule")), key=lambda c: c['date'])
+
+def artifact_paths(out_dir=None):
+    return [os.path.join(out_dir or config.DASHBOARD_DIR, f"{name}.json") for name in ARTIFACTS]
+
+def build_artifacts(master_md, plan_md):
+    # Same digest as App.init's hashString(planMd)
+    plan_hash = hashlib.sha256(plan_md.encode('utf-8')).hexdigest()
+    return {
+        'heatmap': {'plan_hash': plan_hash, 'days': build_heatmap(log_items(master_md, plan_md))},
+        'planned': {'plan_hash': plan_hash, 'workouts': build_planned(plan_md)},
+        'log': build_log(master_md),
+    }
+
+def write_artifacts(out_dir=None):
+    """Builds every dashboard artifact from the DB and plan on disk and writes the ones whose data changed."""
+    out_dir = out_dir or config.DASHBOARD_DIR
+    master_md = storage.read_text(config.MASTER_DB) or ''
+    plan_md = storage.read_text(config.PLAN_FILE) or ''
+    artifacts = build_artifacts(master_md, plan_md)
+
+    os.makedirs(out_dir, exist_ok=True)
+    changed = [name for name, path in zip(ARTIFACTS, artifact_paths(out_dir))
+               if storage.write_json(path, artifacts[name]) == 'semantic']
+    print(f"🖥️  DASHBOARD: {len(artifacts)} artifacts built ({', '.join(changed) or 'no changes'}).")
+    return artifacts
+
+# --- PARITY CHECK ---
+# Runs the browser code (js/parser.js and the heatmap day cells) under node on
+# the same files and compares it with the artifacts.
+_PARITY_JS = """
+import { readFileSync } from 'fs';
+import { pathToFileURL } from 'url';
+const [jsDir, masterPath, planPath, logFields] = process.argv.slice(1);
+globalThis.window = globalThis;   // the view modules register their onclick handlers on window
+const load = (p) => import(pathToFileURL(`${jsDir}/${p}`).href);
+const { Parser } = await load('parser.js');
+const { summarizeLog } = await load('views/dashboard/heatmaps.js');
+const { toLocalYMD } = await load('views/dashboard/utils.js');
+const read = (p) => { try { return readFileSync(p, 'utf8'); } catch (e) { return ''; } };
+
+// Same merge as App.loadLog
+const planMd = read(planPath);
+const masterLog = Parser.parseTrainingLog(read(masterPath));
+const key = (item) => `${item.date.toISOString().split('T')[0]}_${item.type}`;
+const dataMap = new Map();
+masterLog.forEach(item => { if (item.date) dataMap.set(key(item), item); });
+Parser.parseTrainingLog(planMd).forEach(item => { if (item.date && !dataMap.has(key(item))) dataMap.set(key(item), item); });
+const allData = Array.from(dataMap.values()).sort((a, b) => b.date - a.date);
+
+const plain = (item) => ({ ...item, date: toLocalYMD(item.date),
+                           completed: Array.isArray(item.completed) ? item.completed[0] : item.completed });
+const fields = JSON.parse(logFields);
+const trimmed = (item) => Object.fromEntries(Object.entries(plain(item)).filter(([k, v]) => fields.includes(k) && v));
+console.log(JSON.stringify({
+    log: masterLog.map(trimmed),
+    heatmap: summarizeLog(allData, toLocalYMD),
+    planned: Parser._parseTableBlock(Parser.getSection(planMd, 'Weekly Schedule')).sort((a, b) => a.date - b.date).map(plain),
+}));
+"""
+
+def _differences(py, js, path=''):
+    if isinstance(py, dict) and isinstance(js, dict):
+        for k in sorted(set(py) | set(js)):
+            if k not in py or k not in js: yield f"{path}.{k}: only in {'python' if k in py else 'js'}"
+            else: yield from _differences(py[k], js[k], f"{path}.{k}")
+    elif isinstance(py, list) and isinstance(js, list):
+        if len(py) != len(js): yield f"{path}: {len(py)} python vs {len(js)} js"
+        for i, (a, b) in enumerate(zip(py, js)): yield from _differences(a, b, f"{path}[{i}]")
+    elif py != js or isinstance(py, bool) != isinstance(js, bool):
+        yield f"{path}: {py!r} python vs {js!r} js"
+
+def check_parity(limit=20):
+    """Compares the artifacts with what the JS computes from the same markdown. Returns the differences."""
+    master_md = storage.read_text(config.MASTER_DB) or ''
+    plan_md = storage.read_text(config.PLAN_FILE) or ''
+    artifacts = build_artifacts(master_md, plan_md)
+    try:
+        out = subprocess.run(['node', '--input-type=module', '-e', _PARITY_JS, os.path.join(config.ROOT_DIR, 'js'),
+                              config.MASTER_DB, config.PLAN_FILE, json.dumps(LOG_FIELDS)],
+                             capture_output=True, text=True, check=True)
+    except FileNotFoundError:
+        print("⚠️ Parity check needs node on the PATH.")
+        return None
+    except subprocess.CalledProcessError as e:
+        print(f"❌ JS side failed: {(e.stderr.strip().splitlines() or ['?'])[-1]}")
+        return None
+    js = json.loads(out.stdout)
+
+    pairs = {
+        'log': (artifacts['log'], js['log']),
+        'heatmap': (artifacts['heatmap']['days'], js['heatmap']),
+        'planned': (artifacts['planned']['workouts'], js['planned']),
+    }
+    diffs = [d for name, (py, js_side) in pairs.items() for d in _differences(py, js_side, name)]
+    print(f"🔎 PARITY: {len(artifacts['log'])} DB rows and {len(artifacts['heatmap']['days'])} days python, "
+          f"{len(js['log'])} and {len(js['heatmap'])} js.")
+    for d in diffs[:limit]: print(f"   ❌ {d}")
+    if len(diffs) > limit: print(f"   ... {len(diffs) - limit} more")
+    if not diffs: print("   ✅ Artifacts match the JS.")
+    return diffs
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the dashboard JSON artifacts from the files on disk, without a sync.")
+    parser.add_argument('--check', action='store_true', help='Compare the artifacts with the JS views instead (needs node)')
+    args = parser.parse_args()
+    if args.check:
+        diffs = check_parity()
+        if diffs: sys.exit(1)
+        return
+    write_artifacts()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import os
+import re
+import json
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# --- STREAMING GARMIN STORE ---
+# garmin_data/my_garmin_data_ALL.json is one array of activities, newest first
+# (every writer sorts it that way). iter_activities() yields them one at a time
+# instead of json.load()-ing the whole file: with ijson when it's installed,
+# otherwise with an incremental raw_decode over fixed-size chunks.
+#   fields -> keep only these keys ({key: None for the whole value, or [sub-keys]})
+#   since  -> 'YYYY-MM-DD': stop reading at the first activity older than that
+# No imports from the package (and no pandas), so it stays cheap to import.
+
+CHUNK_SIZE = 1 << 16
+_SEPARATORS = re.compile(r'[\s,]*')
+
+def project(record, fields):
+    if fields is None: return record
+    out = {}
+    for key, sub in fields.items():
+        if key not in record: continue
+        val = record[key]
+        out[key] = {k: val[k] for k in sub if k in val} if sub and isinstance(val, dict) else val
+    return out
+
+def _iter_array(f):
+    """Items of a top-level JSON array, decoded one by one from a text stream."""
+    decoder = json.JSONDecoder()
+    buf, pos, started = '', 0, False
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        buf = buf[pos:] + chunk
+        pos = 0
+        while True:
+            pos = _SEPARATORS.match(buf, pos).end()
+            if pos >= len(buf): break
+            if not started:
+                if buf[pos] != '[': raise ValueError("Garmin JSON is not an array")
+                started, pos = True, pos + 1
+                continue
+            if buf[pos] == ']': return
+            # An item is always an object, so a successful decode is a complete one
+            try: item, pos = decoder.raw_decode(buf, pos)
+            except ValueError: break
+            yield item
+        if not chunk:
+            if buf[pos:].strip(): raise ValueError("Garmin JSON is truncated")
+            return
+
+def _items(path):
+    if ijson:
+        with open(path, 'rb') as f:
+            yield from ijson.items(f, 'item', use_float=True)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from _iter_array(f)
+
+def iter_activities(path, fields=None, since=None):
+    if not os.path.exists(path): return
+    for act in _items(path):
+        if since and str(act.get('startTimeLocal', ''))[:10] < since: return
+        yield project(act, fields)
+
+def load_activities(path, fields=None, since=None):
+    return list(iter_activities(path, fields, since))
@@ -1,23 +1,65 @@
 import subprocess
 import os
 from datetime import datetime
-from . import config
+from . import config, storage
+
+def _git(*args):
+    return subprocess.run(["git"] + list(args), cwd=config.ROOT_DIR, capture_output=True, check=True).stdout
+
+def worktree_changes(paths):
+    """
+    {path: 'semantic' / 'cosmetic'} for the paths git sees as modified or
+    untracked, judged on the diff against HEAD with the writers' own rules.
+    Works no matter which process wrote the files; a semantic write recorded
+    in this process skips the diff.
+    """
+    recorded = set(storage.semantic_changes())
+    status = _git("status", "--porcelain", "-z", "--untracked-files=all", "--", *paths).decode('utf-8')
+    changes = {}
+    for entry in status.split('\0'):
+        if len(entry) < 4: continue
+        code, rel = entry[:2], entry[3:]
+        if 'D' in code: continue
+        path = os.path.join(config.ROOT_DIR, rel)
+        if code == '??' or os.path.abspath(path) in recorded:
+            changes[path] = 'semantic'
+            continue
+        try: old = _git("show", f"HEAD:{rel}").decode('utf-8')
+        except subprocess.CalledProcessError: old = None
+        with open(path, 'r', encoding='utf-8') as f:
+            new = f.read()
+        status = storage.classify(path, old, new, [storage.LAST_UPDATED_PATTERN])
+        if status != 'unchanged': changes[path] = status
+    return changes
 
 def push_changes():
     print("\n🐙 GIT: Starting Commit & Push...")
     
-    # 1. Verify files exist
+    # 1. Only stage files whose data really changed (in this run or an earlier stage's process)
     files_to_add = [
         config.MASTER_DB, 
         config.PLAN_FILE, 
+        config.PLAN_MODEL_JSON,
         config.GARMIN_JSON, 
-        config.BRIEF_FILE
-    ]
+        config.ACTIVITY_LINKS_JSON,
+        config.BRIEF_FILE,
+        config.ROLLUPS_JSON,
+        config.STREAM_METRICS_JSON,
+        config.ZONE_WEEKLY_JSON,
+        config.READINESS_JSON
+    ] + config.DASHBOARD_JSONS
     
-    valid_files = [f for f in files_to_add if os.path.exists(f)]
+    try:
+        changes = worktree_changes([f for f in files_to_add if os.path.exists(f)])
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"⚠️ Git Operation Failed: {e}")
+        return
+    cosmetic = [os.path.basename(f) for f, status in changes.items() if status == 'cosmetic']
+    if cosmetic: print(f"   Only cosmetic changes (not committed): {cosmetic}")
+    valid_files = [f for f, status in changes.items() if status == 'semantic']
     
     if not valid_files:
-        print("❌ No files found to commit.")
+        print("ℹ️  No data changes. Skipping commit.")
         return
 
     try:
@@ -29,10 +71,10 @@ def push_changes():
         cmd_add = ["git", "add"] + valid_files
         subprocess.run(cmd_add, check=True)
         
-        # 4. Check Status
-        status = subprocess.run(["git", "status", "--porcelain"], capture_output=True, text=True).stdout
+        # 4. Check Staged Diff (ignores unrelated files in the workspace)
+        staged = subprocess.run(["git", "diff", "--cached", "--quiet", "--"] + valid_files)
         
-        if status:
+        if staged.returncode != 0:
             print(f"   Changes detected in: {[os.path.basename(f) for f in valid_files]}")
             
             # 5. Commit
@@ -40,7 +82,8 @@ def push_changes():
             subprocess.run(["git", "commit", "-m", msg], check=True)
             
             # 6. Rebase & Push
-            subprocess.run(["git", "pull", "--rebase"], check=True)
+            # Cosmetic-only files stay unstaged, so the rebase has to stash them
+            subprocess.run(["git", "pull", "--rebase", "--autostash"], check=True)
             subprocess.run(["git", "push"], check=True)
             print("✅ Git Push Complete!")
         else:
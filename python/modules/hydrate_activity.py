@@ -1,191 +1,320 @@
-import sys
 import os
-import json
-import pandas as pd
-from garminconnect import Garmin
+import re
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from . import config, storage, garmin_store, cassette
 
-# --- IMPORT FIX ---
-# Add current directory to path so we can import 'config' from the same folder
-current_dir = os.path.dirname(os.path.abspath(__file__))
-if current_dir not in sys.path:
-    sys.path.append(current_dir)
-
-import config
+# Run from python/:  python -m modules hydrate <ids | YYYY-MM-DD..YYYY-MM-DD>
 
 # --- CONFIGURATION ---
 JSON_FILE = config.GARMIN_JSON
 MASTER_DB = config.MASTER_DB
+FETCH_WORKERS = 4
+
+# Columns to sync
+COLS_TO_SYNC = [
+    'duration', 'distance', 'averageHR', 'maxHR',
+    'aerobicTrainingEffect', 'anaerobicTrainingEffect', 'trainingEffectLabel',
+    'avgPower', 'maxPower', 'normPower', 'trainingStressScore', 'intensityFactor',
+    'averageSpeed', 'maxSpeed', 'vO2MaxValue', 'calories', 'elevationGain',
+    'averageBikingCadenceInRevPerMinute',
+    'averageRunningCadenceInStepsPerMinute',
+    'avgStrideLength', 'avgVerticalOscillation', 'avgGroundContactTime'
+]
 
 def get_credentials():
     email = os.environ.get('GARMIN_EMAIL')
     password = os.environ.get('GARMIN_PASSWORD')
     return email, password
 
-def fetch_specific_activity(activity_id):
+def load_local_store():
+    """The whole store, only needed when fetched activities have to be written back."""
+    return storage.read_json(JSON_FILE, [])
+
+def find_local(activity_ids):
+    """Streams the local JSON until every id is found. Returns {activity_id: activity}."""
+    wanted, found = set(activity_ids), {}
+    for act in garmin_store.iter_activities(JSON_FILE):
+        aid = str(act.get('activityId'))
+        if aid not in wanted: continue
+        found[aid] = act
+        if len(found) == len(wanted): break
+    return found
+
+def normalize_self_evaluation(activity):
+    # Normalize RPE/Feeling from Deep Data immediately
+    if 'summaryDTO' in activity:
+        raw_rpe = activity['summaryDTO'].get('directWorkoutRpe')
+        raw_feel = activity['summaryDTO'].get('directWorkoutFeel')
+        if raw_rpe: activity['perceivedEffort'] = int(raw_rpe / 10)
+        if raw_feel: activity['feeling'] = int((raw_feel / 25) + 1)
+    return activity
+
+def row_ids(cell):
+    """The Garmin ids of a Master DB activityId cell ("123" or a bundle "123,456")."""
+    return [x.strip() for x in str(cell).split(',') if x.strip() and x.strip().lower() != 'nan']
+
+def resolve_date_range(start, end, data=None):
     """
-    1. Checks if the activity is already in the JSON file.
-    2. If not, logs into Garmin, performs a Deep Fetch, and appends it to JSON.
+    Collects every activity id between two dates (inclusive) from both
+    the Master DB rows and the local Garmin JSON (streamed, newest first,
+    until the start date unless data is given).
     """
-    print(f"🔎 Looking for Activity {activity_id}...")
-    
-    data = []
-    if os.path.exists(JSON_FILE):
-        with open(JSON_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    
-    # Check if exists in local JSON
-    match = next((x for x in data if str(x.get('activityId')) == str(activity_id)), None)
-    
-    if match:
-        print("   ✅ Found in local JSON cache.")
-        return match
-    
-    # Not found, fetch from Garmin
-    print("   ⚠️ Not found locally. Fetching from Garmin...")
+    ids = []
+    if data is None: data = garmin_store.iter_activities(JSON_FILE, {'activityId': None, 'startTimeLocal': None}, since=start)
+    for g in data:
+        d = str(g.get('startTimeLocal', ''))[:10]
+        if start <= d <= end: ids.append(str(g.get('activityId')))
+
+    if os.path.exists(MASTER_DB):
+        with open(MASTER_DB, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        if len(lines) > 2:
+            header = [h.strip() for h in lines[0].strip().strip('|').split('|')]
+            if 'Date' in header and 'activityId' in header:
+                i_date, i_id = header.index('Date'), header.index('activityId')
+                for line in lines[2:]:
+                    cols = [c.strip() for c in line.strip().strip('|').split('|')]
+                    if max(i_date, i_id) >= len(cols): continue
+                    if start <= cols[i_date][:10] <= end:
+                        ids.extend(row_ids(cols[i_id]))
+
+    # Keep order, drop duplicates
+    return list(dict.fromkeys(i for i in ids if i and i.lower() != 'nan'))
+
+def fetch_activities(activity_ids, data=None):
+    """
+    1. Resolves every id against the local JSON in a single pass.
+    2. Deep-fetches the missing ones concurrently over ONE Garmin session.
+    3. Saves the JSON once.
+    Returns {activity_id: activity}.
+    """
+    wanted = [str(a) for a in activity_ids]
+    print(f"🔎 Looking for {len(wanted)} activities...")
+
+    if data is None: local = find_local(wanted)
+    else: local = {str(x.get('activityId')): x for x in data}
+    found = {aid: local[aid] for aid in wanted if aid in local}
+    missing = [aid for aid in wanted if aid not in local]
+    print(f"   ✅ Found {len(found)} in local JSON cache.")
+
+    if not missing: return found
+
+    print(f"   ⚠️ {len(missing)} not found locally. Fetching from Garmin...")
     email, password = get_credentials()
-    if not email or not password:
+    if not cassette.has_credentials(email, password):
         print("   ❌ Error: Credentials missing. Cannot fetch from Garmin.")
-        return None
-        
+        return found
+
     try:
-        client = Garmin(email, password)
+        client = cassette.garmin(email, password)
         client.login()
-        activity = client.get_activity(activity_id) # Deep fetch by default
-        
-        # Normalize RPE/Feeling from Deep Data immediately
-        if 'summaryDTO' in activity:
-            raw_rpe = activity['summaryDTO'].get('directWorkoutRpe')
-            raw_feel = activity['summaryDTO'].get('directWorkoutFeel')
-            if raw_rpe: activity['perceivedEffort'] = int(raw_rpe / 10)
-            if raw_feel: activity['feeling'] = int((raw_feel / 25) + 1)
-        
-        # Save to JSON
-        data.append(activity)
-        data.sort(key=lambda x: x.get('startTimeLocal', ''), reverse=True)
-        
-        with open(JSON_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4)
-        print("   💾 Fetched from Garmin and saved to JSON.")
-        return activity
-        
     except Exception as e:
-        print(f"   ❌ Garmin Fetch Error: {e}")
-        return None
+        print(f"   ❌ Garmin Login Error: {e}")
+        return found
 
-def update_database_row(activity_id, garmin_data):
+    def deep_fetch(aid):
+        try:
+            return aid, normalize_self_evaluation(client.get_activity(aid))
+        except Exception as e:
+            print(f"   ❌ Garmin Fetch Error ({aid}): {e}")
+            return aid, None
+
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        fetched = {aid: act for aid, act in pool.map(deep_fetch, missing) if act}
+
+    if fetched:
+        # Merged into the store as it is now, not as it was before the (slow) fetch
+        with storage.locked(JSON_FILE):
+            store = {str(x.get('activityId')): x for x in load_local_store()}
+            store.update(fetched)
+            data = sorted(store.values(), key=lambda x: (x.get('startTimeLocal', ''), str(x.get('activityId', ''))), reverse=True)
+            storage.write_json(JSON_FILE, data)
+        print(f"   💾 Fetched {len(fetched)} from Garmin and saved to JSON.")
+
+    found.update(fetched)
+    return found
+
+def fetch_specific_activity(activity_id):
+    return fetch_activities([activity_id]).get(str(activity_id))
+
+def hydrate_columns(cols, col_map, garmin_data):
+    # 1. Update Name & Type
+    g_type = garmin_data.get('activityType', {}).get('typeKey', '').lower()
+    prefix = "[RUN]" if 'run' in g_type else "[BIKE]" if 'cycl' in g_type or 'virt' in g_type else "[SWIM]" if 'swim' in g_type else ""
+    raw_name = garmin_data.get('activityName', 'Activity')
+
+    if prefix and prefix not in raw_name: new_name = f"{prefix} {raw_name}"
+    else: new_name = raw_name
+
+    if 'Actual Workout' in col_map: cols[col_map['Actual Workout']] = new_name
+    if 'activityType' in col_map: cols[col_map['activityType']] = g_type
+    if 'sportTypeId' in col_map: cols[col_map['sportTypeId']] = str(garmin_data.get('sportTypeId', ''))
+
+    # 2. Update Duration
+    if 'Actual Duration' in col_map:
+        try:
+            dur_sec = float(garmin_data.get('duration', 0))
+            cols[col_map['Actual Duration']] = f"{dur_sec/60:.1f}"
+        except: pass
+
+    # 3. Update Metrics
+    for key in COLS_TO_SYNC:
+        if key in col_map and key in garmin_data:
+            val = garmin_data[key]
+            if val is not None:
+                cols[col_map[key]] = str(val)
+
+    # 4. Update RPE/Feeling
+    if 'RPE' in col_map:
+        rpe = garmin_data.get('perceivedEffort')
+        if rpe: cols[col_map['RPE']] = str(rpe)
+
+    if 'Feeling' in col_map:
+        feel = garmin_data.get('feeling')
+        if feel: cols[col_map['Feeling']] = str(feel)
+    return cols
+
+@storage.locked(MASTER_DB)
+def expand_bundles(activity_ids):
+    """Adds the other parts of every bundled row that one of the ids belongs to."""
+    ids = [str(a) for a in activity_ids]
+    wanted = set(ids)
+    lines = (storage.read_text(MASTER_DB) or '').splitlines()
+    if len(lines) < 3: return ids
+    header = [h.strip() for h in lines[0].strip().strip('|').split('|')]
+    if 'activityId' not in header: return ids
+    i_id = header.index('activityId')
+    for line in lines[2:]:
+        cols = [c.strip() for c in line.strip().strip('|').split('|')]
+        parts = row_ids(cols[i_id]) if i_id < len(cols) else []
+        if len(parts) > 1 and wanted & set(parts): ids.extend(parts)
+    return list(dict.fromkeys(ids))
+
+def row_record(parts, targets):
     """
-    Reads the Master DB, finds the row with the matching activityId, 
-    and updates all metrics, name, and duration.
+    The Garmin record to hydrate a row from: the activity itself, or for a
+    bundled row all its parts merged the way sync does (None if a part is missing).
     """
-    print(f"📝 Hydrating Master Database row for ID: {activity_id}...")
-    
+    if len(parts) == 1: return targets.get(parts[0])
+    if not all(p in targets for p in parts): return None
+    from .sync_database import bundle_activities
+    return bundle_activities([targets[p] for p in parts])
+
+def update_database_rows(activities_by_id):
+    """
+    Reads the Master DB once, updates every row whose activityId (or, for a
+    bundled row, every part of it) is in activities_by_id and rewrites the file once.
+    """
+    print(f"📝 Hydrating Master Database rows for {len(activities_by_id)} activities...")
+
     if not os.path.exists(MASTER_DB):
         print("   ❌ Database not found.")
         return
 
-    with open(MASTER_DB, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
+    lines = storage.read_text(MASTER_DB).splitlines(keepends=True)
     if len(lines) < 2: return
-    header = [h.strip() for h in lines[0].strip('|').split('|')]
+    header = [h.strip() for h in lines[0].strip().strip('|').split('|')]
     col_map = {name: i for i, name in enumerate(header)}
-    
-    # Columns to sync
-    cols_to_sync = [
-        'duration', 'distance', 'averageHR', 'maxHR', 
-        'aerobicTrainingEffect', 'anaerobicTrainingEffect', 'trainingEffectLabel',
-        'avgPower', 'maxPower', 'normPower', 'trainingStressScore', 'intensityFactor',
-        'averageSpeed', 'maxSpeed', 'vO2MaxValue', 'calories', 'elevationGain',
-        'averageBikingCadenceInRevPerMinute', 
-        'averageRunningCadenceInStepsPerMinute',
-        'avgStrideLength', 'avgVerticalOscillation', 'avgGroundContactTime'
-    ]
+    targets = {str(k): v for k, v in activities_by_id.items()}
 
     updated_lines = []
-    row_found = False
-    
+    rows_found = set()
+    rows_updated = 0
+
     for line in lines:
         if '|' not in line or '---' in line or 'Status' in line:
             updated_lines.append(line)
             continue
-            
-        cols = [c.strip() for c in line.strip('|').split('|')]
-        
-        current_id = ""
+
+        cols = [c.strip() for c in line.strip().strip('|').split('|')]
+
+        parts = []
         if 'activityId' in col_map and col_map['activityId'] < len(cols):
-            current_id = cols[col_map['activityId']]
-            
-        if current_id == str(activity_id):
-            row_found = True
-            print("   ✅ Found matching row in DB. Updating...")
-            
+            parts = row_ids(cols[col_map['activityId']])
+
+        record = row_record(parts, targets) if any(p in targets for p in parts) else None
+        if record:
+            rows_found.update(parts)
             while len(cols) < len(header):
                 cols.append("")
-
-            # 1. Update Name & Type
-            g_type = garmin_data.get('activityType', {}).get('typeKey', '').lower()
-            prefix = "[RUN]" if 'run' in g_type else "[BIKE]" if 'cycl' in g_type or 'virt' in g_type else "[SWIM]" if 'swim' in g_type else ""
-            raw_name = garmin_data.get('activityName', 'Activity')
-            
-            if prefix and prefix not in raw_name: new_name = f"{prefix} {raw_name}"
-            else: new_name = raw_name
-            
-            if 'Actual Workout' in col_map: cols[col_map['Actual Workout']] = new_name
-            if 'activityType' in col_map: cols[col_map['activityType']] = g_type
-            if 'sportTypeId' in col_map: cols[col_map['sportTypeId']] = str(garmin_data.get('sportTypeId', ''))
-
-            # 2. Update Duration
-            if 'Actual Duration' in col_map:
-                try:
-                    dur_sec = float(garmin_data.get('duration', 0))
-                    cols[col_map['Actual Duration']] = f"{dur_sec/60:.1f}"
-                except: pass
-
-            # 3. Update Metrics
-            for key in cols_to_sync:
-                if key in col_map and key in garmin_data:
-                    val = garmin_data[key]
-                    if val is not None:
-                        cols[col_map[key]] = str(val)
-
-            # 4. Update RPE/Feeling
-            if 'RPE' in col_map:
-                rpe = garmin_data.get('perceivedEffort')
-                if rpe: cols[col_map['RPE']] = str(rpe)
-            
-            if 'Feeling' in col_map:
-                feel = garmin_data.get('feeling')
-                if feel: cols[col_map['Feeling']] = str(feel)
-
-            new_line = "| " + " | ".join(cols) + " |\n"
-            updated_lines.append(new_line)
+            cols = hydrate_columns(cols, col_map, record)
+            rows_updated += 1
+            updated_lines.append("| " + " | ".join(cols) + " |\n")
         else:
+            if parts and any(p in targets for p in parts):
+                # One part's values must never overwrite a whole bundle
+                rows_found.update(p for p in parts if p in targets)
+                missing = [p for p in parts if p not in targets]
+                print(f"   ⚠️ Bundled row {','.join(parts)} left as is: no data for part(s) {', '.join(missing)}.")
             updated_lines.append(line)
 
-    if row_found:
-        with open(MASTER_DB, 'w', encoding='utf-8') as f:
-            f.writelines(updated_lines)
-        print("   ✅ Database updated successfully.")
-    else:
-        print(f"   ❌ Could not find row with activityId {activity_id} in Master DB.")
+    for aid in targets:
+        if aid not in rows_found:
+            print(f"   ❌ Could not find row with activityId {aid} in Master DB.")
+
+    if rows_updated:
+        if storage.write_text(MASTER_DB, "".join(updated_lines)) == 'semantic':
+            print(f"   ✅ Database updated successfully ({rows_updated} rows).")
+        else:
+            print("   ℹ️  Rows already up to date.")
+
+def update_database_row(activity_id, garmin_data):
+    update_database_rows({str(activity_id): garmin_data})
+
+def parse_targets(tokens):
+    """
+    Accepts ids ("123", "123,456", "123 456") and/or a date range
+    ("2026-01-19..2026-01-25"). Returns (ids, (start, end) or None).
+    """
+    ids, date_range = [], None
+    for tok in re.split(r'[\s,]+', " ".join(tokens)):
+        if not tok: continue
+        m = re.fullmatch(r'(\d{4}-\d{2}-\d{2})\.\.(\d{4}-\d{2}-\d{2})', tok)
+        if m: date_range = (m.group(1), m.group(2))
+        elif re.fullmatch(r'\d{4}-\d{2}-\d{2}', tok): date_range = (tok, tok)
+        else: ids.append(tok)
+    return ids, date_range
 
 def main():
-    if len(sys.argv) > 1:
-        act_id = sys.argv[1]
-    else:
+    parser = argparse.ArgumentParser(description="Hydrate Master DB rows from Garmin.")
+    parser.add_argument('targets', nargs='*', help='Activity ids and/or a YYYY-MM-DD..YYYY-MM-DD range')
+    parser.add_argument('--from', dest='date_from', help='Start date (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='date_to', help='End date (YYYY-MM-DD), defaults to today')
+    args = parser.parse_args()
+
+    tokens = args.targets
+    if not tokens and not args.date_from:
         try:
-            act_id = input("Enter Activity ID to Hydrate: ").strip()
+            tokens = [input("Enter Activity ID(s) or date range to Hydrate: ").strip()]
         except:
             print("❌ No input provided.")
             return
 
-    if not act_id:
+    ids, date_range = parse_targets(tokens)
+    if args.date_from:
+        date_range = (args.date_from, args.date_to or datetime.now().strftime('%Y-%m-%d'))
+
+    if date_range:
+        range_ids = resolve_date_range(date_range[0], date_range[1])
+        print(f"📅 {date_range[0]} → {date_range[1]}: {len(range_ids)} activities.")
+        ids = list(dict.fromkeys(ids + range_ids))
+
+    if not ids:
         print("❌ Error: Activity ID is required.")
         return
 
-    data = fetch_specific_activity(act_id)
-    if data:
-        update_database_row(act_id, data)
+    # A bundled row is only hydrated from all of its parts
+    ids = expand_bundles(ids)
+    found = fetch_activities(ids)
+    if found:
+        update_database_rows(found)
+
+    # The web dashboard reads log.json and the day cells instead of the DB, so keep them current
+    if os.path.abspath(MASTER_DB) in storage.semantic_changes():
+        from . import dashboard_data
+        dashboard_data.write_artifacts()
 
 if __name__ == "__main__":
     main()
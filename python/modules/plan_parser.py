@@ -0,0 +1,288 @@
+import os
+import re
+import json
+import hashlib
+from datetime import datetime
+from . import config, storage
+
+# --- HELPERS FOR READING STRUCTURED BITS OUT OF endurance_plan.md ---
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+def read_plan(path=None):
+    path = path or config.PLAN_FILE
+    if not os.path.exists(path): return ""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def clean_cell(cell):
+    return cell.replace('**', '').strip()
+
+def split_row(line):
+    return [clean_cell(c) for c in line.strip().strip('|').split('|')]
+
+def find_table(text, heading_keyword):
+    """
+    Returns (header, rows) for the first markdown table that follows a heading
+    containing heading_keyword (case-insensitive). Empty lists if not found.
+    """
+    found_heading = False
+    table = []
+    for line in text.splitlines():
+        s = line.strip()
+        if not found_heading:
+            if s.startswith('#') and heading_keyword.lower() in s.lower(): found_heading = True
+            continue
+        if s.startswith('#') and table: break
+        if s.startswith('|'): table.append(s)
+        elif table: break
+
+    if not table: return [], []
+    header = [h.lower() for h in split_row(table[0])]
+    rows = [split_row(l) for l in table[1:] if not re.match(r'^\|[\s:\-|]+\|?$', l)]
+    return header, rows
+
+def column_index(header, keyword):
+    for i, h in enumerate(header):
+        if keyword in h: return i
+    return None
+
+def parse_loose_date(text, year=None):
+    """Parses 'June 20, 2026', 'Sept 11', 'Dec 23, 2025' or '2026-01-19'."""
+    text = (text or '').strip()
+    m = re.match(r'(\d{4})-(\d{2})-(\d{2})', text)
+    if m: return datetime(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+
+    m = re.match(r'([A-Za-z]+)\.?\s+(\d{1,2})(?:,\s*(\d{4}))?', text)
+    if not m: return None
+    month = MONTHS.get(m.group(1)[:3].lower())
+    y = int(m.group(3)) if m.group(3) else year
+    if not month or not y: return None
+    try: return datetime(y, month, int(m.group(2)))
+    except ValueError: return None
+
+def season_year(text):
+    m = re.search(r'^#\s.*?(\d{4})', text, re.MULTILINE)
+    return int(m.group(1)) if m else datetime.now().year
+
+# --- SECTIONS ---
+
+def parse_events(text):
+    """Event Schedule table -> [{'date', 'name', 'priority'}] sorted by date."""
+    header, rows = find_table(text, 'event schedule')
+    i_date, i_name, i_prio = column_index(header, 'date'), column_index(header, 'event'), column_index(header, 'priority')
+    if i_date is None: return []
+
+    events = []
+    for row in rows:
+        d = parse_loose_date(row[i_date]) if i_date < len(row) else None
+        if not d: continue
+        name = row[i_name] if i_name is not None and i_name < len(row) else ''
+        prio = row[i_prio] if i_prio is not None and i_prio < len(row) else ''
+        m = re.match(r'([A-C])-', prio.upper())
+        events.append({'date': d, 'name': name, 'priority': m.group(1) if m else prio})
+    return sorted(events, key=lambda e: e['date'])
+
+# Keyword -> short phase name used by the charts
+PHASE_KEYWORDS = [('70.3', '70.3'), ('century', 'Century'), ('peak', 'Peak'), ('build', 'Build'), ('base', 'Base')]
+
+def parse_phases(text, year=None):
+    """Phases table -> [{'name', 'label', 'end'}] in plan order. 'Now – Feb 28' has no start."""
+    year = year or season_year(text)
+    header, rows = find_table(text, 'phases')
+    i_phase, i_dates = column_index(header, 'phase'), column_index(header, 'date')
+    if i_phase is None or i_dates is None: return []
+
+    phases = []
+    for row in rows:
+        if max(i_phase, i_dates) >= len(row): continue
+        label = re.sub(r'^\d+\.\s*', '', row[i_phase])
+        name = next((short for key, short in PHASE_KEYWORDS if key in label.lower()), label)
+        parts = re.split(r'\s*[–—-]\s*', row[i_dates])
+        end = parse_loose_date(parts[-1], year)
+        if end: phases.append({'name': name, 'label': label, 'end': end})
+    return phases
+
+def parse_zones(text, heading_keyword):
+    """
+    Bullet list under a heading such as 'Cycling Power Zones' ->
+    [{'name', 'low', 'high'}] ('< 133W' has low 0, '> 182 bpm' has no high).
+    """
+    zones, in_section = [], False
+    for line in text.splitlines():
+        s = line.strip()
+        if s.startswith('#'):
+            if in_section: break
+            in_section = heading_keyword.lower() in s.lower()
+            continue
+        if not in_section: continue
+
+        m = re.match(r'^[*-]\s+\*\*(.+?)\*\*:?\s*(.*)$', s)
+        if not m: continue
+        name = m.group(1).strip().rstrip(':').strip()
+        value = m.group(2)
+        nums = [int(n) for n in re.findall(r'\d+', value)]
+        if not nums: continue
+        if value.strip().startswith('<'): low, high = 0, nums[0]
+        elif value.strip().startswith('>'): low, high = nums[0], None
+        else: low, high = nums[0], nums[1] if len(nums) > 1 else None
+        zones.append({'name': name, 'low': low, 'high': high})
+    return zones
+
+def parse_power_zones(text):
+    return parse_zones(text, 'power zones')
+
+def parse_hr_zones(text):
+    return parse_zones(text, 'heart rate zones')
+
+def zone_basis(text, heading_keyword):
+    """The threshold a zone list was built from, e.g. 241 for '(Based on 241W FTP)'."""
+    for line in text.splitlines():
+        s = line.strip()
+        if s.startswith('#') and heading_keyword.lower() in s.lower():
+            m = re.search(r'based on\s*(\d+)', s, re.IGNORECASE)
+            return int(m.group(1)) if m else None
+    return None
+
+def parse_sections(text):
+    """Top-level ('#' / '##') sections -> {heading: body}; '###' subsections stay inside their parent."""
+    sections, title, body = {}, None, []
+    for line in text.split('\n'):
+        s = line.strip()
+        if s.startswith('#') and not s.startswith('###'):
+            if title is not None: sections[title] = '\n'.join(body).strip()
+            title, body = s.lstrip('#').strip(), []
+        elif title is not None:
+            body.append(line)
+    if title is not None: sections[title] = '\n'.join(body).strip()
+    return sections
+
+def section(sections, keyword):
+    return next((body for title, body in sections.items() if keyword.lower() in title.lower()), '')
+
+def parse_biometrics(sections):
+    """Same fields and patterns as the dashboard's Parser.getBiometrics()."""
+    text = section(sections, 'profile') or section(sections, 'biometrics')
+    def find(pattern, cast=int):
+        m = re.search(pattern, text, re.IGNORECASE)
+        return cast(m.group(1)) if m else None
+    return {
+        'watts': find(r'Cycling FTP[^0-9]*(\d{1,3})') or 0,
+        'weight': find(r'Weight[^0-9]*(\d{1,3})') or 0,
+        'lthr': find(r'Lactate Threshold HR[^0-9]*(\d{2,3})') or 0,
+        'runFtp': find(r'Functional Threshold Pace.*?(\d{1,2}:\d{2})', str) or '--',
+        'fiveK': find(r'5K Prediction.*?(\d{1,2}:\d{2})', str) or '--'
+    }
+
+def parse_ftp(text):
+    m = re.search(r"Cycling FTP[:\*]*\s*(\d+)", text or '', re.IGNORECASE)
+    return int(m.group(1)) if m else None
+
+def parse_history(text, heading_keyword):
+    """'Historical FTP Log' style tables -> [{'date', 'value', 'row'}], newest first as written."""
+    header, rows = find_table(text, heading_keyword)
+    i_date = column_index(header, 'date')
+    if i_date is None: return []
+    history = []
+    for row in rows:
+        d = parse_loose_date(row[i_date]) if i_date < len(row) else None
+        value = re.search(r'\d+', row[i_date + 1]) if i_date + 1 < len(row) else None
+        if not d or not value: continue
+        history.append({'date': d.strftime('%Y-%m-%d'), 'value': int(value.group(0)),
+                        'row': dict(zip(header, row))})
+    return history
+
+def parse_schedule(text):
+    """
+    Weekly Schedule table with raw (unstripped-markdown) cells and the line
+    number of every row, so writers can rewrite rows in place.
+    """
+    lines = text.split('\n')
+    found_heading, table = False, []
+    for i, line in enumerate(lines):
+        s = line.strip()
+        if not found_heading:
+            if s.startswith('#') and 'weekly schedule' in s.lower(): found_heading = True
+            continue
+        if (s.startswith('# ') or s.startswith('## ')) and len(table) > 2: break
+        if '|' in s: table.append((i, s))
+    if not table: return {'header': [], 'header_line': None, 'rows': []}
+
+    header_line, header_text = table[0]
+    header = [clean_cell(h).lower() for h in header_text.strip('|').split('|')]
+    rows = [{'line': i, 'cells': [c.strip() for c in s.strip('|').split('|')]}
+            for i, s in table[1:] if '---' not in s]
+    return {'header': header, 'header_line': header_line, 'rows': rows}
+
+# --- PLAN MODEL ---
+# Everything above, parsed once per version of the plan. Cached in memory
+# (file mtime/size) and on disk in data/plan_model.json (content hash), which
+# the dashboard also reads when the hash matches the plan it fetched.
+MODEL_VERSION = 1
+_model = None
+_model_stat = None
+
+def _iso(d):
+    return d.strftime('%Y-%m-%d') if d else None
+
+def build_model(text):
+    sections = parse_sections(text)
+    year = season_year(text)
+    return {
+        'version': MODEL_VERSION,
+        'source_hash': hashlib.sha256(text.encode('utf-8')).hexdigest(),
+        'season_year': year,
+        'sections': sections,
+        'events': [dict(e, date=_iso(e['date'])) for e in parse_events(text)],
+        'phases': [dict(p, end=_iso(p['end'])) for p in parse_phases(text, year)],
+        'zones': {
+            'power': parse_power_zones(text), 'power_basis': zone_basis(text, 'power zones'),
+            'hr': parse_hr_zones(text), 'hr_basis': zone_basis(text, 'heart rate zones')
+        },
+        'biometrics': parse_biometrics(sections),
+        'ftp': parse_ftp(text),
+        'history': {'ftp': parse_history(text, 'historical ftp log'),
+                    'lthr': parse_history(text, 'historical lthr log')},
+        'schedule': parse_schedule(text)
+    }
+
+def _read_cached(path, digest):
+    if not os.path.exists(path): return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except ValueError:
+        return None
+    if cached.get('version') == MODEL_VERSION and cached.get('source_hash') == digest: return cached
+    return None
+
+def load_model(path=None, cache_path=None):
+    """The parsed plan; only re-parsed when endurance_plan.md really changed."""
+    global _model, _model_stat
+    path = path or config.PLAN_FILE
+    # Only the real plan is published; another file (tests, --plan) is just cached in memory
+    if cache_path is None and os.path.abspath(path) == os.path.abspath(config.PLAN_FILE): cache_path = config.PLAN_MODEL_JSON
+    if not os.path.exists(path): return build_model('')
+
+    st = os.stat(path)
+    stat_key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    if _model is not None and _model_stat == stat_key: return _model
+
+    text = read_plan(path)
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    if _model is None or _model['source_hash'] != digest:
+        _model = _read_cached(cache_path, digest) if cache_path else None
+        if _model is None:
+            _model = build_model(text)
+            if cache_path:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                storage.write_json(cache_path, _model)
+    _model_stat = stat_key
+    return _model
+
+def reset_cache():
+    global _model, _model_stat
+    _model, _model_stat = None, None
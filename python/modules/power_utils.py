@@ -0,0 +1,38 @@
+import numpy as np
+
+# --- VECTORIZED POWER / LOAD MATH (1 Hz series) ---
+NP_WINDOW = 30
+
+def rolling_mean(values, window):
+    """Trailing rolling mean via cumulative sums. Returns len(values) - window + 1 points."""
+    values = np.asarray(values, dtype=float)
+    if len(values) < window: return np.array([])
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    return (csum[window:] - csum[:-window]) / window
+
+def normalized_power(watts):
+    """30s rolling mean -> 4th power -> mean -> 4th root. Falls back to the plain mean for short series."""
+    watts = np.nan_to_num(np.asarray(watts, dtype=float))
+    if len(watts) == 0: return 0.0
+    rolled = rolling_mean(watts, NP_WINDOW)
+    if len(rolled) == 0: return float(watts.mean())
+    return float(np.mean(rolled ** 4) ** 0.25)
+
+def training_load(np_watts, duration_sec, ftp):
+    """Returns (IF, TSS)."""
+    if not ftp or ftp <= 0 or not duration_sec: return 0.0, 0.0
+    intensity = np_watts / ftp
+    tss = (duration_sec * np_watts * intensity) / (ftp * 3600) * 100
+    return intensity, tss
+
+def zone_seconds(values, lower_bounds):
+    """
+    Seconds spent in each zone. lower_bounds are the ascending lower edges of
+    the zones (first one is usually 0); anything above the last edge lands in
+    the top zone. NaNs are ignored.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(lower_bounds) == 0: return np.zeros(0, dtype=int)
+    idx = np.clip(np.digitize(values, lower_bounds[1:]), 0, len(lower_bounds) - 1)
+    return np.bincount(idx, minlength=len(lower_bounds))
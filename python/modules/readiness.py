@@ -0,0 +1,187 @@
+import os
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+from . import config, storage
+
+# --- READINESS BASELINES ---
+# garmin_data/garmin_health.md -> data/dashboard/readiness.json
+# Every metric is judged against its own history: rolling 7 and 28 day mean / std
+# of the days BEFORE each date (calendar days, so gaps don't stretch a window),
+# and z = (value - mean28) / std28, flipped where lower is better.
+#   score = 50 + SCORE_SCALE * mean clipped z over the metrics that have a baseline
+# Incremental: each day's inputs are fingerprinted; only the days from the first
+# changed one onwards are recomputed, with BASELINE_DAYS of history in front.
+
+METRICS = {
+    # health column: artifact key, which direction is good
+    'Resting HR':    {'key': 'resting_hr', 'good': 'down'},
+    'HRV':           {'key': 'hrv', 'good': 'up'},
+    'Sleep Hours':   {'key': 'sleep', 'good': 'up'},
+    'Sleep Score':   {'key': 'sleep_score', 'good': 'up'},
+    'Stress Avg':    {'key': 'stress', 'good': 'down'},
+    'Body Batt Max': {'key': 'body_battery', 'good': 'up'},
+}
+WINDOWS = [7, 28]
+BASELINE_DAYS = 28
+MIN_BASELINE_DAYS = 5      # Days of history before a metric gets a z-score
+Z_CLIP = 3.0               # One wild reading can't swing the score by more than this
+SCORE_SCALE = 15
+BANDS = [(60, 'Ready'), (40, 'Normal'), (0, 'Recover')]
+ALERT_Z = -1.5             # Metrics this far on the bad side of their baseline make the briefing
+PARAMS = {'windows': WINDOWS, 'min_days': MIN_BASELINE_DAYS, 'z_clip': Z_CLIP, 'scale': SCORE_SCALE,
+          'metrics': {col: m['good'] for col, m in METRICS.items()}}
+
+# --- HEALTH STORE ---
+def _cell(text):
+    try: return float(text)
+    except ValueError: return np.nan
+
+def load_health(path=None):
+    """garmin_health.md -> DataFrame indexed by date (ascending), one float column per metric."""
+    path = path or config.HEALTH_MD
+    if not os.path.exists(path): return pd.DataFrame()
+    rows = [l.strip().strip('|').split('|') for l in storage.read_text(path).splitlines() if l.strip().startswith('|')]
+    if len(rows) < 3: return pd.DataFrame()
+    header = [h.strip() for h in rows[0]]
+    records = [dict(zip(header, (c.strip() for c in r))) for r in rows[2:]]
+    df = pd.DataFrame(records, columns=header)
+    df = df[df['Date'].str.match(r'^\d{4}-\d{2}-\d{2}$')]
+    values = df.drop(columns='Date').apply(lambda col: col.map(_cell)).astype(float)
+    values.index = pd.to_datetime(df['Date'])
+    return values[~values.index.duplicated(keep='first')].sort_index()
+
+def fingerprints(health):
+    """{date: hash} of each day's metric inputs."""
+    cols = [c for c in METRICS if c in health.columns]
+    if health.empty or not cols: return {}
+    text = health[cols].round(4).astype(object).fillna('').astype(str).agg('|'.join, axis=1)
+    return {d.strftime('%Y-%m-%d'): hashlib.md5(v.encode('utf-8')).hexdigest()[:12] for d, v in text.items()}
+
+# --- ENGINE ---
+def label(score):
+    if score is None: return None
+    return next(name for floor, name in BANDS if score >= floor)
+
+def baselines(health):
+    """Rolling baselines, z-scores and the daily score for every date in `health`."""
+    cols = [c for c in METRICS if c in health.columns]
+    days = health[cols].asfreq('D')
+    prior = days.shift(1)
+    stats = {'value': days}
+    for w in WINDOWS:
+        rolling = prior.rolling(w, min_periods=min(MIN_BASELINE_DAYS, w))
+        stats[f'mean{w}'], stats[f'std{w}'] = rolling.mean(), rolling.std()
+    sign = pd.Series([1 if METRICS[c]['good'] == 'up' else -1 for c in cols], index=cols)
+    spread = stats[f'std{BASELINE_DAYS}']
+    stats['z'] = (days - stats[f'mean{BASELINE_DAYS}']) / spread.where(spread > 0) * sign
+    score = (50 + SCORE_SCALE * stats['z'].clip(-Z_CLIP, Z_CLIP).mean(axis=1)).clip(0, 100)
+    keep = days.index.isin(health.index)
+    return {k: v[keep] for k, v in stats.items()}, score[keep]
+
+def _num(val, digits=2):
+    return None if pd.isna(val) else round(float(val), digits)
+
+def day_records(stats, score):
+    out = {}
+    for i, date in enumerate(score.index):
+        metrics = {}
+        for col in stats['value'].columns:
+            rec = {name: _num(frame[col].iloc[i]) for name, frame in stats.items()}
+            rec = {name: v for name, v in rec.items() if v is not None}
+            if rec: metrics[METRICS[col]['key']] = rec
+        s = None if pd.isna(score.iloc[i]) else int(round(score.iloc[i]))
+        out[date.strftime('%Y-%m-%d')] = {'score': s, 'label': label(s), 'metrics': metrics}
+    return out
+
+def _latest(days):
+    scored = [d for d in sorted(days) if days[d]['score'] is not None]
+    if not scored: return None
+    week = [days[d]['score'] for d in scored[-7:]]
+    return {'date': scored[-1], 'score': days[scored[-1]]['score'], 'label': days[scored[-1]]['label'],
+            'avg7': int(round(sum(week) / len(week)))}
+
+def load_readiness(path=None):
+    path = path or config.READINESS_JSON
+    if not os.path.exists(path): return None
+    try:
+        data = storage.read_json(path)
+    except ValueError:
+        return None
+    # Different windows / metrics invalidate every stored day
+    return data if data.get('params') == PARAMS else None
+
+def update_readiness(health=None, path=None, rebuild=False):
+    """Recomputes the days whose inputs (or whose windows' inputs) changed and writes the artifact."""
+    path = path or config.READINESS_JSON
+    with storage.locked(path):
+        return _update_readiness(health, path, rebuild)
+
+def _update_readiness(health, path, rebuild):
+    health = load_health() if health is None else health
+    if health.empty:
+        print("⚠️ READINESS: No health data.")
+        return None
+
+    prints = fingerprints(health)
+    data = None if rebuild else load_readiness(path)
+    if data is None:
+        print(f"🫀 READINESS: Building baselines for {len(prints)} days...")
+        start, days = None, {}
+    else:
+        old = data.get('fingerprints', {})
+        changed = sorted(d for d in set(prints) | set(old) if prints.get(d) != old.get(d))
+        if not changed:
+            print("🫀 READINESS: Health data unchanged.")
+            return data
+        # A day only looks backwards, so everything before the first change still stands
+        start = changed[0]
+        days = {d: v for d, v in data.get('days', {}).items() if d < start and d in prints}
+        print(f"🫀 READINESS: Refreshing {sum(1 for d in prints if d >= start)} days from {start}...")
+
+    window = health if start is None else health[health.index >= pd.Timestamp(start) - pd.Timedelta(days=BASELINE_DAYS)]
+    fresh = day_records(*baselines(window))
+    days.update({d: v for d, v in fresh.items() if start is None or d >= start})
+
+    data = {'params': PARAMS, 'metrics': {m['key']: {'column': col, 'good': m['good']} for col, m in METRICS.items()},
+            'latest': _latest(days), 'days': dict(sorted(days.items())), 'fingerprints': prints}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    storage.write_json(path, data)
+    latest = data['latest']
+    if latest: print(f"   Latest {latest['date']}: {latest['score']}/100 ({latest['label']}), 7-day avg {latest['avg7']}.")
+    return data
+
+# --- BRIEFING ---
+def briefing_section(data):
+    """Markdown for COACH_BRIEFING.md and the alerts for its alert list."""
+    lines, alerts = ["## 3. Readiness"], []
+    latest = (data or {}).get('latest')
+    if not latest:
+        lines.append("- Not enough health history for a baseline yet.")
+        return "\n".join(lines) + "\n", alerts
+
+    day = data['days'][latest['date']]
+    lines.append(f"**{latest['date']}:** {latest['score']}/100 ({latest['label']}) | 7-day avg {latest['avg7']}\n")
+    lines.append("| Metric | Today | 7d Avg | 28d Baseline | z |")
+    lines.append("| :--- | :--- | :--- | :--- | :--- |")
+    fmt = lambda v: '--' if v is None else f"{v:g}"
+    for col, m in METRICS.items():
+        rec = day['metrics'].get(m['key'])
+        if not rec: continue
+        z = rec.get('z')
+        z_txt = '--' if z is None else f"{z:+.2f}"
+        lines.append(f"| **{col}** | {fmt(rec.get('value'))} | {fmt(rec.get('mean7'))} | "
+                     f"{fmt(rec.get('mean28'))} ± {fmt(rec.get('std28'))} | {z_txt} |")
+        if z is not None and z <= ALERT_Z:
+            alerts.append(f"**{col}** is {abs(z):.1f} SD {'above' if m['good'] == 'down' else 'below'} its 28-day baseline ({fmt(rec.get('value'))} vs {fmt(rec.get('mean28'))}).")
+    return "\n".join(lines) + "\n", alerts
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the readiness baselines from garmin_health.md.")
+    parser.add_argument('--rebuild', action='store_true', help='Recompute every day instead of only changed ones')
+    args = parser.parse_args()
+    update_readiness(rebuild=args.rebuild)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import os
+import re
+import json
+import hashlib
+import pandas as pd
+from . import config, storage, schema, sports
+
+# --- CALENDAR ROLLUP CUBE ---
+# level (day / week / month) -> period key -> sport -> kind -> [metrics]
+#   kind:    'actual' (Garmin), 'planned' (plan rows), 'projected' (week level only)
+#   metrics: METRICS below, in that order, to keep the artifact compact
+METRICS = ['duration_min', 'distance_m', 'tss', 'count']
+LEVELS = ['day', 'week', 'month']
+
+# Columns whose change can move a rollup cell
+FINGERPRINT_COLS = ['Date', 'Status', 'Planned Workout', 'Planned Duration', 'Actual Workout',
+                    'activityType', 'duration', 'distance', 'trainingStressScore']
+
+def week_key(date_str):
+    y, w, _ = pd.Timestamp(date_str).isocalendar()
+    return f"{y}-W{w:02d}"
+
+def month_key(date_str):
+    return date_str[:7]
+
+def parse_planned_minutes(text):
+    """'45 mins' -> 45, '2.0 Hours' -> 120, '60' -> 60, '-' -> 0"""
+    t = str(text).strip().lower()
+    m = re.search(r'(\d+(?:\.\d+)?)', t)
+    if not m: return 0.0
+    val = float(m.group(1))
+    return val * 60 if 'hour' in t or re.search(r'\d\s*h\b', t) else val
+
+def _norm_dates(df):
+    return pd.to_datetime(df['Date'], errors='coerce').dt.strftime('%Y-%m-%d')
+
+def date_fingerprints(df):
+    """
+    {date: hash} of the rows on each date, used by sync() to find changed dates.
+    Values are hashed as the DB would write them (stripped), so 150 vs 150.0
+    or stray whitespace don't count as a change.
+    """
+    if df.empty: return {}
+    cols = [c for c in FINGERPRINT_COLS if c in df.columns]
+    text = pd.DataFrame({c: schema.format_column(df[c], schema.kind(c)).str.strip() for c in cols}, index=df.index)
+    keyed = text.assign(_date=_norm_dates(df)).dropna(subset=['_date'])
+    joined = keyed[cols].agg('|'.join, axis=1)
+    groups = joined.groupby(keyed['_date']).agg(lambda s: '\n'.join(sorted(s)))
+    return {d: hashlib.md5(v.encode('utf-8')).hexdigest() for d, v in groups.items()}
+
+def changed_dates(before, after):
+    return {d for d in set(before) | set(after) if before.get(d) != after.get(d)}
+
+def _records(df):
+    """Master DB rows -> one planned and/or one actual record per row."""
+    if df.empty: return pd.DataFrame(columns=['date', 'sport', 'kind'] + METRICS)
+
+    dates = _norm_dates(df)
+    num = lambda c: pd.to_numeric(df[c], errors='coerce').fillna(0) if c in df.columns else 0
+
+    planned_txt = df['Planned Workout'].fillna('').astype(str).str.strip()
+    is_planned = (planned_txt != '') & (planned_txt.str.lower() != 'nan')
+    planned = pd.DataFrame({
+        'date': dates, 'kind': 'planned',
+        'sport': planned_txt.map(sports.detect_sport),
+        'duration_min': df['Planned Duration'].map(parse_planned_minutes),
+        'distance_m': 0.0, 'tss': 0.0, 'count': 1
+    })[is_planned]
+
+    duration_sec = num('duration')
+    actual_min = pd.to_numeric(df['Actual Duration'], errors='coerce')
+    is_actual = (df['Status'].astype(str).str.upper() == 'COMPLETED') & ((duration_sec > 0) | (actual_min > 0))
+    actual = pd.DataFrame({
+        'date': dates, 'kind': 'actual',
+        'sport': [sports.actual_sport(t, n) for t, n in zip(df['activityType'], df['Actual Workout'])],
+        'duration_min': (duration_sec / 60).where(duration_sec > 0, actual_min.fillna(0)),
+        'distance_m': num('distance'), 'tss': num('trainingStressScore'), 'count': 1
+    })[is_actual]
+
+    return pd.concat([planned, actual], ignore_index=True).dropna(subset=['date'])
+
+def _cells(records):
+    """records -> {date: {sport: {kind: [metrics]}}}"""
+    out = {}
+    if records.empty: return out
+    grouped = records.groupby(['date', 'sport', 'kind'])[METRICS].sum()
+    for (date, sport, kind), vals in grouped.iterrows():
+        out.setdefault(date, {}).setdefault(sport, {})[kind] = [
+            round(float(vals['duration_min']), 1), round(float(vals['distance_m'])),
+            round(float(vals['tss']), 1), int(vals['count'])
+        ]
+    return out
+
+def _sum_cells(cells):
+    """Sums a list of {sport: {kind: [metrics]}} cells."""
+    total = {}
+    for cell in cells:
+        for sport, kinds in cell.items():
+            for kind, vals in kinds.items():
+                cur = total.setdefault(sport, {}).setdefault(kind, [0] * len(METRICS))
+                total[sport][kind] = [a + b for a, b in zip(cur, vals)]
+    for sport in total:
+        for kind, vals in total[sport].items():
+            total[sport][kind] = [round(vals[0], 1), round(vals[1]), round(vals[2], 1), int(vals[3])]
+    return total
+
+def _attach_projection(cube):
+    """Adds the projection's weekly hours as 'projected' minutes at the week level."""
+    path = os.path.join(config.ROOT_DIR, 'projected_volume_2026.json')
+    if not os.path.exists(path): return
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            weeks = json.load(f).get('weeks', [])
+    except (ValueError, AttributeError):
+        return
+
+    for k, wk in list(cube['week'].items()):
+        for sport, kinds in list(wk.items()):
+            kinds.pop('projected', None)
+            if not kinds: del wk[sport]
+        if not wk: del cube['week'][k]
+    for w in weeks:
+        period = cube['week'].setdefault(week_key(w['date']), {})
+        for sport, col in [('SWIM', 'swim'), ('BIKE', 'bike'), ('RUN', 'run')]:
+            period.setdefault(sport, {})['projected'] = [round(w.get(col, 0) * 60, 1), 0, 0.0, 0]
+
+def load_rollups(path=None):
+    path = path or config.ROLLUPS_JSON
+    if not os.path.exists(path): return None
+    try:
+        cube = storage.read_json(path)
+    except ValueError:
+        return None
+    if cube.get('metrics') != METRICS or any(level not in cube for level in LEVELS): return None
+    return cube
+
+def _resum(cube, level, key_func, periods=None):
+    """Rebuilds week/month cells from the day cells (only `periods` if given)."""
+    days_by_period = {}
+    for d, cell in cube['day'].items():
+        k = key_func(d)
+        if periods is None or k in periods: days_by_period.setdefault(k, []).append(cell)
+    if periods is None:
+        cube[level] = {}
+        periods = set(days_by_period)
+    for k in periods:
+        if k in days_by_period: cube[level][k] = _sum_cells(days_by_period[k])
+        else: cube[level].pop(k, None)
+
+def build_rollups(df_master):
+    cube = {'metrics': METRICS, 'day': _cells(_records(df_master)), 'week': {}, 'month': {}}
+    _resum(cube, 'week', week_key)
+    _resum(cube, 'month', month_key)
+    return cube
+
+def update_rollups(df_master, dates=None, path=None):
+    """
+    Refreshes the cube for the given dates only (all dates when the artifact is
+    missing or dates is None) and writes it out. Returns the cube.
+    """
+    path = path or config.ROLLUPS_JSON
+    cube = load_rollups(path) if dates is not None else None
+
+    if cube is None:
+        print("📦 ROLLUPS: Building calendar cube from scratch...")
+        cube = build_rollups(df_master)
+    elif dates:
+        print(f"📦 ROLLUPS: Refreshing {len(dates)} changed dates...")
+        row_dates = _norm_dates(df_master)
+        fresh = _cells(_records(df_master[row_dates.isin(dates)]))
+        for d in dates:
+            if d in fresh: cube['day'][d] = fresh[d]
+            else: cube['day'].pop(d, None)
+
+        # Re-sum only the weeks / months that hold a changed day
+        _resum(cube, 'week', week_key, {week_key(d) for d in dates})
+        _resum(cube, 'month', month_key, {month_key(d) for d in dates})
+    else:
+        print("📦 ROLLUPS: No changed dates.")
+
+    _attach_projection(cube)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    storage.write_json(path, cube)
+    return cube
@@ -0,0 +1,151 @@
+import ast
+import re
+import numpy as np
+import pandas as pd
+from . import config, storage, sports
+
+# --- TYPED MASTER DB ---
+# The markdown table is read as text and coerced ONCE, in load_master_db(), to
+# the kinds declared in config.MASTER_SCHEMA:
+#   'float' -> Float64, 'int' -> Int64 (blanks are pd.NA)
+#   'date'  -> datetime64 (blanks are NaT)
+#   'category' / 'text' -> values as-is ('' / NaN for blanks)
+# save_master_db() formats back through format_frame(): numbers with repr(),
+# dates as YYYY-MM-DD, so a load -> save round trip doesn't change the file.
+
+DTYPES = {'float': 'Float64', 'int': 'Int64'}
+
+def kind(col):
+    return config.MASTER_SCHEMA.get(col, 'text')
+
+def is_blank(val, zero=False):
+    """Missing value. zero=True also counts 0 as missing, for the metrics Garmin writes 0 into when it didn't score them."""
+    if val is None or val is pd.NA or val is pd.NaT: return True
+    if isinstance(val, float) and np.isnan(val): return True
+    text = str(val).strip().lower()
+    if text in ('', 'nan', 'none', '<na>'): return True
+    if not zero: return False
+    try: return float(text) == 0
+    except ValueError: return False
+
+def _number(val):
+    if is_blank(val): return pd.NA
+    try: return float(val)
+    except (TypeError, ValueError): return pd.NA
+
+def parse_value(col, val):
+    """One raw value (Garmin JSON, markdown text) -> the column's type."""
+    k = kind(col)
+    if k in DTYPES:
+        num = _number(val)
+        return int(num) if k == 'int' and num is not pd.NA else num
+    if k == 'date':
+        return pd.to_datetime(val, errors='coerce') if not is_blank(val) else pd.NaT
+    if k == 'category':
+        return np.nan if is_blank(val) else str(val).strip()
+    return '' if is_blank(val) else str(val)
+
+def set_value(df, idx, col, val):
+    """df.at[idx, col] = val, parsed to the column's type (new categories are added on the fly)."""
+    val = parse_value(col, val)
+    if kind(col) == 'category' and not is_blank(val) and val not in df[col].cat.categories:
+        df[col] = df[col].cat.add_categories([val])
+    df.at[idx, col] = val
+
+# --- MIGRATION ---
+# Old syncs stored Garmin's whole activityType dict in a cell. Only the cells that
+# still start with '{' are parsed; the repaired values are written on the next
+# save, so after one sync (or `python -m modules.schema`) there is nothing left to fix.
+def _type_key(val):
+    try: return ast.literal_eval(val).get('typeKey', '')
+    except (ValueError, SyntaxError, AttributeError):
+        match = re.search(r"'typeKey':\s*'([^']+)'", val)
+        return match.group(1) if match else val
+
+def _sport_type_id(val):
+    ids = config.SPORT_IDS.get(sports.actual_sport(_type_key(val), ''))
+    return str(ids[0]) if ids else ''
+
+REPAIRS = {'activityType': _type_key, 'sportTypeId': _sport_type_id}
+
+def migrate(df):
+    repaired = 0
+    for col, fix in REPAIRS.items():
+        if col not in df.columns or isinstance(df[col].dtype, pd.CategoricalDtype) or str(df[col].dtype) in DTYPES.values(): continue
+        text = df[col].fillna('').astype(str).str.strip()
+        mask = text.str.startswith('{')
+        if mask.any():
+            df.loc[mask, col] = text[mask].map(fix)
+            repaired += int(mask.sum())
+    if repaired: print(f"🩹 SCHEMA: Repaired {repaired} dict-shaped activityType / sportTypeId values.")
+    return df
+
+# --- COERCION ---
+def coerce_column(series, k):
+    if k in DTYPES:
+        if str(series.dtype) == DTYPES[k]: return series
+        # float() per cell: pd.to_numeric's fast parser can be off in the last digit
+        num = series.map(_number).astype('Float64')
+        bad = int((num.isna() & ~series.map(is_blank)).sum())
+        if bad: print(f"⚠️ SCHEMA: {bad} non-numeric value(s) in '{series.name}' dropped.")
+        if k == 'int': num = num.round()
+        return num.astype(DTYPES[k])
+    if k == 'date':
+        if pd.api.types.is_datetime64_any_dtype(series): return series
+        return pd.to_datetime(series.map(lambda v: None if is_blank(v) else v), errors='coerce')
+    if k == 'category':
+        if isinstance(series.dtype, pd.CategoricalDtype): return series
+        return series.map(lambda v: np.nan if is_blank(v) else str(v).strip()).astype('category')
+    return series.map(lambda v: '' if is_blank(v) else str(v)).astype(object)
+
+def coerce(df):
+    """Adds any missing MASTER_COLUMNS, repairs old values and casts every column to its declared type."""
+    df = migrate(df.copy())
+    for col in config.MASTER_COLUMNS:
+        if col not in df.columns: df[col] = ''
+        df[col] = coerce_column(df[col], kind(col))
+    return df
+
+def append_rows(df, rows):
+    """Appends raw row dicts (Garmin / plan values) and re-types the result."""
+    if not rows: return df
+    new = coerce(pd.DataFrame(rows))
+    for col in config.MASTER_COLUMNS:
+        # Union the categories first so concat keeps the column categorical
+        if kind(col) == 'category':
+            cats = df[col].cat.categories.union(new[col].cat.categories)
+            df[col], new[col] = df[col].cat.set_categories(cats), new[col].cat.set_categories(cats)
+    return coerce(pd.concat([df, new], ignore_index=True))
+
+# --- FORMATTING ---
+def format_column(series, k):
+    if k in DTYPES:
+        cast = int if k == 'int' else float
+        return series.map(lambda v: '' if is_blank(v) else repr(cast(v)))
+    if k == 'date':
+        return pd.to_datetime(series, errors='coerce').dt.strftime('%Y-%m-%d').fillna('')
+    return series.map(lambda v: '' if is_blank(v) else str(v))
+
+def format_value(col, val):
+    """The text a single typed value is written as."""
+    return format_column(pd.Series([val], dtype=object), kind(col)).iloc[0]
+
+def format_frame(df):
+    """Every MASTER_COLUMNS column as markdown-safe text."""
+    out = pd.DataFrame(index=df.index)
+    for col in config.MASTER_COLUMNS:
+        if col not in df.columns:
+            out[col] = ''
+            continue
+        text = format_column(df[col], kind(col))
+        out[col] = text.str.replace('\n', ' ').str.replace('\r', '').str.replace('|', '/', regex=False)
+    return out
+
+def main():
+    """One-off migration: rewrites the Master DB with repaired and normalized values."""
+    from . import sync_database
+    with storage.locked(config.MASTER_DB):
+        sync_database.save_master_db(sync_database.load_master_db())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+# --- SPORT DETECTION ---
+# The RUN / BIKE / SWIM / OTHER rules every module classifies rows with. This
+# module imports nothing from the package, so rollups, schema, stream_metrics,
+# activity_links and sync_database can all use it without an import cycle.
+
+def detect_sport(text):
+    """Sport from a workout name: the [RUN]/[BIKE]/[SWIM] tag, else keywords."""
+    t = text.upper()
+    if '[RUN]' in t or 'RUN' in t or 'JOG' in t: return 'RUN'
+    if '[BIKE]' in t or 'BIKE' in t or 'CYCLE' in t or 'RIDE' in t or 'ZWIFT' in t: return 'BIKE'
+    if '[SWIM]' in t or 'SWIM' in t or 'POOL' in t: return 'SWIM'
+    return 'OTHER'
+
+def type_sport(type_key):
+    """Sport from a Garmin activityType typeKey ('running', 'virtual_ride', 'lap_swimming', ...)."""
+    t = str(type_key).lower()
+    if 'run' in t: return 'RUN'
+    if 'cycl' in t or 'bik' in t or 'virtual' in t or 'ride' in t: return 'BIKE'
+    if 'swim' in t: return 'SWIM'
+    return 'OTHER'
+
+def actual_sport(type_key, name):
+    """Sport of a recorded activity: its typeKey, or the name when the key doesn't say."""
+    sport = type_sport(type_key)
+    return sport if sport != 'OTHER' else detect_sport(str(name))
@@ -0,0 +1,236 @@
+import json
+import os
+import re
+import time
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# --- SAFE WRITES ---
+# Several stages (hourly sync, manual hydration, the Strava workflows) read-modify-write
+# the same files, so every write goes through three guards:
+#   atomic_open()  the new content goes to a temp file next to the target, is fsynced
+#                  and renamed over it: readers see the old or the new file, never half
+#   locked()       advisory lock (flock on a file in the temp dir) around a whole
+#                  read-modify-write; re-entrant, so writers inside it don't deadlock
+#   VERSIONS       read_text() / read_json() remember the version (inode, mtime, size)
+#                  they read; writing that path later fails with ConflictError if some
+#                  writer that didn't take the lock replaced the file in between
+# Without fcntl (Windows) the locks only cover the threads of one process.
+# No imports from the package, so the Strava scripts can use it too.
+LOCK_DIR = os.path.join(tempfile.gettempdir(), 'training-plan-locks')
+LOCK_TIMEOUT = 600         # Seconds to wait for another stage before giving up
+LOCK_POLL = 0.1
+VERSIONS = {}
+
+class ConflictError(RuntimeError):
+    """The file changed on disk since this run read it."""
+
+class LockTimeout(TimeoutError):
+    """Another process held the lock for longer than LOCK_TIMEOUT."""
+
+def _fsync_dir(directory):
+    # The rename itself only survives a crash once the directory entry is on disk
+    if not hasattr(os, 'O_DIRECTORY'): return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try: os.fsync(fd)
+    except OSError: pass
+    finally: os.close(fd)
+
+@contextmanager
+def atomic_open(path, mode='w', encoding='utf-8'):
+    """open(path, mode) for writing, but `path` is only replaced once the block finished without an error."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file 0600; keep the permissions of the file it replaces
+        os.chmod(tmp, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp): os.unlink(tmp)
+        raise
+    _fsync_dir(directory)
+
+def atomic_write(path, content):
+    with atomic_open(path, 'wb' if isinstance(content, bytes) else 'w') as f:
+        f.write(content)
+
+# --- LOCKS ---
+_locks = {}
+_locks_guard = threading.Lock()
+
+def _lock_entry(path):
+    key = os.path.abspath(path)
+    with _locks_guard:
+        if key not in _locks:
+            name = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+            _locks[key] = {'thread': threading.RLock(), 'fd': None, 'depth': 0,
+                           'file': os.path.join(LOCK_DIR, f"{os.path.basename(key)}.{name}.lock")}
+        return _locks[key]
+
+def _flock(lock_file, deadline, wait):
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o666)
+    while True:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return fd
+        except OSError:
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                raise LockTimeout(f"{lock_file} still locked after {wait}s")
+            time.sleep(LOCK_POLL)
+
+@contextmanager
+def locked(*paths, timeout=None):
+    """
+    Holds the locks of `paths` (in a fixed order, so two stages can't deadlock).
+    Also works as a decorator: @storage.locked(config.MASTER_DB)
+    """
+    wait = LOCK_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + wait
+    held = []
+    try:
+        for path in sorted({os.path.abspath(p) for p in paths}):
+            entry = _lock_entry(path)
+            if not entry['thread'].acquire(timeout=max(deadline - time.monotonic(), 0)):
+                raise LockTimeout(f"{path} still locked by another thread after {wait}s")
+            held.append(entry)
+            if entry['depth'] == 0 and fcntl: entry['fd'] = _flock(entry['file'], deadline, wait)
+            entry['depth'] += 1
+        yield
+    finally:
+        for entry in reversed(held):
+            if entry['depth'] > 0:
+                entry['depth'] -= 1
+                if entry['depth'] == 0 and entry['fd'] is not None:
+                    fcntl.flock(entry['fd'], fcntl.LOCK_UN)
+                    os.close(entry['fd'])
+                    entry['fd'] = None
+            entry['thread'].release()
+
+# --- VERSIONS ---
+def version(path):
+    try: st = os.stat(path)
+    except FileNotFoundError: return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def read_text(path):
+    """File content (None if missing); a later write of `path` checks it wasn't replaced meanwhile."""
+    with locked(path):
+        VERSIONS[os.path.abspath(path)] = version(path)
+        return _read_text(path)
+
+def read_json(path, default=None):
+    text = read_text(path)
+    return default if text is None else json.loads(text)
+
+def _check_version(path):
+    key = os.path.abspath(path)
+    if key in VERSIONS and VERSIONS[key] != version(path):
+        raise ConflictError(f"{path} was changed by another process since it was read; re-run to merge.")
+
+# --- CHANGE TRACKING ---
+# Every writer reports what happened to its file during this run:
+#   'semantic'  -> real data changed, file was rewritten
+#   'cosmetic'  -> only volatile bits differ (timestamps, key order), file left untouched
+#   'unchanged' -> identical content, file left untouched
+# git_ops reads this to decide whether a commit is needed at all.
+CHANGES = {}
+
+# "**Last Updated:** ..." lines in the generated markdown files
+LAST_UPDATED_PATTERN = r"^\*\*Last Updated:\*\*.*$"
+
+def _record(path, status):
+    path = os.path.abspath(path)
+    # A semantic change sticks, even if a later write in the same run is a no-op
+    if CHANGES.get(path) != 'semantic':
+        CHANGES[path] = status
+    return status
+
+def _strip_volatile(text, volatile_patterns):
+    for pattern in volatile_patterns or []:
+        text = re.sub(pattern, '', text, flags=re.MULTILINE)
+    return text
+
+def _read_text(path):
+    if not os.path.exists(path): return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def _replace(path, content):
+    atomic_write(path, content)
+    # Later writes in this run build on this version
+    VERSIONS[os.path.abspath(path)] = version(path)
+    return _record(path, 'semantic')
+
+def write_text(path, content, volatile_patterns=None):
+    """
+    Writes the file only if it differs in more than the volatile patterns.
+    Returns 'semantic', 'cosmetic' or 'unchanged'.
+    """
+    with locked(path):
+        _check_version(path)
+        old = _read_text(path)
+        if old == content:
+            return _record(path, 'unchanged')
+        if old is not None and _strip_volatile(old, volatile_patterns) == _strip_volatile(content, volatile_patterns):
+            return _record(path, 'cosmetic')
+        return _replace(path, content)
+
+def dumps_canonical(data):
+    """
+    Deterministic serialization: sorted keys, compact separators and, for lists,
+    one record per line so a new activity shows up as a one-line diff.
+    """
+    if isinstance(data, list):
+        if not data: return "[]\n"
+        lines = [json.dumps(item, sort_keys=True, separators=(',', ':')) for item in data]
+        return "[\n" + ",\n".join(lines) + "\n]\n"
+    return json.dumps(data, sort_keys=True, indent=1) + "\n"
+
+def write_json(path, data):
+    """
+    Compares parsed content, so re-ordered keys or a different indent never count
+    as a change. Returns 'semantic', 'cosmetic' or 'unchanged'.
+    """
+    content = dumps_canonical(data)
+    with locked(path):
+        _check_version(path)
+        old_text = _read_text(path)
+        if old_text == content:
+            return _record(path, 'unchanged')
+
+        if old_text is not None:
+            try:
+                if json.loads(old_text) == data:
+                    return _record(path, 'cosmetic')
+            except ValueError:
+                pass
+        return _replace(path, content)
+
+def classify(path, old, new, volatile_patterns=None):
+    """
+    The same decision the writers make, for two versions of a file's text
+    (old None = new file): 'semantic', 'cosmetic' or 'unchanged'.
+    """
+    if old == new: return 'unchanged'
+    if old is None or new is None: return 'semantic'
+    if path.endswith('.json'):
+        try: return 'cosmetic' if json.loads(old) == json.loads(new) else 'semantic'
+        except ValueError: return 'semantic'
+    if _strip_volatile(old, volatile_patterns) == _strip_volatile(new, volatile_patterns): return 'cosmetic'
+    return 'semantic'
+
+def semantic_changes():
+    return [p for p, status in CHANGES.items() if status == 'semantic']
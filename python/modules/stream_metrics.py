@@ -0,0 +1,240 @@
+import os
+import json
+import hashlib
+import numpy as np
+from . import config, storage, streams, power_utils, plan_parser, rollups, activity_links, schema, sports
+
+# --- METRICS COMPUTED FROM THE ARCHIVED STRAVA STREAMS ---
+# Cached per Garmin activityId in data/stream_metrics.json so each activity is
+# only read from the archive once:
+#   {activityId: {'strava_ids': [...], 'np': W, 'duration': s,
+#                 'zones': {'sig': zone-definition hash, 'seconds': [per zone]},
+#                 'decoupling': {'sig': settings hash, 'kind': 'Pw:HR', 'pct': %, 'steady_s': s}}}
+# The briefing updates this cache too, so every read-modify-write of it holds its lock.
+
+def load_cache(path=None):
+    path = path or config.STREAM_METRICS_JSON
+    if not os.path.exists(path): return {}
+    try:
+        return storage.read_json(path, {})
+    except ValueError:
+        return {}
+
+def save_cache(cache, path=None):
+    path = path or config.STREAM_METRICS_JSON
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    storage.write_json(path, cache)
+
+def activity_streams(garmin_ids):
+    """Archived Strava activities for each part of a (possibly bundled) Garmin activity, or None if any is missing."""
+    acts = [activity_links.strava_activity(gid) for gid in garmin_ids]
+    return None if any(a is None for a in acts) else acts
+
+def power_entry(acts):
+    """NP over the concatenated 1 Hz power of every part."""
+    parts = [streams.one_hz(a, 'watts') for a in acts]
+    if any(p is None for p in parts): return None
+    watts = np.concatenate(parts)
+    if len(watts) == 0 or not watts.any(): return None
+    return {
+        'strava_ids': [a.id for a in acts],
+        'np': round(power_utils.normalized_power(watts), 1),
+        'duration': int(len(watts))
+    }
+
+@storage.locked(config.STREAM_METRICS_JSON)
+def fill_power_metrics(df, ftp):
+    """
+    Fills normPower / intensityFactor / trainingStressScore from the power
+    stream for rides Garmin didn't score, and for bundled rows (where the
+    duration-weighted NP of the parts is only an approximation). Without an
+    FTP only normPower is filled; a 0 IF/TSS would just look unscored again.
+    """
+    cache = load_cache()
+    filled = computed = 0
+
+    for idx, row in df.iterrows():
+        aid = str(row.get('activityId', '')).strip()
+        if not aid or aid.lower() == 'nan': continue
+        if sports.actual_sport(row.get('activityType', ''), row.get('Actual Workout', '')) != 'BIKE': continue
+        ids = [a.strip() for a in aid.split(',') if a.strip()]
+        bundled = len(ids) > 1
+        missing = ['normPower'] + (['trainingStressScore'] if ftp else [])
+        if not bundled and not any(schema.is_blank(row.get(c), zero=True) for c in missing): continue
+
+        if 'np' not in cache.get(aid, {}):
+            acts = activity_streams(ids)
+            entry = power_entry(acts) if acts else None
+            if not entry: continue
+            cache.setdefault(aid, {}).update(entry)
+            computed += 1
+
+        entry = cache[aid]
+        schema.set_value(df, idx, 'normPower', round(entry['np'], 1))
+        if ftp:
+            try: duration = float(row.get('duration', 0)) or entry['duration']
+            except (TypeError, ValueError): duration = entry['duration']
+            intensity, tss = power_utils.training_load(entry['np'], duration, ftp)
+            schema.set_value(df, idx, 'intensityFactor', round(intensity, 2))
+            schema.set_value(df, idx, 'trainingStressScore', round(tss, 1))
+        filled += 1
+
+    if computed: save_cache(cache)
+    if filled: print(f"⚡ STREAM METRICS: {'NP/TSS' if ftp else 'NP (no FTP for TSS)'} from power streams for {filled} activities ({computed} new).")
+    return filled
+
+# --- TIME IN ZONE ---
+# Bikes are binned by power, runs by heart rate, using the zones in endurance_plan.md.
+ZONE_STREAMS = {'BIKE': ('watts', 'power'), 'RUN': ('heartrate', 'hr')}
+
+def zone_settings(model=None):
+    """{sport: {'stream', 'names', 'lows', 'sig'}} from the plan."""
+    model = model or plan_parser.load_model()
+    settings = {}
+    for sport, (key, zone_key) in ZONE_STREAMS.items():
+        zones = model['zones'][zone_key]
+        if not zones: continue
+        names, lows = [z['name'] for z in zones], [float(z['low']) for z in zones]
+        sig = hashlib.md5(json.dumps([key, names, lows]).encode('utf-8')).hexdigest()[:12]
+        settings[sport] = {'stream': key, 'names': names, 'lows': lows, 'sig': sig}
+    return settings
+
+def zone_entry(acts, setting):
+    """Seconds per zone over every part. Paused / missing seconds are not counted."""
+    parts = [streams.one_hz(a, setting['stream'], fill=np.nan) for a in acts]
+    parts = [p for p in parts if p is not None]
+    if not parts: return None
+    values = np.concatenate(parts)
+    values[values <= 0] = np.nan
+    secs = power_utils.zone_seconds(values, np.array(setting['lows']))
+    if not secs.sum(): return None
+    return {'sig': setting['sig'], 'seconds': [int(s) for s in secs]}
+
+def weekly_zones(df, cache, settings):
+    """{iso week: {sport: [seconds per zone]}} summed from the per-activity histograms."""
+    weeks = {}
+    for _, row in df.iterrows():
+        aid = str(row.get('activityId', '')).strip()
+        zones = cache.get(aid, {}).get('zones')
+        if not zones: continue
+        sport = sports.actual_sport(row.get('activityType', ''), row.get('Actual Workout', ''))
+        if sport not in settings or zones['sig'] != settings[sport]['sig']: continue
+        try: week = rollups.week_key(str(row.get('Date', '')).strip())
+        except ValueError: continue
+        cur = weeks.setdefault(week, {}).setdefault(sport, np.zeros(len(zones['seconds']), dtype=int))
+        cur += zones['seconds']
+    return {w: {s: v.tolist() for s, v in by_sport.items()} for w, by_sport in sorted(weeks.items())}
+
+@storage.locked(config.STREAM_METRICS_JSON)
+def update_zone_metrics(df, path=None):
+    """
+    Bins any activity whose histogram is missing or was built from different
+    zones, then rewrites the weekly rollup (data/zone_weekly.json).
+    """
+    path = path or config.ZONE_WEEKLY_JSON
+    settings = zone_settings()
+    if not settings: return None
+    cache = load_cache()
+    computed = 0
+
+    for _, row in df.iterrows():
+        aid = str(row.get('activityId', '')).strip()
+        if not aid or aid.lower() == 'nan': continue
+        sport = sports.actual_sport(row.get('activityType', ''), row.get('Actual Workout', ''))
+        if sport not in settings: continue
+        if cache.get(aid, {}).get('zones', {}).get('sig') == settings[sport]['sig']: continue
+
+        acts = activity_streams([a.strip() for a in aid.split(',') if a.strip()])
+        entry = zone_entry(acts, settings[sport]) if acts else None
+        if not entry: continue
+        cache.setdefault(aid, {})['zones'] = entry
+        computed += 1
+
+    if computed:
+        save_cache(cache)
+        print(f"📊 TIME IN ZONE: Binned {computed} new activities.")
+
+    rollup = {
+        'zones': {sport: s['names'] for sport, s in settings.items()},
+        'weeks': weekly_zones(df, cache, settings)
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    storage.write_json(path, rollup)
+    return rollup
+
+# --- AEROBIC DECOUPLING ---
+# Efficiency (output per heart beat) of the first half of an activity's steady
+# seconds vs the second half:  (EF1 - EF2) / EF1 * 100
+# Pw:HR for rides (watts), Pa:HR for runs (velocity); under ~5% the aerobic
+# engine held up for the whole session. The warm-up, stops, surges and recoveries
+# are left out: only seconds whose SMOOTH_S mean stays within STEADY_BAND of the
+# session's median output count.
+DECOUPLING_STREAMS = {'BIKE': ('watts', 'Pw:HR'), 'RUN': ('velocity_smooth', 'Pa:HR')}
+WARMUP_S = 600
+SMOOTH_S = 30
+STEADY_BAND = 0.15         # +-15% of the median output
+MIN_STEADY_S = 1200        # Less steady time than this is not worth a number
+DECOUPLING_SIG = hashlib.md5(json.dumps([WARMUP_S, SMOOTH_S, STEADY_BAND, MIN_STEADY_S]).encode('utf-8')).hexdigest()[:12]
+
+def rolling_mean(values, window):
+    """Trailing mean over `window` seconds (shorter at the start); NaN seconds are skipped."""
+    valid = ~np.isnan(values)
+    sums = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(valid)])
+    lo = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+    n = counts[1:] - counts[lo]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(n > 0, (sums[1:] - sums[lo]) / n, np.nan)
+
+def decoupling_entry(acts, sport):
+    """Decoupling over the steady seconds of every part (pct None when there are too few)."""
+    key, kind = DECOUPLING_STREAMS[sport]
+    output, hr = [], []
+    for a in acts:
+        o, h = streams.one_hz(a, key, fill=np.nan), streams.one_hz(a, 'heartrate', fill=np.nan)
+        if o is None or h is None or len(o) != len(h): return None
+        output.append(o)
+        hr.append(h)
+    output, hr = np.concatenate(output)[WARMUP_S:], np.concatenate(hr)[WARMUP_S:]
+    output[output <= 0] = np.nan
+    hr[hr <= 0] = np.nan
+
+    smooth = rolling_mean(output, SMOOTH_S)
+    steady = np.zeros(len(output), dtype=bool)
+    if np.isfinite(smooth).any():
+        level = np.nanmedian(smooth)
+        steady = np.isfinite(output) & np.isfinite(hr) & (np.abs(smooth - level) <= STEADY_BAND * level)
+    idx = np.flatnonzero(steady)
+    entry = {'sig': DECOUPLING_SIG, 'kind': kind, 'pct': None, 'steady_s': int(len(idx))}
+    if len(idx) < MIN_STEADY_S: return entry
+
+    first, second = idx[:len(idx) // 2], idx[len(idx) // 2:]
+    ef1 = output[first].mean() / hr[first].mean()
+    ef2 = output[second].mean() / hr[second].mean()
+    entry['pct'] = round(float((ef1 - ef2) / ef1 * 100), 2)
+    return entry
+
+@storage.locked(config.STREAM_METRICS_JSON)
+def update_decoupling(activities):
+    """
+    activities: {Garmin activityId: 'BIKE' / 'RUN'}. Computes the ones not cached
+    yet (or cached with other settings). Returns {activityId: decoupling %}.
+    """
+    cache = load_cache()
+    computed = 0
+
+    for aid, sport in activities.items():
+        if sport not in DECOUPLING_STREAMS: continue
+        if cache.get(aid, {}).get('decoupling', {}).get('sig') == DECOUPLING_SIG: continue
+        acts = activity_streams([aid])
+        entry = decoupling_entry(acts, sport) if acts else None
+        if not entry: continue
+        cache.setdefault(aid, {})['decoupling'] = entry
+        computed += 1
+
+    if computed:
+        save_cache(cache)
+        print(f"🫀 DECOUPLING: Computed {computed} new activities.")
+
+    found = {aid: cache.get(aid, {}).get('decoupling', {}) for aid in activities}
+    return {aid: d['pct'] for aid, d in found.items() if d.get('pct') is not None}
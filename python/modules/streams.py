@@ -0,0 +1,33 @@
+import sys
+import numpy as np
+from . import config
+
+# The archive module lives with the Strava scripts (strava_data/stream_archive.py)
+if config.STRAVA_DIR not in sys.path: sys.path.insert(0, config.STRAVA_DIR)
+import stream_archive
+
+# --- ACCESS TO THE ARCHIVED STRAVA STREAMS ---
+_index = None
+
+def archive_index():
+    """[meta] for every archived activity (read once per process)."""
+    global _index
+    if _index is None:
+        _index = [stream_archive.load(aid).meta for aid in stream_archive.list_activities()]
+    return _index
+
+def load(strava_id):
+    return stream_archive.load(strava_id)
+
+def one_hz(act, key, fill=0.0):
+    """
+    Stream resampled onto a 1 s grid using the time stream. Seconds with no
+    sample (auto-pause, dropouts) get `fill`.
+    """
+    values = act.get(key)
+    if values is None: return None
+    t = act.get('time')
+    if t is None or len(t) != len(values): return np.asarray(values, dtype=float)
+    out = np.full(int(t[-1]) + 1, fill, dtype=float)
+    out[t.astype(int)] = values
+    return out
@@ -3,22 +3,24 @@ import numpy as np
 import json
 import os
 import re
-import ast
+import argparse
 from datetime import datetime, timedelta
-from . import config
+from concurrent.futures import ProcessPoolExecutor
+from . import config, storage, rollups, compliance, stream_metrics, activity_links, plan_parser, schema, garmin_store, sports
 
 # --- CONFIGURATION ---
 SYNC_WINDOW_DAYS = 60  
+RELINK_WORKERS = os.cpu_count() or 1
 
 def load_master_db():
+    """Reads the Master DB table and coerces it to config.MASTER_SCHEMA."""
     if not os.path.exists(config.MASTER_DB): 
-        return pd.DataFrame(columns=config.MASTER_COLUMNS)
+        return schema.coerce(pd.DataFrame(columns=config.MASTER_COLUMNS))
     
-    with open(config.MASTER_DB, 'r', encoding='utf-8') as f: 
-        lines = f.readlines()
+    lines = storage.read_text(config.MASTER_DB).splitlines(keepends=True)
     
     if len(lines) < 3: 
-        return pd.DataFrame(columns=config.MASTER_COLUMNS)
+        return schema.coerce(pd.DataFrame(columns=config.MASTER_COLUMNS))
     
     header = [h.strip() for h in lines[0].strip('|').split('|')]
     data = []
@@ -29,22 +31,7 @@ def load_master_db():
             row += [''] * (len(header) - len(row))
         data.append(dict(zip(header, row)))
     
-    return pd.DataFrame(data)
-
-def clean_corrupt_data(df):
-    if 'activityType' in df.columns:
-        def fix_type(val):
-            val = str(val).strip()
-            if val.startswith("{") and "typeKey" in val:
-                try:
-                    d = ast.literal_eval(val)
-                    return d.get('typeKey', '')
-                except:
-                    match = re.search(r"'typeKey':\s*'([^']+)'", val)
-                    return match.group(1) if match else val
-            return val
-        df['activityType'] = df['activityType'].apply(fix_type)
-    return df
+    return schema.coerce(pd.DataFrame(data))
 
 # --- HELPER: FORMAT ACTIVITY NAME WITH PREFIX ---
 def format_activity_name(raw_name, type_key):
@@ -65,24 +52,12 @@ def format_activity_name(raw_name, type_key):
     return raw_name
 
 def extract_weekly_table():
-    if not os.path.exists(config.PLAN_FILE): return pd.DataFrame()
-    with open(config.PLAN_FILE, 'r', encoding='utf-8') as f: lines = f.readlines()
-    
-    table_lines, found_header = [], False
-    for line in lines:
-        s = line.strip()
-        if not found_header:
-            if s.startswith('#') and 'weekly schedule' in s.lower(): found_header = True
-            continue
-        if (s.startswith('# ') or s.startswith('## ')) and len(table_lines) > 2: break
-        if '|' in s: table_lines.append(s)
-            
-    if not found_header or not table_lines: return pd.DataFrame()
+    schedule = plan_parser.load_model()['schedule']
+    if not schedule['rows']: return pd.DataFrame()
     
-    raw_header = [h.strip() for h in table_lines[0].strip('|').split('|')]
     col_map = {}
-    for i, h in enumerate(raw_header):
-        clean_h = h.lower().replace(' ', '')
+    for i, h in enumerate(schedule['header']):
+        clean_h = h.replace(' ', '')
         if 'date' in clean_h: col_map['Date'] = i
         elif 'day' in clean_h: col_map['Day'] = i
         elif 'plannedworkout' in clean_h: col_map['Planned Workout'] = i
@@ -90,9 +65,8 @@ def extract_weekly_table():
         elif 'notes' in clean_h: col_map['Notes'] = i
         
     data = []
-    for line in table_lines[1:]:
-        if '---' in line: continue
-        row_vals = [c.strip() for c in line.strip('|').split('|')]
+    for row in schedule['rows']:
+        row_vals = row['cells']
         row_dict = {}
         for col_name, idx in col_map.items():
             if idx < len(row_vals): row_dict[col_name] = row_vals[idx]
@@ -100,22 +74,12 @@ def extract_weekly_table():
         data.append(row_dict)
     return pd.DataFrame(data)
 
-def detect_sport(text):
-    t = text.upper()
-    if '[RUN]' in t or 'RUN' in t or 'JOG' in t: return 'RUN'
-    if '[BIKE]' in t or 'BIKE' in t or 'CYCLE' in t or 'RIDE' in t or 'ZWIFT' in t: return 'BIKE'
-    if '[SWIM]' in t or 'SWIM' in t or 'POOL' in t: return 'SWIM'
-    return 'OTHER'
-
-def is_value_different(db_val, json_val):
-    str_db = str(db_val).strip()
-    if not str_db or str_db.lower() == 'nan': return False
-    try:
-        f_db = float(str_db)
-        f_json = float(json_val)
-        return abs(f_db - f_json) > 0.1
-    except:
-        return str_db != str(json_val).strip()
+def is_value_different(db_val, new_val):
+    """Both values already typed by schema.parse_value(); numbers within 0.1 count as equal."""
+    if schema.is_blank(db_val): return False
+    if isinstance(db_val, (int, float, np.number)) and isinstance(new_val, (int, float, np.number)):
+        return abs(db_val - new_val) > 0.1
+    return str(db_val).strip() != str(new_val).strip()
 
 def bundle_activities(activities):
     if not activities: return None
@@ -177,113 +141,81 @@ def bundle_activities(activities):
 
     return combined
 
-def extract_ftp(text):
-    if not text: return None
-    pattern = r"Cycling FTP[:\*]*\s*(\d+)"
-    match = re.search(pattern, text, re.IGNORECASE)
-    if match: return int(match.group(1))
+def cp_estimate():
+    """3-parameter CP from strava_data/cycling/cp_model.json (six-week envelope, then all-time)."""
+    fits = storage.read_json(config.CP_MODEL_JSON, {})
+    for envelope in ['six_week', 'all_time']:
+        fit = (fits.get(envelope) or {}).get('3p') or (fits.get(envelope) or {}).get('2p')
+        if fit and fit.get('cp'): return int(round(fit['cp']))
     return None
 
 def get_current_ftp():
-    if not os.path.exists(config.PLAN_FILE): return None
-    try:
-        with open(config.PLAN_FILE, 'r', encoding='utf-8') as f: 
-            content = f.read()
-        return extract_ftp(content)
-    except: return None
-
-def sync():
-    print(f"🔄 SYNC: Merging Plan and Garmin Data (Last {SYNC_WINDOW_DAYS} Days Only)...")
+    if config.FTP_SOURCE == 'cp':
+        cp = cp_estimate()
+        if cp: return cp
+    return plan_parser.load_model()['ftp']
+
+def save_master_db(df_master):
+    """Sorts newest first and writes the Master DB (only if the data changed). Returns the sorted frame."""
+    df_master = schema.coerce(df_master)
+    df_master = df_master.sort_values(by='Date', ascending=False, kind='stable')
     
-    df_master = load_master_db()
-    df_master = clean_corrupt_data(df_master)
-    
-    for col in config.MASTER_COLUMNS:
-        if col not in df_master.columns:
-            df_master[col] = ""
-            
-    df_plan = extract_weekly_table()
-    
-    if not os.path.exists(config.GARMIN_JSON):
-        print("❌ Garmin JSON missing.")
-        return None
-        
-    with open(config.GARMIN_JSON, 'r', encoding='utf-8') as f: 
-        garmin_data = json.load(f)
-        
+    print(f"💾 Saving {len(df_master)} rows to Master DB...")
+    out = ["| " + " | ".join(config.MASTER_COLUMNS) + " |\n"]
+    out.append("| " + " | ".join(['---'] * len(config.MASTER_COLUMNS)) + " |\n")
+    for vals in schema.format_frame(df_master).itertuples(index=False):
+        out.append("| " + " | ".join(vals) + " |\n")
+
+    status = storage.write_text(config.MASTER_DB, "".join(out))
+    if status != 'semantic':
+        print("   (No data changes. Master DB left untouched.)")
+    return df_master
+
+# --- GARMIN LINKING ---
+COLS_TO_MAP = [
+    'duration', 'distance', 'averageHR', 'maxHR', 
+    'aerobicTrainingEffect', 'anaerobicTrainingEffect', 'trainingEffectLabel',
+    'avgPower', 'maxPower', 'normPower', 'trainingStressScore', 'intensityFactor',
+    'averageSpeed', 'maxSpeed', 'vO2MaxValue', 'calories', 'elevationGain',
+    'activityName', 'sportTypeId',
+    'averageBikingCadenceInRevPerMinute', 
+    'averageRunningCadenceInStepsPerMinute',
+    'avgStrideLength', 'avgVerticalOscillation', 'avgGroundContactTime'
+]
+
+# Everything sync() and activity_links read from a Garmin activity; the rest of
+# each record is dropped while streaming the JSON
+GARMIN_FIELDS = dict.fromkeys(['activityId', 'startTimeLocal', 'startTimeGMT', 'beginTimestamp',
+                               'perceivedEffort', 'feeling'] + COLS_TO_MAP)
+GARMIN_FIELDS.update({'activityType': ['typeKey', 'typeId'], 'summaryDTO': ['directWorkoutRpe', 'directWorkoutFeel']})
+
+def group_by_date(garmin_data):
     garmin_by_date = {}
     for g in garmin_data:
         d = g.get('startTimeLocal', '')[:10]
         if d not in garmin_by_date: garmin_by_date[d] = []
         garmin_by_date[d].append(g)
+    return garmin_by_date
 
-    today = datetime.now()
-    cutoff_date = today - timedelta(days=SYNC_WINDOW_DAYS)
-    cutoff_str = cutoff_date.strftime('%Y-%m-%d')
-    today_str = today.strftime('%Y-%m-%d')
-
-    # 1. Sync Plan to Master
-    if not df_plan.empty:
-        count_added = 0
-        df_master['Date_Norm'] = pd.to_datetime(df_master['Date'], errors='coerce').dt.strftime('%Y-%m-%d')
-        df_plan['Date_Norm'] = pd.to_datetime(df_plan['Date'], errors='coerce').dt.strftime('%Y-%m-%d')
-        
-        existing_keys = set(zip(df_master['Date_Norm'], df_master['Planned Workout'].str.strip()))
-        
-        for _, p_row in df_plan.iterrows():
-            p_date_norm = p_row['Date_Norm']
-            p_workout = str(p_row.get('Planned Workout', '')).strip()
-            
-            if pd.isna(p_date_norm) or p_date_norm < cutoff_str: 
-                continue
-            
-            p_clean = re.sub(r'[^a-zA-Z0-9\s]', '', p_workout.lower())
-            if 'rest day' in p_clean or p_clean in ['rest', 'off', 'day off']: continue
-            
-            if (p_date_norm, p_workout) not in existing_keys:
-                new_row = {c: "" for c in config.MASTER_COLUMNS}
-                new_row.update({
-                    'Date': p_date_norm,
-                    'Day': p_row.get('Day', ''),
-                    'Planned Workout': p_workout,
-                    'Planned Duration': p_row.get('Planned Duration', ''),
-                    'Notes / Targets': p_row.get('Notes', ''),
-                    'Status': 'Pending'
-                })
-                df_master = pd.concat([df_master, pd.DataFrame([new_row])], ignore_index=True)
-                existing_keys.add((p_date_norm, p_workout))
-                count_added += 1
-                
-        if 'Date_Norm' in df_master.columns: 
-            df_master.drop(columns=['Date_Norm'], inplace=True)
-        print(f"   + Added {count_added} new planned workouts.")
-
-    # 2. Link Garmin Data
+def claimed_activity_ids(df_master):
+    """Every Garmin id already linked to a row (bundled rows hold several)."""
     claimed_ids = set()
-    
-    for _, row in df_master.iterrows():
-        eid = str(row.get('activityId', '')).strip()
-        if eid and eid.lower() != 'nan':
-            for sub_id in eid.split(','):
-                claimed_ids.add(sub_id.strip())
-
-    cols_to_map = [
-        'duration', 'distance', 'averageHR', 'maxHR', 
-        'aerobicTrainingEffect', 'anaerobicTrainingEffect', 'trainingEffectLabel',
-        'avgPower', 'maxPower', 'normPower', 'trainingStressScore', 'intensityFactor',
-        'averageSpeed', 'maxSpeed', 'vO2MaxValue', 'calories', 'elevationGain',
-        'activityName', 'sportTypeId',
-        'averageBikingCadenceInRevPerMinute', 
-        'averageRunningCadenceInStepsPerMinute',
-        'avgStrideLength', 'avgVerticalOscillation', 'avgGroundContactTime'
-    ]
+    for eid in df_master['activityId']:
+        for sub_id in eid.split(','):
+            if sub_id.strip(): claimed_ids.add(sub_id.strip())
+    return claimed_ids
 
+def link_garmin(df_master, garmin_by_date, claimed_ids, cutoff_str=''):
+    """
+    Links rows on or after cutoff_str to the Garmin activities of their date:
+    ids already on the row first, otherwise unclaimed activities of the planned
+    sport (bundled when there are several). claimed_ids is updated in place.
+    Returns the number of linked rows.
+    """
+    linked = 0
     for idx, row in df_master.iterrows():
-        date_str = str(row.get('Date', '')).strip()
-        try: 
-            date_obj = pd.to_datetime(date_str)
-            date_key = date_obj.strftime('%Y-%m-%d')
-        except: continue
+        if pd.isna(row['Date']): continue
+        date_key = row['Date'].strftime('%Y-%m-%d')
         
         if date_key < cutoff_str:
             continue
@@ -292,13 +224,10 @@ def sync():
         if not candidates: continue
 
         planned_txt = str(row.get('Planned Workout', '')).upper()
-        planned_type = detect_sport(planned_txt)
+        planned_type = sports.detect_sport(planned_txt)
         
         matches = []
-        current_id_str = str(row.get('activityId', '')).strip()
-        current_ids = []
-        if current_id_str and current_id_str.lower() != 'nan':
-             current_ids = [cid.strip() for cid in current_id_str.split(',') if cid.strip()]
+        current_ids = [cid.strip() for cid in row['activityId'].split(',') if cid.strip()]
         
         for cand in candidates:
             cand_id = str(cand.get('activityId'))
@@ -321,15 +250,16 @@ def sync():
                 matches.append(cand)
 
         if matches:
+            linked += 1
             composite_match = bundle_activities(matches)
             for m in matches:
                 claimed_ids.add(str(m.get('activityId')))
 
-            df_master.at[idx, 'Status'] = 'COMPLETED'
+            schema.set_value(df_master, idx, 'Status', 'COMPLETED')
             if str(df_master.at[idx, 'Match Status']) != 'Linked (modified)':
-                df_master.at[idx, 'Match Status'] = 'Linked'
+                schema.set_value(df_master, idx, 'Match Status', 'Linked')
             
-            df_master.at[idx, 'activityId'] = str(composite_match.get('activityId'))
+            schema.set_value(df_master, idx, 'activityId', composite_match.get('activityId'))
             
             # --- FIX: Apply Prefix Logic ---
             g_type_key = composite_match.get('activityType', {}).get('typeKey', '')
@@ -337,22 +267,20 @@ def sync():
             new_name = format_activity_name(raw_name, g_type_key)
             # -------------------------------
 
-            df_master.at[idx, 'Actual Workout'] = new_name
-            df_master.at[idx, 'activityType'] = g_type_key
+            schema.set_value(df_master, idx, 'Actual Workout', new_name)
+            schema.set_value(df_master, idx, 'activityType', g_type_key)
             
             try:
                 dur_sec = float(composite_match.get('duration', 0))
-                df_master.at[idx, 'Actual Duration'] = f"{dur_sec/60:.1f}"
+                schema.set_value(df_master, idx, 'Actual Duration', round(dur_sec / 60, 1))
             except: pass
 
-            for col in cols_to_map:
-                val = composite_match.get(col, '')
-                current_db_val = str(df_master.at[idx, col]).strip()
-                if (not current_db_val or current_db_val == 'nan') and val is not None and val != "":
-                     df_master.at[idx, col] = val
-                elif current_db_val and val is not None and val != "":
-                    if is_value_different(current_db_val, val):
-                        df_master.at[idx, col] = val 
+            for col in COLS_TO_MAP:
+                val = schema.parse_value(col, composite_match.get(col))
+                if schema.is_blank(val): continue
+                current_db_val = df_master.at[idx, col]
+                if schema.is_blank(current_db_val) or is_value_different(current_db_val, val):
+                    schema.set_value(df_master, idx, col, val)
             
             rpe_val = composite_match.get('perceivedEffort')
             feel_val = composite_match.get('feeling')
@@ -362,8 +290,70 @@ def sync():
             if feel_val is None and 'summaryDTO' in composite_match:
                 raw = composite_match['summaryDTO'].get('directWorkoutFeel')
                 if raw: feel_val = int((raw / 25) + 1)
-            if rpe_val is not None: df_master.at[idx, 'RPE'] = str(rpe_val)
-            if feel_val is not None: df_master.at[idx, 'Feeling'] = str(feel_val)
+            if rpe_val is not None: schema.set_value(df_master, idx, 'RPE', rpe_val)
+            if feel_val is not None: schema.set_value(df_master, idx, 'Feeling', feel_val)
+    return linked
+
+@storage.locked(config.MASTER_DB)
+def sync():
+    print(f"🔄 SYNC: Merging Plan and Garmin Data (Last {SYNC_WINDOW_DAYS} Days Only)...")
+    
+    df_master = load_master_db()
+    fingerprints_before = rollups.date_fingerprints(df_master)
+            
+    df_plan = extract_weekly_table()
+    
+    if not os.path.exists(config.GARMIN_JSON):
+        print("❌ Garmin JSON missing.")
+        return None
+        
+    # Whole history (activity_links matches any unlinked activity), trimmed to GARMIN_FIELDS
+    garmin_data = garmin_store.load_activities(config.GARMIN_JSON, GARMIN_FIELDS)
+    activity_links.update_links(garmin_data)
+        
+    garmin_by_date = group_by_date(garmin_data)
+
+    today = datetime.now()
+    cutoff_date = today - timedelta(days=SYNC_WINDOW_DAYS)
+    cutoff_str = cutoff_date.strftime('%Y-%m-%d')
+    today_str = today.strftime('%Y-%m-%d')
+
+    # 1. Sync Plan to Master
+    if not df_plan.empty:
+        new_rows = []
+        df_plan['Date_Norm'] = pd.to_datetime(df_plan['Date'], errors='coerce').dt.strftime('%Y-%m-%d')
+        
+        existing_keys = set(zip(df_master['Date'].dt.strftime('%Y-%m-%d'), df_master['Planned Workout'].str.strip()))
+        
+        for _, p_row in df_plan.iterrows():
+            p_date_norm = p_row['Date_Norm']
+            p_workout = str(p_row.get('Planned Workout', '')).strip()
+            
+            if pd.isna(p_date_norm) or p_date_norm < cutoff_str: 
+                continue
+            
+            p_clean = re.sub(r'[^a-zA-Z0-9\s]', '', p_workout.lower())
+            if 'rest day' in p_clean or p_clean in ['rest', 'off', 'day off']: continue
+            
+            if (p_date_norm, p_workout) not in existing_keys:
+                new_row = {c: "" for c in config.MASTER_COLUMNS}
+                new_row.update({
+                    'Date': p_date_norm,
+                    'Day': p_row.get('Day', ''),
+                    'Planned Workout': p_workout,
+                    'Planned Duration': p_row.get('Planned Duration', ''),
+                    'Notes / Targets': p_row.get('Notes', ''),
+                    'Status': 'Pending'
+                })
+                new_rows.append(new_row)
+                existing_keys.add((p_date_norm, p_workout))
+                
+        df_master = schema.append_rows(df_master, new_rows)
+        print(f"   + Added {len(new_rows)} new planned workouts.")
+
+    # 2. Link Garmin Data
+    claimed_ids = claimed_activity_ids(df_master)
+    link_garmin(df_master, garmin_by_date, claimed_ids, cutoff_str)
 
     # 3. Handle Unplanned
     unplanned_rows = []
@@ -403,7 +393,7 @@ def sync():
             new_row['activityType'] = g_type_key
             # --------------------------------------------
             
-            for col in cols_to_map:
+            for col in COLS_TO_MAP:
                 if col in g: new_row[col] = g[col]
             
             rpe_val = g.get('perceivedEffort')
@@ -418,53 +408,135 @@ def sync():
                  if raw_feel: feel_val = int((raw_feel / 25) + 1)
             if feel_val: new_row['Feeling'] = str(feel_val)
 
-            try: new_row['Actual Duration'] = f"{float(g.get('duration', 0))/60:.1f}"
+            try: new_row['Actual Duration'] = round(float(g.get('duration', 0)) / 60, 1)
             except: pass
             
             unplanned_rows.append(new_row)
 
     if unplanned_rows:
         print(f"   + Added {len(unplanned_rows)} unplanned activities.")
-        df_master = pd.concat([df_master, pd.DataFrame(unplanned_rows)], ignore_index=True)
+        df_master = schema.append_rows(df_master, unplanned_rows)
 
-    # 4. Hydrate TSS/IF
+    # 4. Hydrate TSS/IF (power streams first for rides Garmin didn't score)
     current_ftp = get_current_ftp() or 241.0
-    for idx, row in df_master.iterrows():
-        r_date = str(row.get('Date', ''))
-        if r_date < cutoff_str: continue
-
-        act_type = str(row.get('activityType', '')).lower()
-        if not ('run' in act_type or 'cycl' in act_type or 'bik' in act_type or 'virtual' in act_type): continue
-        try:
-            duration = float(row.get('duration', 0))
-            np_val = float(row.get('normPower', 0))
-        except: continue
-        
-        if duration > 0 and np_val > 0:
-            intensity = np_val / current_ftp
-            existing_if = str(row.get('intensityFactor', '')).strip()
-            if not existing_if or existing_if == 'nan' or float(existing_if) == 0:
-                 df_master.at[idx, 'intensityFactor'] = f"{intensity:.2f}"
-            
-            existing_tss = str(row.get('trainingStressScore', '')).strip()
-            if not existing_tss or existing_tss == 'nan' or float(existing_tss) == 0:
-                tss = (duration * np_val * intensity) / (current_ftp * 3600) * 100
-                df_master.at[idx, 'trainingStressScore'] = f"{tss:.1f}"
-
-    # 5. Save
-    df_master['Date_Sort'] = pd.to_datetime(df_master['Date'], errors='coerce')
-    df_master = df_master.sort_values(by='Date_Sort', ascending=False).drop(columns=['Date_Sort'])
-    
-    print(f"💾 Saving {len(df_master)} rows to Master DB...")
-    with open(config.MASTER_DB, 'w', encoding='utf-8') as f:
-        f.write("| " + " | ".join(config.MASTER_COLUMNS) + " |\n")
-        f.write("| " + " | ".join(['---'] * len(config.MASTER_COLUMNS)) + " |\n")
-        for _, row in df_master.iterrows():
-            vals = []
-            for c in config.MASTER_COLUMNS:
-                val = str(row.get(c, ""))
-                val = val.replace('\n', ' ').replace('\r', '').replace('|', '/')
-                vals.append(val)
-            f.write("| " + " | ".join(vals) + " |\n")
+    stream_metrics.fill_power_metrics(df_master, current_ftp)
+    act_type = df_master['activityType'].astype(str).str.lower()
+    duration, np_val = df_master['duration'], df_master['normPower']
+    scorable = ((df_master['Date'] >= pd.Timestamp(cutoff_str))
+                & act_type.str.contains('run|cycl|bik|virtual')
+                & (duration > 0) & (np_val > 0)).fillna(False).astype(bool)
+    intensity = np_val / current_ftp
+    tss = (duration * np_val * intensity) / (current_ftp * 3600) * 100
+
+    missing_if = scorable & (df_master['intensityFactor'].fillna(0) == 0)
+    df_master.loc[missing_if, 'intensityFactor'] = intensity[missing_if].round(2)
+    missing_tss = scorable & (df_master['trainingStressScore'].fillna(0) == 0)
+    df_master.loc[missing_tss, 'trainingStressScore'] = tss[missing_tss].round(1)
+
+    # 5. Workout compliance (Zwift workouts with an archived power stream)
+    compliance.score_rows(df_master, current_ftp)
+
+    # 6. Save
+    df_master = save_master_db(df_master)
+
+    # 7. Calendar rollups (only the dates touched by this sync)
+    touched = rollups.changed_dates(fingerprints_before, rollups.date_fingerprints(df_master))
+    rollups.update_rollups(df_master, touched)
+
+    # 8. Time in zone (per-activity histograms + weekly rollup)
+    stream_metrics.update_zone_metrics(df_master)
     
     return df_master
+
+# --- FULL-HISTORY RE-LINK ---
+# sync() only links the last SYNC_WINDOW_DAYS. relink() re-runs the same linking
+# over the whole history (e.g. after a matching rule changed), one calendar month
+# per worker process. A row only ever sees the Garmin activities of its own date,
+# so months can't compete for an activity: every partition starts from the ids
+# claimed in the DB and the result is the same as one sequential pass.
+
+def _relink_partition(job):
+    month, rows, garmin_by_date, claimed_ids = job
+    before = schema.format_frame(rows)
+    linked = link_garmin(rows, garmin_by_date, claimed_ids)
+    changed = schema.format_frame(rows) != before
+    return month, rows, {
+        'rows': len(rows), 'linked': linked,
+        'changed_rows': int(changed.any(axis=1).sum()),
+        'changed_cells': int(changed.values.sum()),
+        'columns': [c for c in changed.columns if changed[c].any()]
+    }
+
+@storage.locked(config.MASTER_DB)
+def relink(since=None, until=None, workers=None, dry_run=False):
+    """
+    Re-links every row between the months since..until ('YYYY-MM', inclusive).
+    Partitions are merged and written once, after all of them succeeded.
+    Returns {month: report}.
+    """
+    print(f"🔁 RELINK: Re-linking {since or 'start'}..{until or 'now'} with {workers or RELINK_WORKERS} workers...")
+    if not os.path.exists(config.GARMIN_JSON):
+        print("❌ Garmin JSON missing.")
+        return None
+
+    df_master = load_master_db()
+    fingerprints_before = rollups.date_fingerprints(df_master)
+    # The JSON is newest first, so reading stops at the first month before 'since'
+    garmin_by_date = group_by_date(garmin_store.iter_activities(config.GARMIN_JSON, GARMIN_FIELDS,
+                                                                f"{since}-01" if since else None))
+    claimed_ids = claimed_activity_ids(df_master)
+
+    months = df_master['Date'].dt.strftime('%Y-%m')
+    in_range = months.notna()
+    if since: in_range &= months >= since
+    if until: in_range &= months <= until
+
+    jobs = []
+    for month, rows in df_master[in_range].groupby(months[in_range], sort=True):
+        month_garmin = {d: acts for d, acts in garmin_by_date.items() if d.startswith(month)}
+        if not month_garmin: continue
+        month_ids = {str(g.get('activityId')) for acts in month_garmin.values() for g in acts}
+        jobs.append((month, rows, month_garmin, claimed_ids & month_ids))
+
+    # Any failing partition raises here, before anything is written
+    with ProcessPoolExecutor(max_workers=workers or RELINK_WORKERS) as pool:
+        results = list(pool.map(_relink_partition, jobs))
+
+    reports = {}
+    for month, rows, report in results:
+        reports[month] = report
+        cols = report['columns'][:4] + (['...'] if len(report['columns']) > 4 else [])
+        cols = f": {', '.join(cols)}" if cols else ""
+        print(f"   {month}: {report['rows']} rows, {report['linked']} linked, "
+              f"{report['changed_rows']} changed ({report['changed_cells']} cells{cols})")
+
+    changed = [rows for _, rows, report in results if report['changed_cells']]
+    if not changed:
+        print("   (Nothing to re-link.)")
+        return reports
+    if dry_run:
+        print(f"   Dry run: {sum(r['changed_rows'] for r in reports.values())} changed rows in {len(changed)} months not saved.")
+        return reports
+
+    merged = df_master.drop(index=pd.concat(changed).index)
+    merged = schema.coerce(pd.concat([merged] + changed)).loc[df_master.index]
+    merged = save_master_db(merged)
+
+    touched = rollups.changed_dates(fingerprints_before, rollups.date_fingerprints(merged))
+    rollups.update_rollups(merged, touched)
+    return reports
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the Master DB with the plan and Garmin data.")
+    parser.add_argument('--relink', action='store_true', help='Re-link the whole history instead of the last days')
+    parser.add_argument('--since', metavar='YYYY-MM', help='First month to re-link')
+    parser.add_argument('--until', metavar='YYYY-MM', help='Last month to re-link')
+    parser.add_argument('--workers', type=int, help=f"Worker processes (default {RELINK_WORKERS})")
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without saving')
+    args = parser.parse_args()
+
+    if args.relink: relink(args.since, args.until, args.workers, args.dry_run)
+    else: sync()
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import pandas as pd
 import os
-from . import config
+from . import config, storage, plan_parser, schema
 
+@storage.locked(config.PLAN_FILE)
 def update_weekly_plan(df_master):
     if not os.path.exists(config.PLAN_FILE): 
         print("⚠️ Plan file not found.")
@@ -24,7 +25,7 @@ def update_weekly_plan(df_master):
         elif '[SWIM]' in p_work: sport_tag = 'SWIM'
         
         a_work = str(row.get('Actual Workout', '')).strip()
-        a_dur = str(row.get('Actual Duration', '')).strip()
+        a_dur = schema.format_value('Actual Duration', row.get('Actual Duration'))
         
         # Only add to lookup if we have actual data
         if d and sport_tag and (a_work or a_dur):
@@ -34,74 +35,62 @@ def update_weekly_plan(df_master):
             # Key: (Date, Sport) -> Value: (Name, Duration, Status)
             lookup[(d, sport_tag)] = (a_work, a_dur, "COMPLETED")
 
-    # 2. Read and Rewrite the Markdown File
-    with open(config.PLAN_FILE, 'r', encoding='utf-8') as f: 
-        lines = f.readlines()
-        
-    new_lines = []
-    table_started = False
+    # 2. Rewrite matching Weekly Schedule rows in place (header and row lines come from the plan model)
+    schedule = plan_parser.load_model()['schedule']
     header_indices = {}
-    
-    for line in lines:
-        stripped = line.strip()
-        
-        # A. Detect Table Start
-        if not table_started:
-            if stripped.startswith('|') and 'date' in stripped.lower() and 'day' in stripped.lower():
-                table_started = True
-                headers = [h.strip().lower() for h in stripped.strip('|').split('|')]
-                for i, h in enumerate(headers):
-                    if 'date' in h: header_indices['date'] = i
-                    elif 'planned workout' in h: header_indices['planned_workout'] = i
-                    elif 'actual workout' in h: header_indices['actual_workout'] = i
-                    elif 'actual duration' in h: header_indices['actual_duration'] = i
-                    elif 'status' in h: header_indices['status'] = i
-            new_lines.append(line)
-            continue
-            
-        # B. Process Table Rows
-        if table_started and stripped.startswith('|') and '---' not in stripped:
-            cols = [c.strip() for c in stripped.strip('|').split('|')]
+    for i, h in enumerate(schedule['header']):
+        if 'date' in h: header_indices['date'] = i
+        elif 'planned workout' in h: header_indices['planned_workout'] = i
+        elif 'actual workout' in h: header_indices['actual_workout'] = i
+        elif 'actual duration' in h: header_indices['actual_duration'] = i
+        elif 'status' in h: header_indices['status'] = i
+
+    lines = storage.read_text(config.PLAN_FILE).split('\n')
+
+    if 'date' in header_indices and 'planned_workout' in header_indices:
+        for row in schedule['rows']:
+            cols = list(row['cells'])
             try:
                 # Extract key data from the row
-                if 'date' in header_indices and 'planned_workout' in header_indices:
-                    row_date_raw = cols[header_indices['date']]
-                    row_plan_raw = cols[header_indices['planned_workout']].upper()
-                    row_date = pd.to_datetime(row_date_raw, errors='coerce').strftime('%Y-%m-%d')
-                    
-                    row_tag = None
-                    if '[RUN]' in row_plan_raw: row_tag = 'RUN'
-                    elif '[BIKE]' in row_plan_raw: row_tag = 'BIKE'
-                    elif '[SWIM]' in row_plan_raw: row_tag = 'SWIM'
-                    
-                    key = (row_date, row_tag)
+                row_date_raw = cols[header_indices['date']]
+                row_plan_raw = cols[header_indices['planned_workout']].upper()
+                row_date = pd.to_datetime(row_date_raw, errors='coerce').strftime('%Y-%m-%d')
+                
+                row_tag = None
+                if '[RUN]' in row_plan_raw: row_tag = 'RUN'
+                elif '[BIKE]' in row_plan_raw: row_tag = 'BIKE'
+                elif '[SWIM]' in row_plan_raw: row_tag = 'SWIM'
+                
+                key = (row_date, row_tag)
+                
+                # If we found a match in the Master DB, update this row
+                if key in lookup:
+                    act_work, act_dur, status_update = lookup[key]
                     
-                    # If we found a match in the Master DB, update this row
-                    if key in lookup:
-                        act_work, act_dur, status_update = lookup[key]
+                    if 'actual_workout' in header_indices: 
+                        cols[header_indices['actual_workout']] = act_work
+                    if 'actual_duration' in header_indices: 
+                        cols[header_indices['actual_duration']] = act_dur
+                    if 'status' in header_indices: 
+                        cols[header_indices['status']] = status_update
                         
-                        if 'actual_workout' in header_indices: 
-                            cols[header_indices['actual_workout']] = act_work
-                        if 'actual_duration' in header_indices: 
-                            cols[header_indices['actual_duration']] = act_dur
-                        if 'status' in header_indices: 
-                            cols[header_indices['status']] = status_update
-                            
-                        # Reconstruct the line
-                        new_line = "| " + " | ".join(cols) + " |\n"
-                        new_lines.append(new_line)
-                    else:
-                        new_lines.append(line)
-                else:
-                    new_lines.append(line)
+                    # Reconstruct the line
+                    lines[row['line']] = "| " + " | ".join(cols) + " |"
             except:
-                new_lines.append(line)
-        else:
-            # Outside the table, just copy the line
-            new_lines.append(line)
+                continue
 
-    # 3. Write Changes
-    with open(config.PLAN_FILE, 'w', encoding='utf-8') as f: 
-        f.writelines(new_lines)
+    # 3. Write Changes (skipped when no row actually changed)
+    status = storage.write_text(config.PLAN_FILE, "\n".join(lines))
     
-    print("✅ Visuals updated in endurance_plan.md")
+    if status == 'semantic':
+        print("✅ Visuals updated in endurance_plan.md")
+    else:
+        print("ℹ️  Plan already up to date.")
+
+def main():
+    """Writes the current Master DB results into the plan, without a sync."""
+    from . import sync_database
+    update_weekly_plan(sync_database.load_master_db())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import os
+import json
+import hashlib
+import argparse
+import xml.etree.ElementTree as ET
+import numpy as np
+from . import config, storage, plan_parser, power_utils
+
+# --- SETTINGS ---
+DEFAULT_FTP = 241.0
+FREE_RIDE_FRACTION = 0.5    # FreeRide blocks have no target; assume easy spinning
+FOCUS_MIN_SHARE = 0.15      # A zone needs 15% of the workout to count as its focus
+
+# --- .ZWO PARSING ---
+def _attr(el, *names, default=0.0):
+    for n in names:
+        if el.get(n) is not None: return float(el.get(n))
+    return default
+
+def _secs(value):
+    return max(int(round(value)), 0)
+
+def parse_zwo(path):
+    """
+    Reads a .zwo file into a per-second target profile (fraction of FTP) plus
+    the segment boundaries. Returns {'name', 'sport', 'profile', 'segments'}.
+    """
+    root = ET.parse(path).getroot()
+    blocks, segments, t = [], [], 0
+
+    def add(kind, arr):
+        nonlocal t
+        if len(arr) == 0: return
+        blocks.append(arr)
+        segments.append({'type': kind, 'start': t, 'duration': len(arr)})
+        t += len(arr)
+
+    workout = root.find('workout')
+    for el in (workout if workout is not None else []):
+        tag = el.tag
+        if tag in ('Warmup', 'Cooldown', 'Ramp'):
+            dur = _secs(_attr(el, 'Duration'))
+            low, high = _attr(el, 'PowerLow'), _attr(el, 'PowerHigh')
+            add(tag, np.linspace(low, high, dur, endpoint=False) if dur else np.array([]))
+        elif tag == 'SteadyState':
+            dur = _secs(_attr(el, 'Duration'))
+            power = _attr(el, 'Power', default=(_attr(el, 'PowerLow') + _attr(el, 'PowerHigh')) / 2)
+            add(tag, np.full(dur, power))
+        elif tag == 'IntervalsT':
+            reps = int(_attr(el, 'Repeat', default=1))
+            on, off = _secs(_attr(el, 'OnDuration')), _secs(_attr(el, 'OffDuration'))
+            on_p = _attr(el, 'OnPower', 'PowerOnHigh', 'PowerOnLow')
+            off_p = _attr(el, 'OffPower', 'PowerOffHigh', 'PowerOffLow')
+            for _ in range(reps):
+                add('IntervalOn', np.full(on, on_p))
+                add('IntervalOff', np.full(off, off_p))
+        elif tag in ('FreeRide', 'MaxEffort'):
+            add(tag, np.full(_secs(_attr(el, 'Duration')), FREE_RIDE_FRACTION))
+
+    profile = np.concatenate(blocks) if blocks else np.zeros(0)
+    return {
+        'name': (root.findtext('name') or os.path.basename(path)).strip(),
+        'sport': (root.findtext('sportType') or 'bike').strip(),
+        'profile': profile,
+        'segments': segments
+    }
+
+def target_watts(filename, ftp=None):
+    """Per-second target watts for a library workout (used by compliance scoring)."""
+    path = os.path.join(config.ZWIFT_LIBRARY, os.path.basename(filename))
+    if not os.path.exists(path): return None, []
+    parsed = parse_zwo(path)
+    return parsed['profile'] * (ftp or current_ftp()), parsed['segments']
+
+# --- LOAD METRICS ---
+def current_ftp():
+    from .sync_database import get_current_ftp
+    return float(get_current_ftp() or DEFAULT_FTP)
+
+def power_zones(ftp):
+    """Plan zones rescaled to the given FTP -> (names, lower bounds in watts)."""
+    plan_zones = plan_parser.load_model()['zones']
+    zones = plan_zones['power']
+    basis = plan_zones['power_basis'] or ftp
+    names = [z['name'] for z in zones]
+    lows = np.array([z['low'] * ftp / basis for z in zones], dtype=float)
+    return names, lows
+
+def workout_metrics(profile, ftp, zone_names, zone_lows):
+    watts = profile * ftp
+    duration = len(watts)
+    np_w = power_utils.normalized_power(watts)
+    intensity, tss = power_utils.training_load(np_w, duration, ftp)
+    secs = power_utils.zone_seconds(watts, zone_lows) if len(zone_lows) else []
+    zone_time = {name: int(s) for name, s in zip(zone_names, secs)}
+
+    # Focus = the hardest zone that still holds a meaningful share of the workout
+    focus = None
+    for name, s in zip(zone_names, secs):
+        if duration and s / duration >= FOCUS_MIN_SHARE: focus = name
+
+    return {
+        'duration_s': duration,
+        'avg_power': round(float(watts.mean()), 1) if duration else 0.0,
+        'np': round(np_w, 1),
+        'if': round(intensity, 3),
+        'tss': round(tss, 1),
+        'zone_seconds': zone_time,
+        'zone_focus': focus
+    }
+
+# --- CATALOG INDEX ---
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def load_catalog(path=None):
+    path = path or config.ZWIFT_CATALOG
+    if not os.path.exists(path): return {'workouts': {}}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except ValueError:
+        return {'workouts': {}}
+
+def update_catalog(library_dir=None, path=None, ftp=None):
+    """
+    Re-parses only the .zwo files whose content hash changed (all of them if
+    FTP or zones changed) and drops entries for deleted files.
+    """
+    library_dir = library_dir or config.ZWIFT_LIBRARY
+    path = path or config.ZWIFT_CATALOG
+    ftp = ftp or current_ftp()
+    zone_names, zone_lows = power_zones(ftp)
+
+    catalog = load_catalog(path)
+    settings = {'ftp': ftp, 'zones': zone_names, 'zone_lows': [round(x, 1) for x in zone_lows]}
+    old = catalog.get('workouts', {}) if all(catalog.get(k) == v for k, v in settings.items()) else {}
+
+    files = sorted(f for f in os.listdir(library_dir) if f.endswith('.zwo')) if os.path.exists(library_dir) else []
+    workouts, parsed_count = {}, 0
+    for fname in files:
+        fpath = os.path.join(library_dir, fname)
+        digest = file_hash(fpath)
+        if fname in old and old[fname].get('sha256') == digest:
+            workouts[fname] = old[fname]
+            continue
+        try:
+            parsed = parse_zwo(fpath)
+        except ET.ParseError as e:
+            print(f"   ⚠️ Skipping {fname}: {e}")
+            continue
+        entry = {'sha256': digest, 'name': parsed['name'], 'sport': parsed['sport']}
+        entry.update(workout_metrics(parsed['profile'], ftp, zone_names, zone_lows))
+        workouts[fname] = entry
+        parsed_count += 1
+
+    catalog = dict(settings, workouts=workouts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    storage.write_json(path, catalog)
+    print(f"📚 ZWIFT CATALOG: {len(workouts)} workouts ({parsed_count} parsed, {len(workouts) - parsed_count} cached).")
+    return catalog
+
+def query(catalog, min_minutes=None, max_minutes=None, zone=None, tss_min=None, tss_max=None):
+    """Filters the catalog. zone matches the focus zone by substring ('sweet', 'zone 2')."""
+    results = []
+    for fname, w in catalog.get('workouts', {}).items():
+        minutes = w['duration_s'] / 60
+        if min_minutes is not None and minutes < min_minutes: continue
+        if max_minutes is not None and minutes > max_minutes: continue
+        if tss_min is not None and w['tss'] < tss_min: continue
+        if tss_max is not None and w['tss'] > tss_max: continue
+        if zone and zone.lower() not in str(w.get('zone_focus') or '').lower(): continue
+        results.append(dict(w, file=fname))
+    return sorted(results, key=lambda w: w['tss'])
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and query the Zwift workout library.")
+    parser.add_argument('--min-duration', type=float, help='Minutes')
+    parser.add_argument('--max-duration', type=float, help='Minutes')
+    parser.add_argument('--zone', help="Focus zone, e.g. 'sweet spot' or 'zone 2'")
+    parser.add_argument('--tss-min', type=float)
+    parser.add_argument('--tss-max', type=float)
+    parser.add_argument('--ftp', type=float, help='Override the FTP from the plan')
+    args = parser.parse_args()
+
+    catalog = update_catalog(ftp=args.ftp)
+    for w in query(catalog, args.min_duration, args.max_duration, args.zone, args.tss_min, args.tss_max):
+        print(f"   {w['duration_s'] // 60:>4} min | TSS {w['tss']:>5} | IF {w['if']:.2f} | "
+              f"NP {w['np']:>5}W | {w.get('zone_focus') or '--':<20} | {w['file']}")
+
+if __name__ == "__main__":
+    main()
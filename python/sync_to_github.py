@@ -1,7 +1,11 @@
 import os
+import json
+import argparse
 import shutil
+import hashlib
 import subprocess
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # ================= CONFIGURATION =================
 
@@ -14,9 +18,91 @@ SOURCE_DIR = r"C:\Users\samwi\OneDrive\Documents\Zwift\Workouts\7381990"
 #    I have updated this to the specific path you requested.
 DEST_DIR = r"C:\Users\samwi\Documents\training-plan\zwift_library"
 
+# 3. MANIFEST: Remembers path, size, mtime and hash of every synced file.
+#    Kept outside the repo so it never shows up in a commit.
+MANIFEST_FILE = os.path.join(os.path.expanduser("~"), ".zwift_sync_manifest.json")
+COPY_WORKERS = 8
+
+# 4. DELETION GUARD: An empty scan, or one that would delete more than this share
+#    of the manifest, is treated as an unreadable source (OneDrive offline, wrong
+#    path), not as real deletions. Run with --allow-deletions to apply them anyway.
+MAX_DELETE_FRACTION = 0.5
+
 # =================================================
 
-def sync_files():
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_FILE): return {}
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+def save_manifest(manifest):
+    with open(MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+def scan_source():
+    # We walk through the source folder recursively to find all .zwo files
+    sources = {}
+    for root, dirs, files in os.walk(SOURCE_DIR):
+        for filename in files:
+            if filename.endswith(".zwo"):
+                src = os.path.join(root, filename)
+                st = os.stat(src)
+                sources[filename] = (src, st.st_size, st.st_mtime)
+    return sources
+
+def plan_sync(sources, manifest, allow_deletions=False):
+    """
+    Decides what really changed. A matching size + mtime is trusted without
+    hashing; otherwise the content hash decides (OneDrive likes to touch mtimes).
+    Returns (copies, renames, deletions, new_manifest).
+    """
+    new_manifest, copies = {}, []
+    for filename, (src, size, mtime) in sources.items():
+        dst = os.path.join(DEST_DIR, filename)
+        entry = manifest.get(filename)
+        if entry and entry["size"] == size and entry["mtime"] == mtime and os.path.exists(dst):
+            new_manifest[filename] = entry
+            continue
+
+        digest = file_hash(src)
+        known = entry["hash"] if entry else (file_hash(dst) if os.path.exists(dst) else None)
+        new_manifest[filename] = {"size": size, "mtime": mtime, "hash": digest}
+        if known != digest or not os.path.exists(dst):
+            copies.append((filename, src, digest))
+
+    deletions = [f for f in manifest if f not in sources]
+
+    # A deleted file whose content re-appears under a new name is a rename
+    renames = []
+    deleted_by_hash = {manifest[f]["hash"]: f for f in deletions}
+    for item in list(copies):
+        filename, src, digest = item
+        old = deleted_by_hash.pop(digest, None)
+        if old and os.path.exists(os.path.join(DEST_DIR, old)):
+            renames.append((old, filename))
+            copies.remove(item)
+            deletions.remove(old)
+
+    # Suspicious deletions are skipped and stay in the manifest, so they are re-checked next run
+    if deletions and not allow_deletions and (not sources or len(deletions) > len(manifest) * MAX_DELETE_FRACTION):
+        print(f"   ⚠️ Warning: the scan found {len(sources)} files but would remove {len(deletions)} of "
+              f"{len(manifest)} synced ones. Skipping all deletions; re-run with --allow-deletions if that is intended.")
+        for f in deletions: new_manifest[f] = manifest[f]
+        deletions = []
+
+    return copies, renames, deletions, new_manifest
+
+def sync_files(allow_deletions=False):
     print(f"\n🚀 Starting Sync: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
     print(f"   📂 FROM: {SOURCE_DIR}")
     print(f"   📂 TO:   {DEST_DIR}")
@@ -31,29 +117,39 @@ def sync_files():
         os.makedirs(DEST_DIR)
         print(f"   [+] Created destination folder.")
 
-    files_copied = 0
-    
-    # --- Step 1: Copy Files ---
-    # We walk through the source folder recursively to find all .zwo files
-    for root, dirs, files in os.walk(SOURCE_DIR):
-        for filename in files:
-            if filename.endswith(".zwo"):
-                src = os.path.join(root, filename)
-                dst = os.path.join(DEST_DIR, filename)
-                
-                # Only copy if file is new or modified
-                if not os.path.exists(dst) or os.path.getmtime(src) > os.path.getmtime(dst):
-                    shutil.copy2(src, dst)
-                    files_copied += 1
-                    print(f"   [+] Copied: {filename}")
-
-    if files_copied == 0:
+    # --- Step 1: Diff against the manifest ---
+    manifest = load_manifest()
+    copies, renames, deletions, new_manifest = plan_sync(scan_source(), manifest, allow_deletions)
+
+    for old, new in renames:
+        os.replace(os.path.join(DEST_DIR, old), os.path.join(DEST_DIR, new))
+        print(f"   [~] Renamed: {old} -> {new}")
+
+    for filename in deletions:
+        dst = os.path.join(DEST_DIR, filename)
+        if os.path.exists(dst):
+            os.remove(dst)
+            print(f"   [-] Removed: {filename}")
+
+    def copy_one(item):
+        filename, src, _ = item
+        shutil.copy2(src, os.path.join(DEST_DIR, filename))
+        return filename
+
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+        for filename in pool.map(copy_one, copies):
+            print(f"   [+] Copied: {filename}")
+
+    save_manifest(new_manifest)
+    files_changed = len(copies) + len(renames) + len(deletions)
+
+    if files_changed == 0:
         print("   ✅ Files are already up to date locally.")
     else:
-        print(f"   📂 Copied {files_copied} new/updated files.")
+        print(f"   📂 {len(copies)} copied, {len(renames)} renamed, {len(deletions)} removed.")
 
     # --- Step 2: Git Push ---
-    if files_copied > 0:
+    if files_changed > 0:
         print("\n🐙 GIT: Pushing to GitHub...")
         try:
             # We assume the repo root is the parent of the destination folder
@@ -61,8 +157,8 @@ def sync_files():
             repo_root = os.path.dirname(DEST_DIR)
             os.chdir(repo_root)
 
-            # Add the specific folder
-            subprocess.run(["git", "add", "zwift_library/."], check=True)
+            # Add the specific folder (including deletions / renames)
+            subprocess.run(["git", "add", "--all", "zwift_library/"], check=True)
             
             # Check status
             status = subprocess.run(["git", "status", "--porcelain"], capture_output=True, text=True).stdout
@@ -78,5 +174,12 @@ def sync_files():
             print(f"   ⚠️ Git Error: {e}")
             print("   (Ensure you have GitHub Desktop installed or Git configured in this folder)")
 
+def main():
+    parser = argparse.ArgumentParser(description="Copy new or changed Zwift workouts into the repo and push them.")
+    parser.add_argument('--allow-deletions', action='store_true',
+                        help='Apply deletions even when the scan is empty or would remove most synced files')
+    args = parser.parse_args()
+    sync_files(allow_deletions=args.allow_deletions)
+
 if __name__ == "__main__":
-    sync_files()
\ No newline at end of file
+    main()
\ No newline at end of file
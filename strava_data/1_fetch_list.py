@@ -1,13 +1,20 @@
-import requests
 import os
+import sys
+import argparse
 from dotenv import load_dotenv
+import activity_cursor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'python'))
+from modules import cassette, storage
 
 load_dotenv()
 
 AUTH_URL = "https://www.strava.com/oauth/token"
-ACTIVITIES_URL = "https://www.strava.com/api/v3/athlete/activities"
 OUTPUT_FILE = "activity_ids.txt"
 
+# Strava calls go through the cassette (see python/modules/cassette.py)
+http = cassette.Http('strava')
+
 def get_access_token():
     payload = {
         'client_id': os.getenv('STRAVA_CLIENT_ID'),
@@ -17,7 +24,7 @@ def get_access_token():
         'f': 'json'
     }
     try:
-        res = requests.post(AUTH_URL, data=payload, verify=True)
+        res = http.post(AUTH_URL, data=payload, verify=True)
         res.raise_for_status()
         return res.json()['access_token']
     except Exception as e:
@@ -27,8 +34,8 @@ def get_access_token():
             print(f"Response: {res.text}")
         exit(1)
 
-def fetch_new_ids():
-    # 1. Load existing IDs to create a "Stop List"
+def fetch_new_ids(backfill_before=None):
+    # 1. Load existing IDs (dedupes the overlap around the cursor and during backfill)
     existing_activities = []
     existing_ids = set()
     
@@ -41,65 +48,46 @@ def fetch_new_ids():
     
     print(f"📂 Baseline contains {len(existing_ids)} known activities.")
 
+    newest_known = max((l.split(',')[2] for l in existing_activities if l.count(',') >= 2), default=None)
+    cursor = activity_cursor.Cursor('activity_ids', fallback_date=newest_known)
+
     token = get_access_token()
     headers = {'Authorization': f"Bearer {token}"}
     
+    if backfill_before:
+        print(f"⏪ Backfilling activities before {backfill_before}...")
+        activities = activity_cursor.iter_backfill(headers, backfill_before)
+    else:
+        print("🚀 Checking for NEW activities since the last sync...")
+        activities = activity_cursor.iter_new(headers, cursor.after)
+
     new_activities = []
-    page = 1
-    keep_fetching = True
-    
-    print("🚀 Checking for NEW activities since baseline...")
-    
-    while keep_fetching:
-        # Fetch 50 at a time
-        response = requests.get(ACTIVITIES_URL, headers=headers, params={'per_page': 10, 'page': page})
-        
-        # 🛡️ SAFETY CHECK: Handle API Errors
-        if response.status_code != 200:
-            print(f"\n❌ API Error {response.status_code} on Page {page}")
-            print(f"Message: {response.text}")
-            break
-            
-        data = response.json()
-        
-        # 🛡️ SAFETY CHECK: Ensure we got a list
-        if not isinstance(data, list):
-            print(f"\n❌ Unexpected response format (Expected List, got {type(data)}): {data}")
-            break
+    for activity in activities:
+        act_id = str(activity['id'])
+        cursor.advance(activity)
+        if act_id in existing_ids: continue
+        existing_ids.add(act_id)
         
-        if not data:
-            print(f"   - Page {page}: No more activities found.")
-            break
-            
-        print(f"   - Page {page}: Scanning {len(data)} activities...")
-            
-        for activity in data:
-            act_id = str(activity['id'])
-            
-            # STOP FETCHING if we hit a known ID
-            if act_id in existing_ids:
-                keep_fetching = False
-                continue
-                
-            # If it's new, add to our list
-            # We treat 'Ride' and 'VirtualRide' both as 'Ride' for your downstream logic if you want,
-            # but keeping raw type is safer. Downstream scripts filter by 'Ride' anyway.
-            summary = f"{act_id},{activity['type']},{activity['start_date_local'][:10]}"
-            new_activities.append(summary)
-            
-        page += 1
+        # Keeping the raw type ('Ride' vs 'VirtualRide'); downstream scripts filter by type anyway.
+        summary = f"{act_id},{activity['type']},{activity['start_date_local'][:10]}"
+        new_activities.append((activity['start_date_local'], summary))
         
     if new_activities:
         print(f"✨ Found {len(new_activities)} new activities!")
-        # Write NEW data at the top, followed by OLD data
-        with open(OUTPUT_FILE, "w") as f:
-            for line in new_activities:
-                f.write(f"{line}\n")
-            for line in existing_activities:
+        # Newest first, like the rest of the file
+        lines = [s for _, s in sorted(new_activities, reverse=True)] + existing_activities
+        lines.sort(key=lambda l: l.split(',')[2] if l.count(',') >= 2 else '', reverse=True)
+        with storage.atomic_open(OUTPUT_FILE) as f:
+            for line in lines:
                 f.write(f"{line}\n")
         print(f"✅ Updated '{OUTPUT_FILE}'")
     else:
         print("💤 No new activities found.")
 
+    if not backfill_before: cursor.save()
+
 if __name__ == "__main__":
-    fetch_new_ids()
+    parser = argparse.ArgumentParser(description="Update activity_ids.txt from Strava.")
+    parser.add_argument('--backfill', metavar='YYYY-MM-DD', help='List activities before this date instead of after the cursor')
+    args = parser.parse_args()
+    fetch_new_ids(args.backfill)
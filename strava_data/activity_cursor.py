@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import time
+from datetime import datetime, timezone, timedelta
+
+# --- INCREMENTAL ACTIVITY LISTING ---
+# Each consumer (activity list, cycling, running) keeps a high-water mark: the
+# start time of the newest activity it has fully handled. Daily runs only ask
+# Strava for activities after it (usually one request). Backfill walks
+# backwards with `before=` to cover gaps and never moves the mark.
+# One file per consumer so the separate workflows never edit the same file.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CURSOR_DIR = os.path.join(BASE_DIR, "sync_cursors")
+
+# The shared helpers are imported under their package name (modules.cassette,
+# modules.storage), so a process that also runs pipeline code has one copy of
+# each, with one set of locks and versions
+PYTHON_DIR = os.path.join(os.path.dirname(BASE_DIR), 'python')
+if PYTHON_DIR not in sys.path: sys.path.insert(0, PYTHON_DIR)
+from modules import cassette, storage
+
+# Every Strava request goes through `http` (requests.get / post, or the
+# record / replay cassette when API_CASSETTE is set, see python/modules/cassette.py)
+http = cassette.Http('strava')
+ACTIVITIES_URL = "https://www.strava.com/api/v3/athlete/activities"
+PER_PAGE = 100
+FALLBACK_MARGIN_DAYS = 2    # Local dates vs UTC epochs: start a little early, ids dedupe the overlap
+
+def to_epoch(value):
+    """Strava 'start_date' (UTC ISO), 'YYYY-MM-DD' or datetime -> epoch seconds."""
+    if isinstance(value, datetime): dt = value
+    elif len(value) == 10: dt = datetime.strptime(value, "%Y-%m-%d")
+    else: dt = datetime.strptime(value.replace('Z', ''), "%Y-%m-%dT%H:%M:%S")
+    if dt.tzinfo is None: dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+class Cursor:
+    def __init__(self, consumer, fallback_date=None):
+        """fallback_date ('YYYY-MM-DD') seeds the mark the first time, e.g. the newest cached activity."""
+        self.path = os.path.join(CURSOR_DIR, f"{consumer}.json")
+        self.after = None
+        self.held = False
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                try: self.after = json.load(f).get('after')
+                except ValueError: pass
+        if self.after is None and fallback_date:
+            start = datetime.strptime(fallback_date, "%Y-%m-%d") - timedelta(days=FALLBACK_MARGIN_DAYS)
+            self.after = to_epoch(start)
+        self.saved = self.after
+
+    def advance(self, activity):
+        """Moves the mark past an activity that is done with (processed or skipped on purpose)."""
+        if self.held: return
+        epoch = to_epoch(activity['start_date'])
+        if self.after is None or epoch > self.after: self.after = epoch
+
+    def hold(self):
+        """Stops advancing for this run, e.g. after a failure, so the activity is retried next time."""
+        self.held = True
+
+    def save(self):
+        if self.after is None or self.after == self.saved: return
+        os.makedirs(CURSOR_DIR, exist_ok=True)
+        with storage.atomic_open(self.path) as f:
+            json.dump({'after': self.after,
+                       'after_utc': datetime.fromtimestamp(self.after, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")}, f, indent=2)
+        self.saved = self.after
+
+def _pages(headers, params):
+    page = 1
+    while True:
+        try:
+            r = http.get(ACTIVITIES_URL, headers=headers, params=dict(params, page=page, per_page=PER_PAGE))
+            r.raise_for_status()
+            activities = r.json()
+        except Exception as e:
+            print(f"❌ API Error on page {page}: {e}")
+            return
+        if not isinstance(activities, list) or not activities: return
+        print(f"   - Page {page}: {len(activities)} activities")
+        for act in activities: yield act
+        if len(activities) < PER_PAGE: return
+        page += 1
+        time.sleep(1)
+
+def iter_new(headers, after):
+    """
+    Activities that started after the mark, oldest first (Strava sorts ascending with `after`).
+    With no mark yet this starts from epoch 0 rather than dropping `after`: without it
+    Strava lists newest first, the first advance() would jump the mark to the newest
+    activity and anything older left over by MAX_NEW_TO_PROCESS would never be listed again.
+    """
+    yield from _pages(headers, {'after': after if after is not None else 0})
+
+def iter_backfill(headers, before, after=None):
+    """Activities that started before `before` (newest first), optionally bounded below by `after`."""
+    params = {'before': to_epoch(before)}
+    if after: params['after'] = to_epoch(after)
+    yield from _pages(headers, params)
@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+import hashlib
+import numpy as np
+
+PYTHON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'python')
+if PYTHON_DIR not in sys.path: sys.path.insert(0, PYTHON_DIR)
+from modules import storage
+
+# --- CRITICAL POWER MODELS ---
+# 2-parameter:  P(t) = W'/t + CP                      (fit over 3-20 min efforts)
+# 3-parameter:  P(t) = W'/(t + tau) + CP, tau = W'/(Pmax - CP)   (Morton, 10 s - 30 min)
+# Both are solved in closed form: the 2-parameter model is linear in (W', CP),
+# and the 3-parameter model is linear for a fixed tau, so every tau on a grid
+# is solved at once and the best one kept.
+
+MODEL_VERSION = 1
+FIT_RANGE_2P = (180, 1200)
+FIT_RANGE_3P = (10, 1800)
+FIT_POINTS = 60                              # Log-spaced durations, so short efforts aren't drowned out
+TAU_GRID = np.geomspace(1, 120, 400)         # seconds
+
+def _samples(envelope, lo, hi):
+    """(durations, watts) at log-spaced points inside [lo, hi] that the envelope covers."""
+    envelope = np.asarray([w if w else np.nan for w in envelope], dtype=float)
+    hi = min(hi, len(envelope))
+    if hi <= lo: return np.array([]), np.array([])
+    t = np.unique(np.geomspace(lo, hi, FIT_POINTS).round().astype(int))
+    p = envelope[t - 1]
+    ok = ~np.isnan(p) & (p > 0)
+    return t[ok].astype(float), p[ok]
+
+def _r2(p, fitted):
+    ss_tot = ((p - p.mean()) ** 2).sum()
+    return float(1 - ((p - fitted) ** 2).sum() / ss_tot) if ss_tot else 0.0
+
+def fit_2p(envelope):
+    t, p = _samples(envelope, *FIT_RANGE_2P)
+    if len(t) < 3: return None
+    A = np.column_stack([1 / t, np.ones_like(t)])
+    (w_prime, cp), *_ = np.linalg.lstsq(A, p, rcond=None)
+    return {'cp': round(float(cp), 1), 'w_prime': round(float(w_prime)), 'pmax': None,
+            'r2': round(_r2(p, A @ [w_prime, cp]), 4)}
+
+def fit_3p(envelope):
+    t, p = _samples(envelope, *FIT_RANGE_3P)
+    if len(t) < 4: return None
+
+    # x[k, i] = 1 / (t_i + tau_k); per tau, regress p on x -> slope W', intercept CP
+    x = 1.0 / (t[None, :] + TAU_GRID[:, None])
+    xm, pm = x.mean(axis=1, keepdims=True), p.mean()
+    w_prime = ((x - xm) * (p - pm)).sum(axis=1) / ((x - xm) ** 2).sum(axis=1)
+    cp = pm - w_prime * xm[:, 0]
+    sse = ((p[None, :] - (w_prime[:, None] * x + cp[:, None])) ** 2).sum(axis=1)
+
+    k = int(np.argmin(sse))
+    fitted = w_prime[k] * x[k] + cp[k]
+    return {'cp': round(float(cp[k]), 1), 'w_prime': round(float(w_prime[k])),
+            'pmax': round(float(cp[k] + w_prime[k] / TAU_GRID[k])), 'r2': round(_r2(p, fitted), 4)}
+
+def envelope_hash(envelope):
+    payload = json.dumps([MODEL_VERSION, [int(w or 0) for w in envelope]])
+    return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+def fit_envelopes(envelopes, cache_path):
+    """
+    envelopes: {'all_time': [watts per second], 'six_week': [...]}.
+    Each envelope is only re-fitted when its content hash changed since the
+    last run (cache_path doubles as the published JSON). Returns the results.
+    """
+    try: cached = storage.read_json(cache_path, {})
+    except ValueError: cached = {}   # Unreadable cache: refit everything
+
+    results = {}
+    for name, env in envelopes.items():
+        digest = envelope_hash(env)
+        prev = cached.get(name)
+        if prev and prev.get('envelope_hash') == digest:
+            results[name] = prev
+            continue
+        results[name] = {'envelope_hash': digest, '2p': fit_2p(env), '3p': fit_3p(env)}
+
+    if results != cached:
+        with storage.atomic_open(cache_path) as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return results
+
+def markdown_section(results):
+    lines = ["\n## 🧮 Critical Power Model\n\n",
+             "| Envelope | Model | CP | W′ | Pmax | R² |\n",
+             "|---|---|---|---|---|---|\n"]
+    for name, label in [('all_time', 'All Time'), ('six_week', '6 Week')]:
+        for model in ['2p', '3p']:
+            fit = (results.get(name) or {}).get(model)
+            if not fit: continue
+            pmax = f"{fit['pmax']}w" if fit.get('pmax') else "--"
+            lines.append(f"| {label} | {model.upper()} | **{fit['cp']:.0f}w** | {fit['w_prime'] / 1000:.1f} kJ | {pmax} | {fit['r2']:.3f} |\n")
+    return "".join(lines)
@@ -0,0 +1,48 @@
+import numpy as np
+
+# --- MEAN-MAX CURVES ---
+# Shared by the cycling and running processors so a curve fix only lives in one place.
+
+def mean_max_curve(values, max_duration):
+    """
+    Best rolling average for every window length 1..min(len, max_duration) s.
+    One prefix sum, then each window is a single vectorized difference.
+    Missing samples (None / NaN) count as zero. A 2-D input (one series per
+    row, same length) is handled in the same pass and returns one curve per row.
+    """
+    values = np.nan_to_num(np.asarray(values, dtype=float))
+    series = np.atleast_2d(values)
+    limit = min(series.shape[1], max_duration)
+    csum = np.concatenate((np.zeros((series.shape[0], 1)), np.cumsum(series, axis=1)), axis=1)
+    curve = np.empty((series.shape[0], limit))
+    for w in range(1, limit + 1):
+        curve[:, w - 1] = (csum[:, w:] - csum[:, :-w]).max(axis=1) / w
+    return curve if values.ndim > 1 else curve[0]
+
+# --- GRADE-ADJUSTED PACE ---
+# Minetti et al. (2002) metabolic cost of running on a grade i (J/kg/m).
+# GAP velocity = velocity * C(i) / C(0): the flat speed that costs the same.
+GRADE_WINDOW = 10       # samples used to smooth altitude / distance before taking the grade
+MAX_GRADE = 0.45        # Minetti's polynomial is only fitted to ±45%
+
+def minetti_cost(grade):
+    i = np.clip(grade, -MAX_GRADE, MAX_GRADE)
+    return 155.4 * i**5 - 30.4 * i**4 - 43.3 * i**3 + 46.3 * i**2 + 19.5 * i + 3.6
+
+def grade_adjusted_velocity(velocity, altitude, distance):
+    """Per-sample GAP velocity (m/s). Falls back to the raw velocity when a stream is missing."""
+    velocity = np.nan_to_num(np.asarray(velocity, dtype=float))
+    if altitude is None or distance is None or len(altitude) != len(velocity) or len(distance) != len(velocity):
+        return velocity
+    altitude = np.asarray(altitude, dtype=float)
+    distance = np.asarray(distance, dtype=float)
+
+    # Grade over a centred window so GPS / barometer jitter doesn't explode on short steps
+    half = GRADE_WINDOW // 2
+    idx = np.arange(len(velocity))
+    ahead, behind = np.minimum(idx + half, len(idx) - 1), np.maximum(idx - half, 0)
+    run = distance[ahead] - distance[behind]
+    rise = altitude[ahead] - altitude[behind]
+    grade = np.divide(rise, run, out=np.zeros_like(run), where=run > 1)
+
+    return velocity * minetti_cost(grade) / minetti_cost(0.0)
@@ -1,8 +1,7 @@
-import requests
 import os
-import pandas as pd
+import sys
 import json
-import time
+import argparse
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
@@ -10,16 +9,26 @@ from dotenv import load_dotenv
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PARENT_DIR = os.path.dirname(BASE_DIR)
 load_dotenv(os.path.join(PARENT_DIR, '.env'))
+sys.path.insert(0, PARENT_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(PARENT_DIR), 'python'))
+from modules import cassette, storage
+import stream_archive
+import curves
+import activity_cursor
+import cp_model
+
+# Strava calls go through the cassette (see python/modules/cassette.py)
+http = cassette.Http('strava')
 
 CACHE_DIR = os.path.join(PARENT_DIR, "power_cache")
 OUTPUT_GRAPH = os.path.join(BASE_DIR, "power_curve_graph.json")
 OUTPUT_MD = os.path.join(BASE_DIR, "my_power_profile.md")
+OUTPUT_CP = os.path.join(BASE_DIR, "cp_model.json")
 
 MAX_DURATION_SECONDS = 21600 
 
 # --- BACKFILL SETTINGS ---
 MAX_NEW_TO_PROCESS = 10  
-CONSECUTIVE_EXISTING_LIMIT = 10
 
 KEY_INTERVALS = [
     ("1s", 1), ("5s", 5), ("15s", 15), ("30s", 30),
@@ -38,7 +47,7 @@ def get_access_token():
         'f': 'json'
     }
     try:
-        res = requests.post("https://www.strava.com/oauth/token", data=payload, verify=True)
+        res = http.post("https://www.strava.com/oauth/token", data=payload, verify=True)
         res.raise_for_status()
         return res.json()['access_token']
     except Exception as e:
@@ -54,7 +63,17 @@ def format_duration(seconds):
     if s > 0 or not parts: parts.append(f"{s}s")
     return " ".join(parts)
 
-def update_cache(token):
+def ride_entry(aid, name, date, watts):
+    curve = curves.mean_max_curve(watts, MAX_DURATION_SECONDS)
+    return {'id': aid, 'name': name, 'date': date, 'power_curve': [int(w) for w in curve]}
+
+def archive_meta(act):
+    keys = ['id', 'name', 'type', 'start_date', 'start_date_local', 'elapsed_time', 'moving_time', 'distance']
+    meta = {k: act.get(k) for k in keys}
+    meta['date'] = act['start_date_local'][:10]
+    return meta
+
+def update_cache(token, backfill_before=None):
     if not os.path.exists(CACHE_DIR): os.makedirs(CACHE_DIR)
     
     # 1. Check what we already have
@@ -66,94 +85,94 @@ def update_cache(token):
         return
 
     headers = {'Authorization': f"Bearer {token}"}
+    cursor = activity_cursor.Cursor('cycling', fallback_date=newest_cached_date())
     
-    page = 1
     processed_count = 0
-    consecutive_existing = 0
 
-    print("📡 Syncing recent rides from Strava...")
+    if backfill_before:
+        print(f"⏪ Backfilling rides before {backfill_before}...")
+        activities = activity_cursor.iter_backfill(headers, backfill_before)
+    else:
+        print("📡 Syncing recent rides from Strava...")
+        activities = activity_cursor.iter_new(headers, cursor.after)
     
-    while processed_count < MAX_NEW_TO_PROCESS:
+    for act in activities:
+        aid = act['id']
+        if act['type'] not in ['Ride', 'VirtualRide'] or (aid in cached_ids and stream_archive.has_streams(aid)):
+            cursor.advance(act)
+            continue
+        
+        print(f"   🚴 Processing NEW ride: {act['name']} ({act['start_date_local'][:10]})")
+
         try:
-            r = requests.get(
-                "https://www.strava.com/api/v3/athlete/activities", 
-                headers=headers, 
-                params={'page': page, 'per_page': 50}
-            )
-            r.raise_for_status()
-            activities = r.json()
-        except Exception as e:
-            print(f"❌ API Error on page {page}: {e}")
-            break
+            url = f"https://www.strava.com/api/v3/activities/{aid}/streams"
+            r_stream = http.get(url, headers=headers, params={'keys': ','.join(stream_archive.STREAM_KEYS), 'key_by_type': 'true'})
             
-        if not activities:
-            print("✅ No more activities found.")
-            break
-
-        for act in activities:
-            if act['type'] not in ['Ride', 'VirtualRide']:
-                continue
+            if r_stream.status_code == 429: 
+                print("⚠️ Rate Limit Hit. Stopping.")
+                cursor.hold()
+                break
             
-            aid = act['id']
-
-            if aid in cached_ids:
-                consecutive_existing += 1
-                if consecutive_existing >= CONSECUTIVE_EXISTING_LIMIT:
-                    print(f"✅ Found {CONSECUTIVE_EXISTING_LIMIT} existing rides in a row. Sync complete.")
-                    return
-                continue
+            streams = r_stream.json() if r_stream.status_code == 200 else {}
+            if streams: stream_archive.save_streams(aid, streams, archive_meta(act))
             
-            consecutive_existing = 0 
-            print(f"   🚴 Processing NEW ride: {act['name']} ({act['start_date_local'][:10]})")
-
-            try:
-                url = f"https://www.strava.com/api/v3/activities/{aid}/streams"
-                r_stream = requests.get(url, headers=headers, params={'keys': 'watts', 'key_by_type': 'true'})
-                
-                if r_stream.status_code == 429: 
-                    print("⚠️ Rate Limit Hit. Stopping.")
-                    return
-                
-                streams = r_stream.json() if r_stream.status_code == 200 else {}
-                
-                if 'watts' not in streams:
-                    with open(os.path.join(CACHE_DIR, f"{aid}.json"), "w") as f:
-                        json.dump({'id': aid, 'no_power': True, 'name': act['name'], 'date': act['start_date_local'][:10]}, f)
-                    processed_count += 1
-                    continue
-
-                r_det = requests.get(f"https://www.strava.com/api/v3/activities/{aid}", headers=headers)
-                details = r_det.json()
-
-                power_series = pd.Series(streams['watts']['data'])
-                limit = min(len(power_series), MAX_DURATION_SECONDS)
-                curve = []
-                for seconds in range(1, limit + 1):
-                    peak = int(power_series.rolling(window=seconds).mean().max())
-                    curve.append(peak)
-
-                data = {
-                    'id': aid,
-                    'name': details['name'],
-                    'date': details['start_date_local'][:10],
-                    'power_curve': curve
-                }
-                with open(os.path.join(CACHE_DIR, f"{aid}.json"), "w") as f:
-                    json.dump(data, f)
-                
+            if 'watts' not in streams:
+                with storage.atomic_open(os.path.join(CACHE_DIR, f"{aid}.json")) as f:
+                    json.dump({'id': aid, 'no_power': True, 'name': act['name'], 'date': act['start_date_local'][:10]}, f)
                 processed_count += 1
-                if processed_count >= MAX_NEW_TO_PROCESS:
-                    print(f"🛑 Reached limit of {MAX_NEW_TO_PROCESS} new files. Stopping.")
-                    return
+                cursor.advance(act)
+                continue
 
-            except Exception as e:
-                print(f"❌ Error processing {aid}: {e}")
+            r_det = http.get(f"https://www.strava.com/api/v3/activities/{aid}", headers=headers)
+            details = r_det.json()
 
-        page += 1
-        time.sleep(1)
+            data = ride_entry(aid, details['name'], details['start_date_local'][:10], streams['watts']['data'])
+            with storage.atomic_open(os.path.join(CACHE_DIR, f"{aid}.json")) as f:
+                json.dump(data, f)
+            
+            processed_count += 1
+            cursor.advance(act)
+            if processed_count >= MAX_NEW_TO_PROCESS:
+                print(f"🛑 Reached limit of {MAX_NEW_TO_PROCESS} new files. Stopping.")
+                break
 
+        except Exception as e:
+            print(f"❌ Error processing {aid}: {e}")
+            cursor.hold()  # Retry it next run
+
+    if not backfill_before: cursor.save()
     print(f"💾 Sync finished. Processed {processed_count} new rides.")
 
+def newest_cached_date():
+    """Seeds the cursor the first time it runs (the cache predates it)."""
+    newest = None
+    for fname in os.listdir(CACHE_DIR):
+        if not fname.endswith('.json'): continue
+        with open(os.path.join(CACHE_DIR, fname), "r") as f:
+            try: d = json.load(f).get('date')
+            except: continue
+        if d and (newest is None or d > newest): newest = d
+    return newest
+
+def rebuild_from_archive():
+    """Recomputes every ride's cache entry from the local stream archive (no API calls)."""
+    if not os.path.exists(CACHE_DIR): os.makedirs(CACHE_DIR)
+    rebuilt = 0
+    for aid in stream_archive.list_activities():
+        act = stream_archive.load(aid)
+        meta = act.meta
+        if meta.get('type') not in ['Ride', 'VirtualRide']: continue
+
+        watts = act.get('watts')
+        if watts is None:
+            data = {'id': meta['id'], 'no_power': True, 'name': meta['name'], 'date': meta['date']}
+        else:
+            data = ride_entry(meta['id'], meta['name'], meta['date'], watts)
+        with storage.atomic_open(os.path.join(CACHE_DIR, f"{aid}.json")) as f:
+            json.dump(data, f)
+        rebuilt += 1
+    print(f"♻️ Rebuilt {rebuilt} rides from the stream archive.")
+
 def generate_stats():
     print("📊 Generating Power Profile from Cache...")
     if not os.path.exists(CACHE_DIR):
@@ -194,8 +213,14 @@ def generate_stats():
                 if six_week_best[i] is None or watts > six_week_best[i]['watts']:
                     six_week_best[i] = entry
 
+    # CRITICAL POWER MODEL (re-fitted only when an envelope changed)
+    cp_fits = cp_model.fit_envelopes({
+        'all_time': [e['watts'] if e else 0 for e in all_time_best],
+        'six_week': [e['watts'] if e else 0 for e in six_week_best]
+    }, OUTPUT_CP)
+
     # MARKDOWN
-    with open(OUTPUT_MD, "w", encoding="utf-8") as f:
+    with storage.atomic_open(OUTPUT_MD) as f:
         f.write("# ⚡ Power Profile (1s - 6h)\n\n")
         f.write("| Duration | All Time Best | Date | 6 Week Best | Date |\n")
         f.write("|---|---|---|---|---|\n")
@@ -214,6 +239,8 @@ def generate_stats():
                 sw_val = f"{sw['watts']}w" if sw else "--"
                 f.write(f"| {label} | {at_val} | {fmt_link(at)} | {sw_val} | {fmt_link(sw)} |\n")
 
+        f.write(cp_model.markdown_section(cp_fits))
+
     # GRAPH JSON - UPDATED TO INCLUDE METADATA
     graph_data = []
     for i in range(MAX_DURATION_SECONDS):
@@ -234,12 +261,20 @@ def generate_stats():
             
             graph_data.append(item)
             
-    with open(OUTPUT_GRAPH, "w") as f:
+    with storage.atomic_open(OUTPUT_GRAPH) as f:
         json.dump(graph_data, f)
     
-    print(f"✅ Updated {OUTPUT_MD} and {OUTPUT_GRAPH}")
+    print(f"✅ Updated {OUTPUT_MD}, {OUTPUT_GRAPH} and {OUTPUT_CP}")
 
 if __name__ == "__main__":
-    token = get_access_token()
-    update_cache(token)
+    parser = argparse.ArgumentParser(description="Update the cycling power profile.")
+    parser.add_argument('--rebuild', action='store_true', help='Offline: recompute curves from the stream archive')
+    parser.add_argument('--backfill', metavar='YYYY-MM-DD', help='Fill gaps: process activities before this date')
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_from_archive()
+    else:
+        token = get_access_token()
+        update_cache(token, args.backfill)
     generate_stats()
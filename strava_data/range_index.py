@@ -0,0 +1,125 @@
+import os
+import json
+import argparse
+from bisect import bisect_left, bisect_right
+import numpy as np
+
+# --- DATE-RANGE BEST EFFORTS ---
+# Segment tree over rides sorted by date. Every node holds the per-duration
+# maximum of its children, so "best N-second effort between date A and B" is a
+# max over O(log n) nodes, and a whole curve is the same thing done per column.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCES = {
+    # sport: (cache dir, curve key, max duration, dtype)
+    'bike': (os.path.join(BASE_DIR, "power_cache"), 'power_curve', 21600, np.uint16),
+    'run':  (os.path.join(BASE_DIR, "running_cache"), 'velocity_curve', 14400, np.float32),
+}
+DEFAULT_SECONDS = [5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200]
+
+class RangeMaxIndex:
+    def __init__(self, rides, curves):
+        """rides: [{'id', 'date', 'name'}] sorted by date; curves: (n_rides, n_durations) array."""
+        self.rides = rides
+        self.dates = [r['date'] for r in rides]
+        n = max(len(rides), 1)
+        self.size = 1 << (n - 1).bit_length()
+        self.tree = np.zeros((2 * self.size, curves.shape[1]), dtype=curves.dtype)
+        self.tree[self.size:self.size + len(rides)] = curves
+        for node in range(self.size - 1, 0, -1):
+            np.maximum(self.tree[2 * node], self.tree[2 * node + 1], out=self.tree[node])
+
+    @classmethod
+    def from_cache(cls, sport='bike'):
+        cache_dir, key, max_duration, dtype = SOURCES[sport]
+        rides = []
+        for fname in os.listdir(cache_dir) if os.path.exists(cache_dir) else []:
+            if not fname.endswith('.json'): continue
+            with open(os.path.join(cache_dir, fname), "r") as f:
+                try: data = json.load(f)
+                except: continue
+            if data.get(key) and data.get('date'): rides.append(data)
+        rides.sort(key=lambda r: (r['date'], str(r['id'])))
+
+        curves = np.zeros((len(rides), max_duration), dtype=dtype)
+        for i, r in enumerate(rides):
+            c = np.array([v or 0 for v in r[key][:max_duration]], dtype=float)
+            curves[i, :len(c)] = c
+        meta = [{'id': r['id'], 'date': r['date'], 'name': r.get('name', '')} for r in rides]
+        return cls(meta, curves)
+
+    def _span(self, start=None, end=None):
+        """Ride index range [lo, hi) for dates start..end (inclusive, 'YYYY-MM-DD')."""
+        lo = bisect_left(self.dates, start) if start else 0
+        hi = bisect_right(self.dates, end) if end else len(self.dates)
+        return lo, hi
+
+    def _nodes(self, lo, hi):
+        nodes = []
+        lo += self.size
+        hi += self.size
+        while lo < hi:
+            if lo & 1: nodes.append(lo); lo += 1
+            if hi & 1: hi -= 1; nodes.append(hi)
+            lo >>= 1
+            hi >>= 1
+        return nodes
+
+    def curve(self, start=None, end=None):
+        """Best value for every duration within the date range."""
+        nodes = self._nodes(*self._span(start, end))
+        if not nodes: return np.zeros(self.tree.shape[1], dtype=self.tree.dtype)
+        return self.tree[nodes].max(axis=0)
+
+    def best(self, seconds, start=None, end=None):
+        """(value, ride) of the best `seconds`-long effort in the date range, or (0, None)."""
+        col = seconds - 1
+        nodes = self._nodes(*self._span(start, end))
+        if not nodes or not 0 <= col < self.tree.shape[1]: return 0, None
+        node = max(nodes, key=lambda n: self.tree[n, col])
+        value = self.tree[node, col]
+        if not value: return 0, None
+        # Walk down to the leaf that holds the winning value
+        while node < self.size:
+            node = 2 * node if self.tree[2 * node, col] == value else 2 * node + 1
+        return value.item(), self.rides[node - self.size]
+
+def format_value(sport, value):
+    if not value: return "--"
+    if sport == 'bike': return f"{value}w"
+    pace = 26.8224 / value
+    return f"{int(pace)}:{int((pace - int(pace)) * 60):02d}/mi"
+
+def parse_range(text):
+    """'2025-01-01..2025-06-30', '2025-06-01..' or 'all' -> (start, end)"""
+    if text == 'all': return None, None
+    start, _, end = text.partition('..')
+    return start or None, end or None
+
+def duration_seconds(text):
+    """argparse type for --seconds: a whole number of seconds, at least 1."""
+    seconds = int(text)
+    if seconds < 1: raise argparse.ArgumentTypeError(f"{text} is not a duration (need >= 1 second)")
+    return seconds
+
+def main():
+    parser = argparse.ArgumentParser(description="Best efforts for arbitrary date ranges.")
+    parser.add_argument('--sport', choices=list(SOURCES), default='bike')
+    parser.add_argument('--range', action='append', dest='ranges', metavar='A..B',
+                        help="Date range, e.g. 2025-01-01..2025-06-30 (repeatable, default: all)")
+    parser.add_argument('--seconds', type=duration_seconds, nargs='+', default=DEFAULT_SECONDS)
+    args = parser.parse_args()
+
+    index = RangeMaxIndex.from_cache(args.sport)
+    ranges = args.ranges or ['all']
+    print("| Duration | " + " | ".join(ranges) + " |")
+    print("|---|" + "---|" * len(ranges))
+    for s in args.seconds:
+        cells = []
+        for r in ranges:
+            value, ride = index.best(s, *parse_range(r))
+            cells.append(f"{format_value(args.sport, value)} ({ride['date']})" if ride else "--")
+        print(f"| {s}s | " + " | ".join(cells) + " |")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,7 @@
-import requests
 import os
-import pandas as pd
+import sys
 import json
-import time
+import argparse
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
@@ -10,6 +9,15 @@ from dotenv import load_dotenv
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PARENT_DIR = os.path.dirname(BASE_DIR)
 load_dotenv(os.path.join(PARENT_DIR, '.env'))
+sys.path.insert(0, PARENT_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(PARENT_DIR), 'python'))
+from modules import cassette, storage
+import stream_archive
+import curves
+import activity_cursor
+
+# Strava calls go through the cassette (see python/modules/cassette.py)
+http = cassette.Http('strava')
 
 CACHE_DIR = os.path.join(PARENT_DIR, "running_cache")
 OUTPUT_GRAPH = os.path.join(BASE_DIR, "running_pace_curve.json")
@@ -17,7 +25,6 @@ OUTPUT_MD = os.path.join(BASE_DIR, "my_running_prs.md")
 
 MAX_DURATION_SECONDS = 14400 # 4 Hours
 MAX_NEW_TO_PROCESS = 5
-CONSECUTIVE_EXISTING_LIMIT = 50
 
 # 1. TABLE CONFIGURATION (Distance Based - From Strava)
 DISTANCES = [
@@ -44,6 +51,12 @@ STRAVA_NAMES = {
     "50k": "50k", "50K": "50k"
 }
 
+# 2. DURATION TABLE (Raw vs GAP pace)
+PACE_DURATIONS = [
+    ("1min", 60), ("5min", 300), ("10min", 600), ("20min", 1200),
+    ("30min", 1800), ("1hr", 3600), ("2hr", 7200)
+]
+
 def get_access_token():
     payload = {
         'client_id': os.getenv('STRAVA_CLIENT_ID'),
@@ -53,7 +66,7 @@ def get_access_token():
         'f': 'json'
     }
     try:
-        res = requests.post("https://www.strava.com/oauth/token", data=payload, verify=True)
+        res = http.post("https://www.strava.com/oauth/token", data=payload, verify=True)
         res.raise_for_status()
         return res.json()['access_token']
     except Exception as e:
@@ -75,7 +88,24 @@ def format_time(seconds):
     if h > 0: return f"{h}:{m:02d}:{s:02d}"
     return f"{m}:{s:02d}"
 
-def update_cache(token):
+def pace_curves(velocity, altitude=None, distance=None):
+    """(raw, grade-adjusted) mean-max velocity curves from one pass. GAP is [] without altitude/distance."""
+    if altitude is None or distance is None:
+        return [float(v) for v in curves.mean_max_curve(velocity, MAX_DURATION_SECONDS)], []
+    gap = curves.grade_adjusted_velocity(velocity, altitude, distance)
+    raw_curve, gap_curve = curves.mean_max_curve([velocity, gap], MAX_DURATION_SECONDS)
+    return [float(v) for v in raw_curve], [round(float(v), 4) for v in gap_curve]
+
+def stream_data(streams, key):
+    return streams[key]['data'] if key in streams else None
+
+def archive_meta(act):
+    keys = ['id', 'name', 'type', 'start_date', 'start_date_local', 'elapsed_time', 'moving_time', 'distance']
+    meta = {k: act.get(k) for k in keys}
+    meta['date'] = act['start_date_local'][:10]
+    return meta
+
+def update_cache(token, backfill_before=None):
     if not os.path.exists(CACHE_DIR): os.makedirs(CACHE_DIR)
     
     # 1. Check local cache
@@ -87,107 +117,129 @@ def update_cache(token):
         return
 
     headers = {'Authorization': f"Bearer {token}"}
+    cursor = activity_cursor.Cursor('running', fallback_date=newest_cached_date())
     
-    page = 1
     processed_count = 0
-    consecutive_existing = 0
 
-    print("🏃 Syncing recent runs from Strava...")
+    if backfill_before:
+        print(f"⏪ Backfilling runs before {backfill_before}...")
+        activities = activity_cursor.iter_backfill(headers, backfill_before)
+    else:
+        print("🏃 Syncing recent runs from Strava...")
+        activities = activity_cursor.iter_new(headers, cursor.after)
     
-    while processed_count < MAX_NEW_TO_PROCESS:
+    for act in activities:
+        aid = act['id']
+        if act['type'] != "Run" or (aid in cached_ids and stream_archive.has_streams(aid)):
+            cursor.advance(act)
+            continue
+        
+        print(f"   🏃 Processing NEW run: {act['name']} ({act['start_date_local'][:10]})")
+
         try:
-            r = requests.get(
-                "https://www.strava.com/api/v3/athlete/activities", 
-                headers=headers, 
-                params={'page': page, 'per_page': 50}
-            )
-            r.raise_for_status()
-            activities = r.json()
-        except Exception as e:
-            print(f"❌ API Error on page {page}: {e}")
-            break
+            # 1. Get Streams (for Graph)
+            url = f"https://www.strava.com/api/v3/activities/{aid}/streams"
+            r_stream = http.get(url, headers=headers, params={'keys': ','.join(stream_archive.STREAM_KEYS), 'key_by_type': 'true'})
             
-        if not activities:
-            print("✅ No more activities found.")
-            break
-
-        for act in activities:
-            # FILTER: Only Runs
-            if act['type'] != "Run":
-                continue
+            if r_stream.status_code == 429:
+                print(f"⚠️ Rate Limit Exceeded. Stopping.")
+                cursor.hold()
+                break
+
+            streams = r_stream.json() if r_stream.status_code == 200 else {}
+            if streams: stream_archive.save_streams(aid, streams, archive_meta(act))
+
+            # 2. Get Details (for Table Best Efforts)
+            r_det = http.get(f"https://www.strava.com/api/v3/activities/{aid}", headers=headers)
+            details = r_det.json()
+
+            # 3. Calculate Pace Curve (Duration Based)
+            curve, gap_curve = [], []
+            if 'velocity_smooth' in streams:
+                curve, gap_curve = pace_curves(stream_data(streams, 'velocity_smooth'),
+                                               stream_data(streams, 'altitude'), stream_data(streams, 'distance'))
+
+            # 4. Extract Best Efforts (Distance Based)
+            efforts = []
+            if 'best_efforts' in details:
+                for e in details['best_efforts']:
+                    efforts.append({
+                        'name': e['name'],
+                        'elapsed_time': e['elapsed_time']
+                    })
+
+            # 5. Save EVERYTHING
+            data = {
+                'id': aid,
+                'name': details['name'],
+                'date': details['start_date_local'][:10],
+                'velocity_curve': curve, # For JSON Graph (Time)
+                'gap_curve': gap_curve,  # Grade-adjusted version of the same
+                'best_efforts': efforts  # For MD Table (Distance)
+            }
+            with storage.atomic_open(os.path.join(CACHE_DIR, f"{aid}.json")) as f:
+                json.dump(data, f)
             
-            aid = act['id']
-
-            # CHECK: Do we have it?
-            if aid in cached_ids:
-                consecutive_existing += 1
-                if consecutive_existing >= CONSECUTIVE_EXISTING_LIMIT:
-                    print("✅ Found 50 existing runs in a row. Sync complete.")
-                    return
-                continue
-            
-            # If we get here, it's a NEW run
-            consecutive_existing = 0
-            print(f"   🏃 Processing NEW run: {act['name']} ({act['start_date_local'][:10]})")
-
-            try:
-                # 1. Get Streams (for Graph)
-                url = f"https://www.strava.com/api/v3/activities/{aid}/streams"
-                r_stream = requests.get(url, headers=headers, params={'keys': 'velocity_smooth', 'key_by_type': 'true'})
-                
-                if r_stream.status_code == 429:
-                    print(f"⚠️ Rate Limit Exceeded. Stopping.")
-                    return
-
-                streams = r_stream.json() if r_stream.status_code == 200 else {}
-
-                # 2. Get Details (for Table Best Efforts)
-                r_det = requests.get(f"https://www.strava.com/api/v3/activities/{aid}", headers=headers)
-                details = r_det.json()
-
-                # 3. Calculate Pace Curve (Duration Based)
-                curve = []
-                if 'velocity_smooth' in streams:
-                    velocity_series = pd.Series(streams['velocity_smooth']['data'])
-                    limit = min(len(velocity_series), MAX_DURATION_SECONDS)
-                    # We only calculate every 1s
-                    for seconds in range(1, limit + 1):
-                        peak_mps = velocity_series.rolling(window=seconds).mean().max()
-                        curve.append(peak_mps)
-
-                # 4. Extract Best Efforts (Distance Based)
-                efforts = []
-                if 'best_efforts' in details:
-                    for e in details['best_efforts']:
-                        efforts.append({
-                            'name': e['name'],
-                            'elapsed_time': e['elapsed_time']
-                        })
-
-                # 5. Save EVERYTHING
-                data = {
-                    'id': aid,
-                    'name': details['name'],
-                    'date': details['start_date_local'][:10],
-                    'velocity_curve': curve, # For JSON Graph (Time)
-                    'best_efforts': efforts  # For MD Table (Distance)
-                }
-                with open(os.path.join(CACHE_DIR, f"{aid}.json"), "w") as f:
-                    json.dump(data, f)
-                
-                processed_count += 1
-                if processed_count >= MAX_NEW_TO_PROCESS:
-                    print(f"🛑 Reached limit of {MAX_NEW_TO_PROCESS} new files. Stopping.")
-                    return
-
-            except Exception as e:
-                print(f"❌ Error processing {aid}: {e}")
+            processed_count += 1
+            cursor.advance(act)
+            if processed_count >= MAX_NEW_TO_PROCESS:
+                print(f"🛑 Reached limit of {MAX_NEW_TO_PROCESS} new files. Stopping.")
+                break
 
-        page += 1
-        time.sleep(1)
+        except Exception as e:
+            print(f"❌ Error processing {aid}: {e}")
+            cursor.hold()  # Retry it next run
 
+    if not backfill_before: cursor.save()
     print(f"💾 Sync finished. Processed {processed_count} new runs.")
 
+def newest_cached_date():
+    """Seeds the cursor the first time it runs (the cache predates it)."""
+    newest = None
+    for fname in os.listdir(CACHE_DIR):
+        if not fname.endswith('.json'): continue
+        with open(os.path.join(CACHE_DIR, fname), "r") as f:
+            try: d = json.load(f).get('date')
+            except: continue
+        if d and (newest is None or d > newest): newest = d
+    return newest
+
+def rebuild_from_archive():
+    """
+    Recomputes every run's velocity curve from the local stream archive (no API
+    calls). Best efforts come from the activity details, so existing ones are kept.
+    """
+    if not os.path.exists(CACHE_DIR): os.makedirs(CACHE_DIR)
+    rebuilt = 0
+    for aid in stream_archive.list_activities():
+        act = stream_archive.load(aid)
+        meta = act.meta
+        if meta.get('type') != "Run": continue
+
+        path = os.path.join(CACHE_DIR, f"{aid}.json")
+        efforts = []
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                try: efforts = json.load(f).get('best_efforts', [])
+                except: pass
+
+        velocity = act.get('velocity_smooth')
+        curve, gap_curve = [], []
+        if velocity is not None:
+            curve, gap_curve = pace_curves(velocity, act.get('altitude'), act.get('distance'))
+        data = {
+            'id': meta['id'],
+            'name': meta['name'],
+            'date': meta['date'],
+            'velocity_curve': curve,
+            'gap_curve': gap_curve,
+            'best_efforts': efforts
+        }
+        with storage.atomic_open(path) as f:
+            json.dump(data, f)
+        rebuilt += 1
+    print(f"♻️ Rebuilt {rebuilt} runs from the stream archive.")
+
 def generate_stats():
     print("📊 Generating Running Profile...")
     if not os.path.exists(CACHE_DIR):
@@ -200,6 +252,8 @@ def generate_stats():
     # Storage for Graph (Time based)
     graph_all_time = [None] * MAX_DURATION_SECONDS
     graph_six_week = [None] * MAX_DURATION_SECONDS
+    gap_all_time = [None] * MAX_DURATION_SECONDS
+    gap_six_week = [None] * MAX_DURATION_SECONDS
     
     # Storage for Table (Distance based)
     table_all_time = {}
@@ -219,18 +273,20 @@ def generate_stats():
 
         is_recent = run_date >= six_weeks_ago
         
-        # A. Process Curve (Time based) for JSON
-        if 'velocity_curve' in run and run['velocity_curve']:
-            for i, mps in enumerate(run['velocity_curve']):
+        # A. Process Curves (Time based, raw + grade-adjusted) for JSON
+        for key, best, recent in [('velocity_curve', graph_all_time, graph_six_week),
+                                  ('gap_curve', gap_all_time, gap_six_week)]:
+            if not run.get(key): continue
+            for i, mps in enumerate(run[key]):
                 if i >= MAX_DURATION_SECONDS: break
                 if mps is None: continue
                 
                 # Higher mps is better
-                if graph_all_time[i] is None or mps > graph_all_time[i]:
-                    graph_all_time[i] = mps
+                if best[i] is None or mps > best[i]:
+                    best[i] = mps
                 if is_recent:
-                    if graph_six_week[i] is None or mps > graph_six_week[i]:
-                        graph_six_week[i] = mps
+                    if recent[i] is None or mps > recent[i]:
+                        recent[i] = mps
 
         # B. Process Best Efforts (Distance based) for Table
         if 'best_efforts' in run:
@@ -254,7 +310,7 @@ def generate_stats():
                         table_six_week[dist_key] = entry
 
     # 1. OUTPUT MARKDOWN (Distance Table)
-    with open(OUTPUT_MD, "w", encoding="utf-8") as f:
+    with storage.atomic_open(OUTPUT_MD) as f:
         f.write("# 🏃 My Best Efforts (Running)\n\n")
         f.write("| Distance | All Time Best | Date | 6 Week Best | Date |\n")
         f.write("|---|---|---|---|---|\n")
@@ -271,6 +327,15 @@ def generate_stats():
             sw_str = f"{format_time(sw['time'])}" if sw else "--"
             
             f.write(f"| {dist} | {at_str} | {fmt_link(at)} | {sw_str} | {fmt_link(sw)} |\n")
+
+        # Duration table: raw vs grade-adjusted pace
+        f.write("\n## ⛰️ Pace by Duration (Raw vs Grade-Adjusted)\n\n")
+        f.write("| Duration | All Time | All Time GAP | 6 Week | 6 Week GAP |\n")
+        f.write("|---|---|---|---|---|\n")
+        for label, seconds in PACE_DURATIONS:
+            i = seconds - 1
+            f.write(f"| {label} | {mps_to_pace(graph_all_time[i])} | {mps_to_pace(gap_all_time[i])} | "
+                    f"{mps_to_pace(graph_six_week[i])} | {mps_to_pace(gap_six_week[i])} |\n")
     
     # 2. OUTPUT JSON (Time Graph)
     graph_data = []
@@ -282,15 +347,25 @@ def generate_stats():
             graph_data.append({
                 "seconds": i + 1,
                 "all_time_mps": at_mps,
-                "six_week_mps": sw_mps if sw_mps else 0
+                "six_week_mps": sw_mps if sw_mps else 0,
+                "all_time_gap_mps": gap_all_time[i] or 0,
+                "six_week_gap_mps": gap_six_week[i] or 0
             })
             
-    with open(OUTPUT_GRAPH, "w") as f:
+    with storage.atomic_open(OUTPUT_GRAPH) as f:
         json.dump(graph_data, f)
     
     print(f"✅ Updated {OUTPUT_MD} (Table) and {OUTPUT_GRAPH} (Curve)")
 
 if __name__ == "__main__":
-    token = get_access_token()
-    update_cache(token)
+    parser = argparse.ArgumentParser(description="Update the running PRs and pace curve.")
+    parser.add_argument('--rebuild', action='store_true', help='Offline: recompute curves from the stream archive')
+    parser.add_argument('--backfill', metavar='YYYY-MM-DD', help='Fill gaps: process activities before this date')
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_from_archive()
+    else:
+        token = get_access_token()
+        update_cache(token, args.backfill)
     generate_stats()
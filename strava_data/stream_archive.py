@@ -0,0 +1,110 @@
+import os
+import json
+import numpy as np
+
+# --- RAW STREAM ARCHIVE ---
+# One compressed .npz per activity in stream_archive/, holding the quantized
+# Strava streams plus a small JSON metadata blob. On first read each stream is
+# unpacked once into .stream_cache/ as a plain .npy so later reads are
+# memory-mapped instead of decompressed again.
+# Neither directory is in git: binary blobs that only ever grow (an hour at 1 Hz
+# is 3600 x 18 bytes = ~65 KB before compression) would bloat every clone. The
+# workflows keep stream_archive/ in the Actions cache instead. If that cache is
+# ever evicted, `process_cycling.py --backfill` / `process_running.py --backfill`
+# fetch the streams again: a cached activity only counts as done once archived.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARCHIVE_DIR = os.path.join(BASE_DIR, "stream_archive")
+MMAP_DIR = os.path.join(BASE_DIR, ".stream_cache")
+
+# Strava stream key -> (storage dtype, scale). Stored value = round(value * scale)
+STREAM_SPECS = {
+    'time':            (np.uint32, 1),     # s
+    'watts':           (np.uint16, 1),     # W
+    'heartrate':       (np.uint8, 1),      # bpm
+    'cadence':         (np.uint8, 1),      # rpm / spm
+    'velocity_smooth': (np.uint16, 100),   # cm/s
+    'altitude':        (np.int32, 10),     # dm
+    'distance':        (np.uint32, 10),    # dm
+}
+STREAM_KEYS = list(STREAM_SPECS)
+
+def archive_path(aid):
+    return os.path.join(ARCHIVE_DIR, f"{aid}.npz")
+
+def has_streams(aid):
+    return os.path.exists(archive_path(aid))
+
+def quantize(key, data):
+    dtype, scale = STREAM_SPECS[key]
+    arr = np.asarray([np.nan if v is None else v for v in data], dtype=float) * scale
+    info = np.iinfo(dtype)
+    arr = np.clip(np.nan_to_num(np.round(arr)), info.min, info.max)
+    return arr.astype(dtype)
+
+def save_streams(aid, streams, meta):
+    """
+    streams: Strava's key_by_type response ({'watts': {'data': [...]}, ...}) or {key: list}.
+    meta:    id, name, type, date, start_date, start_date_local, elapsed_time...
+    """
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    arrays = {}
+    for key in STREAM_KEYS:
+        if key not in streams: continue
+        data = streams[key]['data'] if isinstance(streams[key], dict) else streams[key]
+        if data: arrays[key] = quantize(key, data)
+    arrays['meta'] = np.frombuffer(json.dumps(meta, sort_keys=True).encode('utf-8'), dtype=np.uint8)
+    # Written next to the archive and renamed over it, so a killed run never leaves half an .npz
+    path = archive_path(aid)
+    with open(path + '.tmp', 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(path + '.tmp', path)
+
+    # Drop any stale unpacked copy
+    cache = os.path.join(MMAP_DIR, str(aid))
+    if os.path.exists(cache):
+        for f in os.listdir(cache): os.remove(os.path.join(cache, f))
+
+class ArchivedActivity:
+    """Lazy view of one archived activity. Streams are unpacked and mmapped on first access."""
+
+    def __init__(self, aid):
+        self.id = str(aid)
+        self._npz = None
+        self._meta = None
+
+    def _archive(self):
+        if self._npz is None: self._npz = np.load(archive_path(self.id))
+        return self._npz
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            self._meta = json.loads(bytes(self._archive()['meta']).decode('utf-8'))
+        return self._meta
+
+    def keys(self):
+        return [k for k in self._archive().files if k != 'meta']
+
+    def raw(self, key):
+        """Quantized array, memory-mapped from the unpacked cache."""
+        cache_dir = os.path.join(MMAP_DIR, self.id)
+        path = os.path.join(cache_dir, f"{key}.npy")
+        if not os.path.exists(path):
+            if key not in self._archive().files: return None
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(path, self._archive()[key])
+        return np.load(path, mmap_mode='r')
+
+    def get(self, key):
+        """Stream in real units (float), or None if the activity has no such stream."""
+        raw = self.raw(key)
+        if raw is None: return None
+        return raw / float(STREAM_SPECS[key][1])
+
+def load(aid):
+    return ArchivedActivity(aid) if has_streams(aid) else None
+
+def list_activities():
+    if not os.path.exists(ARCHIVE_DIR): return []
+    return sorted(f[:-4] for f in os.listdir(ARCHIVE_DIR) if f.endswith('.npz'))